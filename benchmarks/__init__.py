@@ -0,0 +1,8 @@
+#!/usr/bin/env python
+
+
+"""
+Benchmarks of rtfparse. Run them from the repository root, e.g.:
+
+    python -m benchmarks.bench_tokenizer
+"""
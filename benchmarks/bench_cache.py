@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+
+
+"""
+Times parsing and rendering a document without the parse cache, when it is first cached and when its cached tokens are replayed
+"""
+
+import tempfile
+from argparse import ArgumentParser
+from pathlib import Path
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse.cache import Parse_Cache
+from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers.html_decapsulator import HTML_Decapsulator
+
+
+def render(data: bytes, cache: Parse_Cache = None) -> str:
+    parts = list()
+    HTML_Decapsulator().collect(Rtf_Parser(rtf_buffer=data, cache=cache).iter_events(), parts)
+    return "".join(parts)
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the parse cache")
+    parser.add_argument("--size", type=float, default=2.0, help="size of each synthetic document in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    parser.add_argument("--kinds", nargs="+", choices=tuple(corpus.CORPUS), default=("html_mail", "mixed", "unicode_text"), help="kinds of documents")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        cache = Parse_Cache(Path(directory))
+        for kind in args.kinds:
+            data = corpus.generate(kind, int(args.size * 1_000_000))
+            megabytes = len(data) / 1_000_000
+
+            def cold() -> None:
+                cache.clear()
+                Rtf_Parser(rtf_buffer=data, cache=cache).parse_file()
+
+            variants = {
+                "parse without cache": lambda: Rtf_Parser(rtf_buffer=data).parse_file(),
+                "parse and cache": cold,
+                "parse cached": lambda: Rtf_Parser(rtf_buffer=data, cache=cache).parse_file(),
+                "render without cache": lambda: render(data),
+                "render cached": lambda: render(data, cache),
+            }
+            for variant, function in variants.items():
+                elapsed = best_of(args.repeat, function)
+                print(f"{kind:<14} {variant:<21} {elapsed:8.3f} s {megabytes / elapsed:8.2f} MB/s")
+            print(f"{kind:<14} cache entry of {cache.scan_size() / 1_000_000:.2f} MB for {megabytes:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
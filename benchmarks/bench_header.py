@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+
+"""
+Times detecting the encoding of a document with the header scanner
+and with parsing a group from the first 48 bytes of the document, as it was done before
+"""
+
+import io
+from argparse import ArgumentParser
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse import entities, header
+
+
+def probe_group(data: bytes) -> str:
+    group = entities.Group("cp1252", io.BytesIO(data[:48]))
+    names = [
+        item for item in group.structure if isinstance(item, entities.Control_Word) and item.control_name in ("ansi", "ansicpg", "mac", "pc", "pca")
+    ]
+    parameters = [item.parameter for item in names if item.parameter]
+    return f"cp{parameters[-1]}" if parameters else "cp1252"
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the detection of the encoding")
+    parser.add_argument("--documents", type=int, default=10_000, help="number of documents whose encoding is detected")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    args = parser.parse_args()
+    documents = [corpus.generate(kind, 2_000) for kind in corpus.CORPUS]
+    documents = (documents * (args.documents // len(documents) + 1))[: args.documents]
+    variants = {
+        "group probe": lambda: [probe_group(data) for data in documents],
+        "header scan": lambda: [header.scan(data).encoding for data in documents],
+    }
+    for variant, function in variants.items():
+        elapsed = best_of(args.repeat, function)
+        print(f"{variant}: {elapsed:.3f} s, {elapsed / len(documents) * 1e6:.1f} us per document")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+
+
+"""
+Times building, saving and loading the index of the groups of a document,
+and finding and parsing only the font table and the pictures with it, compared with parsing the whole document
+"""
+
+import sys
+import tempfile
+from argparse import ArgumentParser
+from pathlib import Path
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse import index
+from rtfparse.parser import Rtf_Parser
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the index of the groups of a document")
+    parser.add_argument("--size", type=float, default=10.0, help="size of the synthetic document in MB")
+    parser.add_argument("--kind", choices=tuple(corpus.CORPUS), default="pict_blobs", help="kind of the synthetic document")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    args = parser.parse_args()
+    sys.setrecursionlimit(100_000)
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / f"{args.kind}.rtf"
+        path.write_bytes(corpus.generate(args.kind, int(args.size * 1_000_000)))
+        data = path.read_bytes()
+        megabytes = len(data) / 1_000_000
+        built = Rtf_Parser(rtf_path=path).read_index(save=True)
+        loaded = index.load(index.path_of(path))
+        print(f"document: {args.kind}, {megabytes:.2f} MB, {len(built)} groups, index {index.path_of(path).stat().st_size / 1_000_000:.2f} MB")
+        timings = {
+            "parse the document": lambda: Rtf_Parser(rtf_path=path).parse_file(),
+            "build the index": lambda: index.build(data, "cp1252"),
+            "save the index": lambda: built.save(index.path_of(path)),
+            "load the index": lambda: index.load(index.path_of(path)),
+            "find the pictures": lambda: loaded.find("pict"),
+            "parse the font table": lambda: [loaded.parse(data, span) for span in loaded.find("fonttbl")],
+            "read the pictures": lambda: [picture.data for picture in loaded.iter_pictures(data)],
+            "parse_groups(fonttbl)": lambda: list(Rtf_Parser(rtf_path=path).parse_groups("fonttbl")),
+        }
+        for name, function in timings.items():
+            elapsed = best_of(args.repeat, function)
+            print(f"{name:<24}{elapsed * 1000:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
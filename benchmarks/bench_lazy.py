@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+
+
+"""
+Compares decapsulating HTML from a fully parsed document with skipping or lazily parsing its groups
+"""
+
+import io
+from argparse import ArgumentParser
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse import entities
+from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers.html_decapsulator import HTML_Decapsulator
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark skipped and lazily parsed groups")
+    parser.add_argument("--size", type=float, default=5.0, help="size of the synthetic document in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    args = parser.parse_args()
+    data = corpus.pict_blobs(int(args.size * 1_000_000))
+    skip = HTML_Decapsulator().ignore_groups + ("pict",)
+    variants = {
+        "full": dict(),
+        "skip": dict(skip=skip),
+        "lazy": dict(lazy=True, skip=skip),
+    }
+    print(f"document: {len(data) / 1_000_000:.2f} MB")
+    parsed = Rtf_Parser(rtf_buffer=data, lazy=True).parse_file()
+    lazy_groups = [item for item in parsed.structure if isinstance(item, entities.Lazy_Group)]
+    # Parsing must not parse the lazy groups, otherwise the lazy variant measures eager parsing
+    assert lazy_groups and all(group._structure is None for group in lazy_groups), "parse_file parsed the lazy groups"
+    for variant, options in variants.items():
+
+        def decapsulate() -> None:
+            parsed = Rtf_Parser(rtf_buffer=data, **options).parse_file()
+            HTML_Decapsulator().render(parsed, io.StringIO())
+
+        elapsed = best_of(args.repeat, decapsulate)
+        print(f"{variant}: {elapsed:.3f} s, {len(data) / 1_000_000 / elapsed:.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+
+
+"""
+Measures the memory taken by the parsed tree of a synthetic RTF document
+"""
+
+import io
+import tracemalloc
+from argparse import ArgumentParser
+
+from benchmarks import corpus
+from rtfparse import entities
+from rtfparse.parser import Rtf_Parser
+
+
+def count_entities(group: entities.Group) -> int:
+    return sum(1 for _ in entities.walk(group))
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the memory footprint of the parsed tree")
+    parser.add_argument("--size", type=float, default=2.0, help="size of the synthetic document in MB")
+    args = parser.parse_args()
+    data = corpus.mixed(int(args.size * 1_000_000))
+    tracemalloc.start()
+    parsed = Rtf_Parser(rtf_file=io.BytesIO(data)).parse_file()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = count_entities(parsed)
+    print(f"document:   {len(data) / 1_000_000:.2f} MB, {count} entities")
+    print(f"tree:       {retained / 1_000_000:.2f} MB retained, {retained / count:.1f} bytes per entity")
+    print(f"peak:       {peak / 1_000_000:.2f} MB while parsing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+
+"""
+Times decompressing the compressed RTF body of a message and decapsulating its HTML,
+with the whole RTF decompressed into one buffer first and with the RTF streamed into the incremental parser
+as it is decompressed. The peak memory of both is measured in separate runs.
+"""
+
+import io
+import os
+import struct
+import tracemalloc
+import zlib
+from argparse import ArgumentParser
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse import incremental, lzfu
+from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers.html_decapsulator import HTML_Decapsulator
+
+
+def compress(data: bytes) -> bytes:
+    """
+    Returns `data` as compressed RTF, compressed greedily with matches of at least 3 bytes
+    """
+    body = bytearray()
+    group = bytearray()
+    control = 0
+    bits = 0
+    last = dict()
+    index = 0
+
+    def emit(flag: int, token: bytes) -> None:
+        nonlocal control, bits
+        control |= flag << bits
+        group.extend(token)
+        bits += 1
+        if bits == 8:
+            body.append(control)
+            body.extend(group)
+            group.clear()
+            control = bits = 0
+
+    while index < len(data):
+        key = data[index : index + 3]
+        start = last.get(key)
+        last[key] = index
+        length = 0
+        if start is not None and index - start < lzfu.DICTIONARY_SIZE - 100:
+            while length < 17 and index + length < len(data) and data[start + length] == data[index + length]:
+                length += 1
+        if length >= 3:
+            offset = (len(lzfu.INITIAL_DICTIONARY) + start) & lzfu.MASK
+            emit(1, struct.pack(">H", offset << 4 | (length - 2)))
+            index += length
+        else:
+            emit(0, data[index : index + 1])
+            index += 1
+    # The end is a reference to the position being written
+    emit(1, struct.pack(">H", ((len(lzfu.INITIAL_DICTIONARY) + len(data)) & lzfu.MASK) << 4))
+    if bits:
+        body.append(control)
+        body.extend(group)
+    crc = zlib.crc32(body, 0xFFFFFFFF) ^ 0xFFFFFFFF
+    return lzfu.HEADER.pack(len(body) + 12, len(data), lzfu.COMPRESSED, crc) + bytes(body)
+
+
+def buffered(compressed: bytes, file: io.BufferedIOBase) -> None:
+    rtf = lzfu.decompress(compressed)
+    HTML_Decapsulator().render_events(Rtf_Parser(rtf_buffer=rtf).iter_events(), file)
+
+
+def streamed(compressed: bytes, file: io.BufferedIOBase, chunk_size: int = 16 * 1024) -> None:
+    chunks = (compressed[start : start + chunk_size] for start in range(0, len(compressed), chunk_size))
+    renderer = HTML_Decapsulator()
+    parser = incremental.Incremental_Parser()
+    for chunk in lzfu.iter_decompressed(chunks):
+        renderer.render_events(parser.feed(chunk), file)
+    renderer.render_events(parser.close(), file)
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the pipeline of .msg files")
+    parser.add_argument("--size", type=float, default=2.0, help="size of the RTF of the synthetic message in MB")
+    # Pictures are long runs of hex digits, which the incremental parser gets in many chunks
+    parser.add_argument(
+        "--kind", choices=tuple(corpus.CORPUS), nargs="+", default=["html_mail", "pict_blobs"], help="kinds of the synthetic messages"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    args = parser.parse_args()
+    for kind in args.kind:
+        data = corpus.generate(kind, int(args.size * 1_000_000))
+        compressed = compress(data)
+        assert lzfu.decompress(compressed) == data
+        megabytes = len(data) / 1_000_000
+        print(f"message: {kind}, {megabytes:.2f} MB of RTF compressed into {len(compressed) / 1_000_000:.2f} MB")
+        elapsed = best_of(args.repeat, lambda: lzfu.decompress(compressed))
+        print(f"decompress {elapsed:8.3f} s {megabytes / elapsed:8.2f} MB/s")
+        with open(os.devnull, mode="wb") as file:
+            for variant, function in {"buffered": buffered, "streamed": streamed}.items():
+                elapsed = best_of(args.repeat, lambda: function(compressed, file))
+                tracemalloc.start()
+                function(compressed, file)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(f"{variant:<10} {elapsed:8.3f} s {megabytes / elapsed:8.2f} MB/s, peak {peak / 1_000_000:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
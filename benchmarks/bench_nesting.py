@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+
+
+"""
+Compares the cost of parsing deeply nested groups with the cost of parsing the same number of flat groups
+"""
+
+import io
+import time
+from argparse import ArgumentParser
+
+from rtfparse.parser import Rtf_Parser
+
+
+def deep_rtf(groups: int) -> bytes:
+    return rb"{\rtf1\ansi " + rb"{\b x" * groups + b"}" * groups + b"}"
+
+
+def flat_rtf(groups: int) -> bytes:
+    return rb"{\rtf1\ansi " + rb"{\b x}" * groups + b"}"
+
+
+def time_parse(data: bytes) -> float:
+    start = time.perf_counter()
+    Rtf_Parser(rtf_file=io.BytesIO(data)).parse_file()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark parsing of deeply nested RTF groups")
+    parser.add_argument("--groups", type=int, default=100_000, help="number of groups in each document")
+    args = parser.parse_args()
+    for label, data in (("flat", flat_rtf(args.groups)), ("deep", deep_rtf(args.groups))):
+        elapsed = time_parse(data)
+        print(f"{label}: {args.groups} groups in {elapsed:.3f} s, {elapsed / args.groups * 1e6:.2f} µs per group")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+
+"""
+Times writing a rendered document into files: one write per rendered fragment (`flush_size` 1),
+the buffered writes of `Renderer`, a binary file and rendering into memory
+"""
+
+import tempfile
+from argparse import ArgumentParser
+from pathlib import Path
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse import entities
+from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers.html_decapsulator import HTML_Decapsulator
+
+
+def render_into(path: Path, parsed: entities.Group, mode: str, flush_size: int = HTML_Decapsulator.flush_size) -> None:
+    renderer = HTML_Decapsulator()
+    renderer.flush_size = flush_size
+    if mode == "wb":
+        with open(path, mode=mode) as file:
+            renderer.render(parsed, file)
+    else:
+        with open(path, mode=mode, encoding="utf-8") as file:
+            renderer.render(parsed, file)
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark writing rendered output")
+    parser.add_argument("--size", type=float, default=2.0, help="size of the synthetic document in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    args = parser.parse_args()
+    data = corpus.html_mail(int(args.size * 1_000_000))
+    parsed = Rtf_Parser(rtf_buffer=data).parse_file()
+    print(f"document: {len(data) / 1_000_000:.2f} MB")
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "output.html"
+        variants = {
+            "text file, unbuffered": lambda: render_into(path, parsed, "w", flush_size=1),
+            "text file, buffered": lambda: render_into(path, parsed, "w"),
+            "binary file, buffered": lambda: render_into(path, parsed, "wb"),
+            "render_to_string": lambda: HTML_Decapsulator().render_to_string(parsed),
+            "render_to_bytes": lambda: HTML_Decapsulator().render_to_bytes(parsed),
+        }
+        for variant, function in variants.items():
+            elapsed = best_of(args.repeat, function)
+            print(f"{variant:<22} {elapsed:.3f} s, {len(data) / 1_000_000 / elapsed:.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+
+"""
+Times parsing a large document in one process and in parallel with an increasing number of processes,
+and the pre-scan which cuts it into partitions
+"""
+
+import os
+import sys
+import tempfile
+from argparse import ArgumentParser
+from pathlib import Path
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse import parallel
+from rtfparse.parser import Rtf_Parser
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark parsing a large document in parallel")
+    parser.add_argument("--size", type=float, default=20.0, help="size of the synthetic document in MB")
+    parser.add_argument("--kind", choices=tuple(corpus.CORPUS), default="html_mail", help="kind of the synthetic document")
+    parser.add_argument("--jobs", type=int, nargs="+", help="numbers of processes to try (default: powers of 2 up to the number of CPUs)")
+    parser.add_argument("--repeat", type=int, default=1, help="number of repetitions, the best is reported")
+    args = parser.parse_args()
+    sys.setrecursionlimit(100_000)
+    cpus = os.cpu_count() or 1
+    jobs = args.jobs or sorted({2**power for power in range(cpus.bit_length())} | {cpus})
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / f"{args.kind}.rtf"
+        path.write_bytes(corpus.generate(args.kind, int(args.size * 1_000_000)))
+        data = path.read_bytes()
+        megabytes = len(data) / 1_000_000
+        print(f"document: {args.kind}, {megabytes:.2f} MB, {cpus} CPUs")
+        prescan = best_of(args.repeat, lambda: parallel.partition(data, 1, 4 * cpus))
+        print(f"pre-scan: {prescan:.3f} s, {megabytes / prescan:.1f} MB/s")
+        serial = best_of(args.repeat, lambda: Rtf_Parser(rtf_path=path).parse_file())
+        print(f"1 process:    {serial:.3f} s, {megabytes / serial:.2f} MB/s")
+        for number in jobs:
+            if number < 2:
+                continue
+            elapsed = best_of(args.repeat, lambda: Rtf_Parser(rtf_path=path, jobs=number).parse_file())
+            print(f"{number} processes: {elapsed:.3f} s, {megabytes / elapsed:.2f} MB/s, {serial / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+
+"""
+Compares extracting the pictures of a document from its parsed tree with extracting them from the buffer
+"""
+
+from argparse import ArgumentParser
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse import entities
+from rtfparse.enums import Bytestring_Type
+from rtfparse.parser import Rtf_Parser
+
+
+def from_tree(data: bytes) -> list[bytes]:
+    pictures = list()
+    parsed = Rtf_Parser(rtf_buffer=data).parse_file()
+    for kind, entity in entities.walk(parsed):
+        if kind is Bytestring_Type.GROUP_START and entity.name == "pict":
+            hex_digits = "".join(item.text for item in entity.structure if isinstance(item, entities.Plain_Text))
+            pictures.append(bytes.fromhex(hex_digits))
+    return pictures
+
+
+def from_buffer(data: bytes) -> list[bytes]:
+    return [picture.data for picture in Rtf_Parser(rtf_buffer=data).iter_pictures()]
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the extraction of pictures")
+    parser.add_argument("--size", type=float, default=5.0, help="size of the synthetic document in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    args = parser.parse_args()
+    data = corpus.pict_blobs(int(args.size * 1_000_000))
+    assert from_tree(data) == from_buffer(data)
+    print(f"document: {len(data) / 1_000_000:.2f} MB")
+    for name, function in (("tree", from_tree), ("buffer", from_buffer)):
+        elapsed = best_of(args.repeat, lambda: function(data))
+        print(f"{name}: {elapsed:.3f} s, {len(data) / 1_000_000 / elapsed:.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+
+
+"""
+Times extracting the plain text of documents: streamed from the events of the parser, rendered from the parsed tree
+and from the lazily parsed tree. The peak memory of streaming into a file is measured in a separate run.
+"""
+
+import io
+import os
+import tracemalloc
+from argparse import ArgumentParser
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers.plain_text import Plain_Text_Renderer
+
+
+def stream(data: bytes, file: io.TextIOBase = None) -> None:
+    Plain_Text_Renderer().render_events(Rtf_Parser(rtf_buffer=data).iter_events(), file or io.StringIO())
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the plain text renderer")
+    parser.add_argument("--size", type=float, default=2.0, help="size of each synthetic document in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    parser.add_argument(
+        "--kinds", nargs="+", choices=tuple(corpus.CORPUS), default=("mixed", "html_mail", "long_text", "unicode_text"), help="kinds of documents"
+    )
+    args = parser.parse_args()
+    for kind in args.kinds:
+        data = corpus.generate(kind, int(args.size * 1_000_000))
+        megabytes = len(data) / 1_000_000
+        variants = {
+            "stream": lambda: stream(data),
+            "tree": lambda: Plain_Text_Renderer().render_to_string(Rtf_Parser(rtf_buffer=data).parse_file()),
+            "lazy tree": lambda: Plain_Text_Renderer().render_to_string(Rtf_Parser(rtf_buffer=data, lazy=True).parse_file()),
+        }
+        for variant, function in variants.items():
+            elapsed = best_of(args.repeat, function)
+            print(f"{kind:<14} {variant:<10} {elapsed:8.3f} s {megabytes / elapsed:8.2f} MB/s")
+        with open(os.devnull, mode="w", encoding="utf-8") as file:
+            tracemalloc.start()
+            stream(data, file)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        print(f"{kind:<14} stream peak {peak / 1_000_000:.2f} MB for {megabytes:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+
+"""
+Times rendering a parsed document with the dispatch tables of `Renderer`
+and with the if/elif chains and `try/except KeyError` lookups used before
+"""
+
+import io
+from argparse import ArgumentParser
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse import entities
+from rtfparse.enums import Bytestring_Type
+from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers.html_decapsulator import HTML_Decapsulator
+
+
+def render_chained(renderer: HTML_Decapsulator, parsed: entities.Group, file: io.StringIO) -> None:
+    render_word_func = {"par": renderer.newline, "line": renderer.newline, "tab": renderer.tab, "htmlrtf": renderer.ignore_rtf_toggle}
+    opened = None
+    ignored_depth = 0
+    for kind, item in entities.walk(parsed, renderer.ignore_groups):
+        if opened is not None:
+            if opened.name in renderer.ignore_groups:
+                ignored_depth = 1
+            opened = None
+        if ignored_depth:
+            if kind is Bytestring_Type.GROUP_START:
+                ignored_depth += 1
+            elif kind is Bytestring_Type.GROUP_END:
+                ignored_depth -= 1
+        elif kind is Bytestring_Type.GROUP_START:
+            opened = item
+        elif kind is Bytestring_Type.CONTROL_WORD:
+            try:
+                file.write(render_word_func[item.control_name](item))
+            except KeyError:
+                pass
+        elif kind is Bytestring_Type.CONTROL_SYMBOL:
+            if not renderer.ignore_rtf:
+                if item.text in ("|", "-", ":", "*"):
+                    pass
+                elif item.text == "~":
+                    file.write("\u00a0")
+                elif item.text == "_":
+                    file.write("\u2011")
+                else:
+                    file.write(item.text)
+        elif kind is Bytestring_Type.PLAIN_TEXT:
+            if not renderer.ignore_rtf:
+                file.write(item.text)
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the dispatch of renderers")
+    parser.add_argument("--size", type=float, default=2.0, help="size of the synthetic document in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    args = parser.parse_args()
+    data = corpus.html_mail(int(args.size * 1_000_000))
+    parsed = Rtf_Parser(rtf_buffer=data).parse_file()
+    events = sum(1 for _ in entities.walk(parsed))
+    print(f"document: {len(data) / 1_000_000:.2f} MB, {events} events")
+    variants = {
+        "chained": lambda: render_chained(HTML_Decapsulator(), parsed, io.StringIO()),
+        "tables": lambda: HTML_Decapsulator().render(parsed, io.StringIO()),
+    }
+    for variant, function in variants.items():
+        elapsed = best_of(args.repeat, function)
+        print(f"{variant}: {elapsed:.3f} s, {elapsed / events * 1e9:.0f} ns per event")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+
+"""
+Times saving and loading parsed documents in the binary format, compared to pickle and to parsing the documents again
+"""
+
+import pickle
+from argparse import ArgumentParser
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse import serialization
+from rtfparse.parser import Rtf_Parser
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the binary format of parsed documents")
+    parser.add_argument("--size", type=float, default=2.0, help="size of each synthetic document in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    parser.add_argument("--kinds", nargs="+", choices=tuple(corpus.CORPUS), default=("html_mail", "mixed", "pict_blobs"), help="kinds of documents")
+    args = parser.parse_args()
+    for kind in args.kinds:
+        data = corpus.generate(kind, int(args.size * 1_000_000))
+        megabytes = len(data) / 1_000_000
+        parsed = Rtf_Parser(rtf_buffer=data).parse_file()
+        dumped = serialization.dumps(parsed)
+        pickled = pickle.dumps(parsed, protocol=pickle.HIGHEST_PROTOCOL)
+        variants = {
+            "parse": lambda: Rtf_Parser(rtf_buffer=data).parse_file(),
+            "binary dump": lambda: serialization.dumps(parsed),
+            "binary load": lambda: serialization.loads(dumped),
+            "pickle dump": lambda: pickle.dumps(parsed, protocol=pickle.HIGHEST_PROTOCOL),
+            "pickle load": lambda: pickle.loads(pickled),
+        }
+        for variant, function in variants.items():
+            elapsed = best_of(args.repeat, function)
+            print(f"{kind:<14} {variant:<12} {elapsed:8.3f} s {megabytes / elapsed:8.2f} MB/s")
+        print(f"{kind:<14} binary {len(dumped) / 1_000_000:.2f} MB, pickle {len(pickled) / 1_000_000:.2f} MB for {megabytes:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+
+
+"""
+Compares parsing and rendering without statistics with collecting them, and prints the statistics of the documents
+"""
+
+import io
+import sys
+from argparse import ArgumentParser
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse import metrics
+from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers.html_decapsulator import HTML_Decapsulator
+
+
+def convert(data: bytes, stats: metrics.Parse_Stats = None) -> None:
+    HTML_Decapsulator(stats).render_events(Rtf_Parser(rtf_buffer=data, stats=stats).iter_events(), io.BytesIO())
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the cost of collecting statistics of parsing and rendering")
+    parser.add_argument("--size", type=float, default=1.0, help="size of the synthetic documents in MB")
+    parser.add_argument(
+        "--kind",
+        choices=tuple(corpus.CORPUS),
+        nargs="+",
+        default=["html_mail", "deep_nesting", "pict_blobs"],
+        help="kinds of the synthetic documents",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    parser.add_argument("--show", action="store_true", help="print the statistics of each document as JSON")
+    args = parser.parse_args()
+    sys.setrecursionlimit(100_000)
+    for kind in args.kind:
+        data = corpus.generate(kind, int(args.size * 1_000_000))
+        megabytes = len(data) / 1_000_000
+        disabled = best_of(args.repeat, lambda: convert(data))
+        enabled = best_of(args.repeat, lambda: convert(data, metrics.Parse_Stats(kind)))
+        print(
+            f"{kind}, {megabytes:.2f} MB: without statistics {megabytes / disabled:.2f} MB/s, with them {megabytes / enabled:.2f} MB/s ({enabled / disabled:.2f}x)"
+        )
+        if args.show:
+            stats = metrics.Parse_Stats(kind)
+            convert(data, stats)
+            print(stats.to_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
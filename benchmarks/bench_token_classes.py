@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+
+"""
+Times the master scanner `re_patterns.token` and the tokenizer on documents consisting mostly of one class of tokens each.
+
+The scanner is also timed with plain text ending at every line break, as it was scanned before wrapped text became one token,
+to show what the fast path for bulk plain text and hex encoded picture data saves.
+"""
+
+import re
+from argparse import ArgumentParser
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse import re_patterns, tokenizer
+
+ENCODING = "cp1252"
+# Plain text ending at every line break
+LINE_BY_LINE = re.compile(
+    re_patterns.token.pattern_bytes.replace(
+        re_patterns.pcdata, re_patterns.named_regex_group("text", re_patterns.not_control_character_or_newline + rb"+")
+    ),
+    re.DOTALL,
+)
+
+
+def repeated(body: bytes):
+    def generate(size: int, seed: int = 0) -> bytes:
+        return corpus.fill(size, corpus.HEADER, lambda: body)
+
+    return generate
+
+
+def hex_picture(size: int, seed: int = 0) -> bytes:
+    """
+    One picture of hex encoded data in lines of 128 digits
+    """
+    lines = b"\r\n".join(b"0123456789abcdef" * 8 for _ in range(size // 130 + 1))
+    return corpus.HEADER + rb"{\pict\pngblip\picw64\pich64 " + lines + b"}}"
+
+
+CLASSES = {
+    "plain text": corpus.long_text,
+    "wrapped text": corpus.wrapped_text,
+    "hex picture data": hex_picture,
+    "control words": repeated(rb"\b\i0\fs24\cf1 "),
+    "control symbols": repeated(rb"\~\-\_\{\}"),
+    "escaped characters": corpus.hex_escapes,
+    "unicode characters": corpus.unicode_text,
+    "groups": repeated(rb"{{}{\*}}"),
+}
+
+
+def scan(match, data: bytes) -> int:
+    """
+    Matches the tokens of `data` one after another, returns their number
+    """
+    count = 0
+    position = 0
+    size = len(data)
+    while position < size:
+        position = match(data, position).end()
+        count += 1
+    return count
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the scanner on each class of tokens")
+    parser.add_argument("--size", type=float, default=2.0, help="size of the synthetic documents in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    args = parser.parse_args()
+    print(f"{'class':<20}{'matches':>10}{'scan MB/s':>12}{'ns/match':>10}{'tokens':>10}{'tokenize MB/s':>15}{'line by line MB/s':>19}")
+    for name, generate in CLASSES.items():
+        data = generate(int(args.size * 1_000_000))
+        megabytes = len(data) / 1_000_000
+        matches = scan(re_patterns.token.match, data)
+        tokens = sum(1 for _ in tokenizer.tokenize(data, ENCODING))
+        scanned = best_of(args.repeat, lambda: scan(re_patterns.token.match, data))
+        tokenized = best_of(args.repeat, lambda: sum(1 for _ in tokenizer.tokenize(data, ENCODING)))
+        line_by_line = best_of(args.repeat, lambda: scan(LINE_BY_LINE.match, data))
+        print(
+            f"{name:<20}{matches:>10}{megabytes / scanned:>12.1f}{scanned / matches * 1e9:>10.0f}"
+            f"{tokens:>10}{megabytes / tokenized:>15.1f}{megabytes / line_by_line:>19.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
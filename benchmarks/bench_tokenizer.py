@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+
+
+"""
+Times the tokenizer and the complete parse of a synthetic RTF document
+"""
+
+import io
+import time
+from argparse import ArgumentParser
+
+from benchmarks import corpus
+from rtfparse import tokenizer
+from rtfparse.parser import Rtf_Parser
+
+
+def best_of(repeat: int, function) -> float:
+    timings = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the rtfparse tokenizer")
+    parser.add_argument("--size", type=float, default=2.0, help="size of the synthetic document in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    args = parser.parse_args()
+    data = corpus.mixed(int(args.size * 1_000_000))
+    megabytes = len(data) / 1_000_000
+    tokens = sum(1 for _ in tokenizer.tokenize(data, "cp1252"))
+    tokenize = best_of(args.repeat, lambda: sum(1 for _ in tokenizer.tokenize(data, "cp1252")))
+    parse = best_of(args.repeat, lambda: Rtf_Parser(rtf_file=io.BytesIO(data)).parse_file())
+    print(f"document: {megabytes:.2f} MB, {tokens} tokens")
+    print(f"tokenize: {tokenize:.3f} s, {megabytes / tokenize:.2f} MB/s")
+    print(f"parse:    {parse:.3f} s, {megabytes / parse:.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+
+"""
+Compares parsing without a trace hook with parsing while every token is traced into a debug log
+"""
+
+import logging
+import os
+from argparse import ArgumentParser
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse import tokenizer
+from rtfparse.parser import Rtf_Parser
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the cost of tracing the parser")
+    parser.add_argument("--size", type=float, default=1.0, help="size of the synthetic document in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    args = parser.parse_args()
+    data = corpus.html_mail(int(args.size * 1_000_000))
+    megabytes = len(data) / 1_000_000
+    root = logging.getLogger()
+    handler = logging.FileHandler(os.devnull, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("{message:<50s} {levelname:>9s} {asctime}.{msecs:03.0f} {module} {funcName} ", style="{"))
+    print(f"document: {megabytes:.2f} MB")
+    timings = dict()
+    timings["disabled"] = best_of(args.repeat, lambda: Rtf_Parser(rtf_buffer=data).parse_file())
+    root.addHandler(handler)
+    root.setLevel(logging.DEBUG)
+    try:
+        timings["traced"] = best_of(args.repeat, lambda: Rtf_Parser(rtf_buffer=data, trace=tokenizer.log_token).parse_file())
+    finally:
+        root.removeHandler(handler)
+        root.setLevel(logging.WARNING)
+        handler.close()
+    for variant, elapsed in timings.items():
+        print(f"{variant}: {elapsed:.3f} s, {megabytes / elapsed:.2f} MB/s")
+    print(f"speedup without tracing: {timings['traced'] / timings['disabled']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
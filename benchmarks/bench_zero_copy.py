@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+
+
+"""
+Compares streaming a memory-mapped file with streaming a copy of the file read into memory
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+
+from benchmarks import corpus
+from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers.html_decapsulator import HTML_Decapsulator
+
+VARIANTS = {
+    "read": lambda path: Rtf_Parser(rtf_buffer=path.read_bytes()),
+    "mmap": lambda path: Rtf_Parser(rtf_path=path),
+}
+
+
+def render(variant: str, path: Path) -> None:
+    with open(os.devnull, mode="w", encoding="utf-8") as output:
+        HTML_Decapsulator().render_events(VARIANTS[variant](path).iter_events(), output)
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark memory-mapped against read input")
+    parser.add_argument("--size", type=float, default=5.0, help="size of the synthetic document in MB")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "synthetic.rtf"
+        path.write_bytes(corpus.mixed(int(args.size * 1_000_000)))
+        print(f"document: {path.stat().st_size / 1_000_000:.2f} MB")
+        for variant in VARIANTS:
+            start = time.perf_counter()
+            render(variant, path)
+            elapsed = time.perf_counter() - start
+            tracemalloc.start()
+            render(variant, path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{variant}: {elapsed:.3f} s, peak of Python allocations {peak / 1_000_000:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+
+
+"""
+Generators of synthetic RTF documents for the benchmarks.
+
+Every generator creates a document of at least `size` bytes, the same for the same `seed`.
+Run this module to write a corpus into a directory:
+
+    python -m benchmarks.corpus --output-dir path/to/corpus --size 2
+"""
+
+import random
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable
+
+HEADER = rb"{\rtf1\ansi\ansicpg1252\deff0{\fonttbl{\f0\fswiss Arial;}{\f1\fmodern Courier New;}}{\colortbl;\red0\green0\blue255;}"
+WORDS = (b"lorem", b"ipsum", b"dolor", b"sit", b"amet", b"consectetur", b"adipiscing", b"elit", b"sed", b"do", b"eiusmod", b"tempor")
+
+
+def fill(size: int, header: bytes, chunk: Callable[[], bytes], footer: bytes = b"}") -> bytes:
+    chunks = [header]
+    length = len(header)
+    while length < size:
+        chunks.append(chunk())
+        length += len(chunks[-1])
+    chunks.append(footer)
+    return b"".join(chunks)
+
+
+def sentence(rng: random.Random, words: int) -> bytes:
+    return b" ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def mixed(size: int, seed: int = 0) -> bytes:
+    """
+    Groups, control words, symbols and plain text in random order
+    """
+    rng = random.Random(seed)
+
+    def chunk() -> bytes:
+        choice = rng.random()
+        if choice < 0.3:
+            return rb"{\b bold text %d}" % rng.randrange(1000)
+        elif choice < 0.6:
+            return rb"\par plain text with a few words in it " * rng.randint(1, 4)
+        elif choice < 0.7:
+            return rb"caf\'e9 cr\'e8me br\'fbl\'e9e "
+        elif choice < 0.8:
+            return rb"{\*\bkmkstart b%d}\fs%d " % (rng.randrange(1000), rng.randrange(8, 40))
+        elif choice < 0.9:
+            return rb"{\i{\ul nested {\sub deep}}}\~\-\_" + b"\r\n"
+        else:
+            return rb"{\*\htmltag64 <p class=MsoNormal>}\htmlrtf {\htmlrtf0 text\par}\htmlrtf0 "
+
+    return fill(size, rb"{\rtf1\ansi\ansicpg1252\deff0{\fonttbl{\f0\fswiss Arial;}}", chunk)
+
+
+def html_mail(size: int, seed: int = 0) -> bytes:
+    """
+    HTML encapsulated in RTF the way MS Outlook saves HTML formatted emails
+    """
+    rng = random.Random(seed)
+
+    def chunk() -> bytes:
+        text = sentence(rng, rng.randint(3, 20))
+        return (
+            rb"{\*\htmltag19 <div class=WordSection1>}\htmlrtf {\htmlrtf0 {\*\htmltag64 <p class=MsoNormal>}"
+            + rb"\htmlrtf {\htmlrtf0 "
+            + text
+            + rb"{\*\htmltag84 &nbsp;}\htmlrtf\'a0\htmlrtf0 \par"
+            + b"\r\n"
+            + rb"}\htmlrtf0 {\*\htmltag72 </p>}}\htmlrtf0 {\*\htmltag27 </div>}"
+            + b"\r\n"
+        )
+
+    return fill(
+        size, HEADER + rb"\fromhtml1 {\*\generator Microsoft Exchange Server;}{\*\htmltag1 <html><body>}", chunk, rb"{\*\htmltag1 </body></html>}}"
+    )
+
+
+def deep_nesting(size: int, seed: int = 0) -> bytes:
+    """
+    Groups nested hundreds of levels deep
+    """
+    rng = random.Random(seed)
+
+    def chunk() -> bytes:
+        depth = rng.randint(100, 1000)
+        return rb"{\i x" * depth + b"}" * depth
+
+    return fill(size, HEADER, chunk)
+
+
+def pict_blobs(size: int, seed: int = 0) -> bytes:
+    """
+    An HTML mail whose bulk are hex encoded pictures and a large font table
+    """
+    rng = random.Random(seed)
+    fonts = b"".join(rb"{\f%d\fswiss\fcharset0 Font %d;}" % (number, number) for number in range(200))
+
+    def chunk() -> bytes:
+        if rng.random() < 0.2:
+            picture = rng.randbytes(rng.randint(2_000, 20_000))
+            hex_digits = picture.hex().encode("ascii")
+            lines = b"\r\n".join(hex_digits[start : start + 128] for start in range(0, len(hex_digits), 128))
+            return rb"{\*\htmltag84 <img>}{\pict\pngblip\picw64\pich64 " + lines + b"}"
+        return rb"{\*\htmltag64 <p>}\htmlrtf {\htmlrtf0 some text of the mail\par}\htmlrtf0 "
+
+    return fill(size, rb"{\rtf1\ansi\ansicpg1252\fromhtml1 \deff0{\fonttbl" + fonts + b"}", chunk)
+
+
+def long_text(size: int, seed: int = 0) -> bytes:
+    """
+    Paragraphs of plain text with hardly any control words
+    """
+    rng = random.Random(seed)
+
+    def chunk() -> bytes:
+        return sentence(rng, rng.randint(200, 2000)) + rb"\par" + b"\r\n"
+
+    return fill(size, HEADER, chunk)
+
+
+def wrapped_text(size: int, seed: int = 0) -> bytes:
+    """
+    Paragraphs of plain text wrapped into lines of at most 80 bytes, the way many RTF writers save it
+    """
+    rng = random.Random(seed)
+
+    def chunk() -> bytes:
+        text = sentence(rng, rng.randint(200, 2000))
+        return b"\r\n".join(text[start : start + 80] for start in range(0, len(text), 80)) + rb"\par" + b"\r\n"
+
+    return fill(size, HEADER, chunk)
+
+
+def hex_escapes(size: int, seed: int = 0) -> bytes:
+    """
+    Text consisting mostly of escaped `\\'hh` characters
+    """
+    rng = random.Random(seed)
+    # Only bytes which are defined in cp1252
+    letters = range(0xC0, 0x100)
+
+    def chunk() -> bytes:
+        return b"".join(rb"\'%02x" % rng.choice(letters) for _ in range(rng.randint(5, 50))) + b" "
+
+    return fill(size, HEADER, chunk)
+
+
+def cjk_mail(size: int, seed: int = 0) -> bytes:
+    """
+    An HTML mail in Japanese (code page 932), whose text consists of escaped two-byte characters
+    """
+    rng = random.Random(seed)
+    # Hiragana and kanji, all of them two bytes long in cp932
+    characters = [chr(code) for code in (*range(0x3042, 0x3093), *range(0x4E00, 0x5000)) if len(chr(code).encode("cp932", errors="ignore")) == 2]
+
+    def chunk() -> bytes:
+        text = "".join(rng.choice(characters) for _ in range(rng.randint(5, 60))).encode("cp932")
+        return rb"{\*\htmltag64 <p>}\htmlrtf {\htmlrtf0 " + b"".join(rb"\'%02x" % byte for byte in text) + rb"\par}\htmlrtf0 " + b"\r\n"
+
+    header = rb"{\rtf1\ansi\ansicpg932\fromhtml1 \deff0{\fonttbl{\f0\fswiss\fcharset128 MS PGothic;}}{\*\htmltag1 <html><body>}"
+    return fill(size, header, chunk, rb"{\*\htmltag1 </body></html>}}")
+
+
+def unicode_text(size: int, seed: int = 0) -> bytes:
+    """
+    Text of `\\uN` characters with `?` fallbacks the way MS Word saves text outside of the code page,
+    surrogate pairs of emoji included
+    """
+    rng = random.Random(seed)
+    # Greek, Cyrillic, CJK and emoji, as signed 16 bit code units
+    characters = [*range(0x0391, 0x03CA), *range(0x0410, 0x0450), *range(0x4E00, 0x4F00)]
+
+    def unicode(code: int) -> bytes:
+        if code > 0xFFFF:
+            code -= 0x10000
+            return unicode(0xD800 + (code >> 10)) + unicode(0xDC00 + (code & 0x3FF))
+        return rb"\u%d?" % (code - 0x10000 if code > 0x7FFF else code)
+
+    def chunk() -> bytes:
+        text = b"".join(unicode(rng.choice(characters)) for _ in range(rng.randint(5, 60)))
+        return text + unicode(rng.randrange(0x1F600, 0x1F650)) + rb" \par" + b"\r\n"
+
+    return fill(size, HEADER + rb"\uc1 ", chunk)
+
+
+CORPUS = {
+    "mixed": mixed,
+    "html_mail": html_mail,
+    "deep_nesting": deep_nesting,
+    "pict_blobs": pict_blobs,
+    "long_text": long_text,
+    "wrapped_text": wrapped_text,
+    "hex_escapes": hex_escapes,
+    "cjk_mail": cjk_mail,
+    "unicode_text": unicode_text,
+}
+
+
+def generate(kind: str, size: int, seed: int = 0) -> bytes:
+    return CORPUS[kind](size, seed)
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Write a synthetic RTF corpus")
+    parser.add_argument("--output-dir", type=Path, required=True, help="directory where to write the documents")
+    parser.add_argument("--size", type=float, default=2.0, help="size of each document in MB")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random generators")
+    parser.add_argument("--kinds", nargs="+", choices=tuple(CORPUS), default=tuple(CORPUS), help="kinds of documents to write")
+    args = parser.parse_args()
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    for kind in args.kinds:
+        path = args.output_dir / f"{kind}.rtf"
+        path.write_bytes(generate(kind, int(args.size * 1_000_000), args.seed))
+        print(f"{path}: {path.stat().st_size / 1_000_000:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+
+"""
+Times the stages of parsing and rendering each kind of synthetic document and measures their peak memory.
+
+The results are written as JSON, so the results of two commits can be compared:
+
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --output after.json --compare before.json
+"""
+
+import datetime
+import io
+import json
+import platform
+import subprocess
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable
+
+from benchmarks import corpus
+from benchmarks.bench_tokenizer import best_of
+from rtfparse import tokenizer
+from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers.html_decapsulator import HTML_Decapsulator
+
+ENCODING = "cp1252"
+
+
+def peak_memory(function: Callable[[], object]) -> int:
+    """
+    Returns the peak of Python allocations while running `function`
+    """
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def tokenize(data: bytes) -> int:
+    return sum(1 for _ in tokenizer.tokenize(data, ENCODING))
+
+
+def parse(data: bytes):
+    return Rtf_Parser(rtf_buffer=data).parse_file()
+
+
+def render(parsed) -> str:
+    output = io.StringIO()
+    HTML_Decapsulator().render(parsed, output)
+    return output.getvalue()
+
+
+def measure(data: bytes, repeat: int) -> dict:
+    """
+    Measures the stages separately: tokenizing, parsing into a tree (which includes tokenizing)
+    and rendering the already parsed tree
+    """
+    megabytes = len(data) / 1_000_000
+    parsed = parse(data)
+    stages = {
+        "tokenize": lambda: tokenize(data),
+        "parse": lambda: parse(data),
+        "render": lambda: render(parsed),
+    }
+    results = {"bytes": len(data), "tokens": tokenize(data)}
+    for stage, function in stages.items():
+        seconds = best_of(repeat, function)
+        results[stage] = {"seconds": seconds, "mb_per_s": megabytes / seconds, "peak_mb": peak_memory(function) / 1_000_000}
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(("git", "rev-parse", "--short", "HEAD"), capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline: dict) -> None:
+    print(f"compared with {baseline['meta']['commit']} (ratio > 1 is slower now)")
+    for kind, stages in results["results"].items():
+        old_stages = baseline["results"].get(kind)
+        if old_stages is None:
+            continue
+        for stage in ("tokenize", "parse", "render"):
+            if stage in stages and stage in old_stages:
+                old, new = old_stages[stage], stages[stage]
+                print(
+                    f"{kind:<14} {stage:<9} time {old['seconds']:8.3f} -> {new['seconds']:8.3f} s ({new['seconds'] / old['seconds']:5.2f}x), "
+                    f"peak {old['peak_mb']:8.2f} -> {new['peak_mb']:8.2f} MB"
+                )
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Run the rtfparse benchmark suite")
+    parser.add_argument("--size", type=float, default=2.0, help="size of each synthetic document in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions, the best is reported")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the corpus generators")
+    parser.add_argument("--kinds", nargs="+", choices=tuple(corpus.CORPUS), default=tuple(corpus.CORPUS), help="kinds of documents to benchmark")
+    parser.add_argument("--output", type=Path, help="write the results as JSON into this file")
+    parser.add_argument("--compare", type=Path, help="compare the results with the JSON results of an earlier run")
+    args = parser.parse_args()
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "size": args.size,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": dict(),
+    }
+    for kind in args.kinds:
+        data = corpus.generate(kind, int(args.size * 1_000_000), args.seed)
+        measured = results["results"][kind] = measure(data, args.repeat)
+        for stage in ("tokenize", "parse", "render"):
+            print(
+                f"{kind:<14} {stage:<9} {measured[stage]['seconds']:8.3f} s {measured[stage]['mb_per_s']:8.2f} MB/s "
+                f"peak {measured[stage]['peak_mb']:8.2f} MB"
+            )
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.compare is not None:
+        compare(results, json.loads(args.compare.read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+
+"""
+Parsing and decapsulating RTF documents in asyncio applications.
+
+The document is read from an `asyncio.StreamReader` or an async iterable of bytes
+and parsed incrementally in small steps, returning control to the event loop after each of them,
+so other coroutines keep running while a large document is being processed.
+"""
+
+import asyncio
+import logging
+from typing import AsyncIterable, AsyncIterator, Optional, Union
+
+# Own modules
+from rtfparse import entities
+from rtfparse.incremental import Incremental_Parser
+from rtfparse.renderers.html_decapsulator import HTML_Decapsulator
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+CHUNK_SIZE = 65536  # bytes read from a stream reader at once
+STEP = 4096  # bytes parsed before control is returned to the event loop
+
+
+async def read_chunks(source: Union[asyncio.StreamReader, AsyncIterable[bytes]], chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Yields the chunks of bytes read from `source`
+    """
+    if isinstance(source, asyncio.StreamReader):
+        while chunk := await source.read(chunk_size):
+            yield chunk
+    else:
+        async for chunk in source:
+            yield chunk
+
+
+async def iter_event_batches(
+    source: Union[asyncio.StreamReader, AsyncIterable[bytes]], encoding: Optional[str] = None, step: int = STEP
+) -> AsyncIterator[list[entities.Event]]:
+    """
+    Yields the events of the document read from `source` in batches, one for every `step` bytes parsed.
+    Control is returned to the event loop before each batch.
+    """
+    parser = Incremental_Parser(encoding)
+    async for chunk in read_chunks(source):
+        view = memoryview(chunk)
+        for start in range(0, len(view), step):
+            await asyncio.sleep(0)
+            yield parser.feed(view[start : start + step])
+    yield parser.close()
+
+
+async def iter_events(
+    source: Union[asyncio.StreamReader, AsyncIterable[bytes]], encoding: Optional[str] = None, step: int = STEP
+) -> AsyncIterator[entities.Event]:
+    """
+    Yields the events of the document read from `source` as they are parsed
+    """
+    async for events in iter_event_batches(source, encoding, step):
+        for event in events:
+            yield event
+
+
+async def write(writer, text: str) -> None:
+    """
+    Writes `text` into an `asyncio.StreamWriter` encoded as UTF-8, or into any other writer with an async `write` method
+    """
+    if isinstance(writer, asyncio.StreamWriter):
+        writer.write(text.encode("utf-8"))
+        await writer.drain()
+    else:
+        await writer.write(text)
+
+
+async def decapsulate(
+    source: Union[asyncio.StreamReader, AsyncIterable[bytes]],
+    writer,
+    encoding: Optional[str] = None,
+    renderer: Optional[HTML_Decapsulator] = None,
+    step: int = STEP,
+) -> None:
+    """
+    Decapsulates the HTML of the document read from `source` and writes it into `writer` as it is rendered.
+    A given `renderer` forgets the state of the document it has rendered before.
+    """
+    renderer = HTML_Decapsulator() if renderer is None else renderer
+    renderer.reset()
+    parts = list()
+    async for events in iter_event_batches(source, encoding, step):
+        renderer.collect(events, parts)
+        if parts:
+            await write(writer, "".join(parts))
+            parts.clear()
+
+
+if __name__ == "__main__":
+    pass
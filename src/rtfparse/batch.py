@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+
+
+"""
+Conversion of many documents at once.
+
+The documents are decapsulated in a pool of worker processes, each writing its HTML straight into the output directory.
+A failure to convert a document is reported and does not stop the conversion of the others,
+not even if it makes its worker process die.
+"""
+
+import glob
+import logging
+import os
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, NamedTuple, Optional
+
+# Own modules
+from rtfparse import incremental, metrics, utils
+from rtfparse.cache import Parse_Cache
+from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers.html_decapsulator import HTML_Decapsulator
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+SUFFIXES = (".rtf", ".msg")
+
+
+class Job_Result(NamedTuple):
+    source: pathlib.Path
+    target: pathlib.Path
+    size: int
+    seconds: float
+    error: str = ""
+    stats: Optional[dict] = None  # `metrics.Parse_Stats.as_dict` of the document, if collected
+
+
+class Batch_Stats:
+    """
+    Aggregates the results of the converted documents
+    """
+
+    def __init__(self) -> None:
+        self.converted = 0
+        self.failed = 0
+        self.bytes = 0
+        self.cpu_seconds = 0.0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.documents = list()  # statistics of the documents, if collected
+
+    def add(self, result: Job_Result) -> None:
+        if result.error:
+            self.failed += 1
+        else:
+            self.converted += 1
+            self.bytes += result.size
+        self.cpu_seconds += result.seconds
+        if result.stats is not None:
+            self.documents.append(result.stats)
+        self.elapsed = time.perf_counter() - self.started
+
+    def summary(self) -> str:
+        elapsed = self.elapsed or float("inf")
+        megabytes = self.bytes / 1_000_000
+        return (
+            f"Converted {self.converted} of {self.converted + self.failed} files ({self.failed} failed), "
+            f"{megabytes:.2f} MB in {self.elapsed:.2f} s: "
+            f"{self.converted / elapsed:.1f} files/s, {megabytes / elapsed:.2f} MB/s, "
+            f"{self.cpu_seconds:.2f} s spent in workers"
+        )
+
+
+def collect_sources(inputs: Iterable[str], file_list: Optional[pathlib.Path] = None) -> list[pathlib.Path]:
+    """
+    Returns the paths of the documents to convert, without duplicates and in the given order.
+    An input may be a file, a directory (searched recursively for .rtf and .msg files) or a glob pattern.
+    `file_list` is a text file with one such input per line.
+    """
+    inputs = list(inputs)
+    if file_list is not None:
+        inputs.extend(line.strip() for line in file_list.read_text(encoding="utf-8").splitlines() if line.strip())
+    sources = dict()
+    for item in inputs:
+        path = pathlib.Path(item)
+        if path.is_dir():
+            found = sorted(file for file in path.rglob("*") if file.suffix.lower() in SUFFIXES and file.is_file())
+        elif path.is_file():
+            found = [path]
+        else:
+            found = sorted(pathlib.Path(file) for file in glob.glob(item, recursive=True) if pathlib.Path(file).is_file())
+            if not found:
+                logger.warning(utils.warn(f"No files found for {item}"))
+        for file in found:
+            sources.setdefault(file.resolve(), file)
+    return list(sources.values())
+
+
+def assign_targets(sources: Iterable[pathlib.Path], output_dir: pathlib.Path) -> list[tuple[pathlib.Path, pathlib.Path]]:
+    """
+    Pairs every source with a path of its HTML file in `output_dir`.
+    Sources with the same name get a number appended, so no output is overwritten.
+    """
+    taken = set()
+    pairs = list()
+    for source in sources:
+        name = source.stem
+        number = 1
+        while name.lower() in taken:
+            name = f"{source.stem}_{number}"
+            number += 1
+        taken.add(name.lower())
+        pairs.append((source, output_dir / f"{name}.html"))
+    return pairs
+
+
+def convert_msg(source: pathlib.Path, target: pathlib.Path, stats: Optional[metrics.Parse_Stats] = None) -> int:
+    """
+    Decapsulates the HTML of the MS Outlook .msg file `source` into `target`
+    while its RTF body is being decompressed. Returns the size of the RTF.
+    """
+    # Imported here, so the workers converting only RTF files do not need to import olefile
+    from rtfparse import msg
+
+    renderer = HTML_Decapsulator(stats)
+    parser = incremental.Incremental_Parser()
+    size = 0
+    with msg.Msg_File(source) as message, open(target, mode="wb") as html_file:
+        for chunk in metrics.timed(stats, message.iter_rtf(), "decompress"):
+            size += len(chunk)
+            with metrics.measure(stats, "parse") as stage:
+                events = parser.feed(chunk)
+                stage.bytes += len(chunk)
+            renderer.render_events(events, html_file)
+        with metrics.measure(stats, "parse"):
+            events = parser.close()
+        renderer.render_events(events, html_file)
+    return size
+
+
+def convert(source: pathlib.Path, target: pathlib.Path, cache_dir: Optional[pathlib.Path] = None, collect_stats: bool = False) -> Job_Result:
+    """
+    Decapsulates the HTML of `source` into `target`. Runs in a worker process and never raises,
+    errors are returned in the result.
+    RTF files parsed before are not tokenized again if `cache_dir` is given.
+    The result has the statistics of parsing and rendering the document if `collect_stats` is True.
+    """
+    start = time.perf_counter()
+    size = 0
+    stats = metrics.Parse_Stats(str(source)) if collect_stats else None
+    try:
+        if source.suffix.lower() == ".msg":
+            size = convert_msg(source, target, stats)
+        else:
+            size = source.stat().st_size
+            cache = None if cache_dir is None else Parse_Cache(cache_dir)
+            parser = Rtf_Parser(rtf_path=source, cache=cache, stats=stats)
+            with open(target, mode="wb") as html_file:
+                HTML_Decapsulator(stats).render_events(parser.iter_events(), html_file)
+    except Exception as err:
+        target.unlink(missing_ok=True)
+        return Job_Result(source, target, size, time.perf_counter() - start, repr(err), None if stats is None else stats.as_dict())
+    return Job_Result(source, target, size, time.perf_counter() - start, stats=None if stats is None else stats.as_dict())
+
+
+def report(stats: Batch_Stats, result: Job_Result) -> None:
+    stats.add(result)
+    if result.error:
+        logger.error(f"Failed to convert {result.source}: {result.error}")
+    else:
+        logger.debug(f"Converted {result.source} to {result.target} in {result.seconds:.3f} s")
+
+
+def run_pool(
+    pairs: list[tuple[pathlib.Path, pathlib.Path]],
+    workers: Optional[int],
+    cache_dir: Optional[pathlib.Path],
+    collect_stats: bool,
+    stats: Batch_Stats,
+) -> dict[tuple[pathlib.Path, pathlib.Path], BrokenProcessPool]:
+    """
+    Converts the sources of `pairs` into their targets in a new pool of `workers` processes and adds the results to `stats`.
+    Returns the pairs which have not been converted because a worker process died (e.g. killed for running out of memory
+    or crashed in an extension module), which breaks the whole pool, with the error they failed with.
+    """
+    broken = dict()
+    # A pool of fewer files does not need as many processes
+    workers = max(min(workers or os.cpu_count() or 1, len(pairs)), 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(convert, source, target, cache_dir, collect_stats): (source, target) for source, target in pairs}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except BrokenProcessPool as err:
+                broken[futures[future]] = err
+                continue
+            except Exception as err:
+                source, target = futures[future]
+                result = Job_Result(source, target, 0, 0.0, repr(err))
+            report(stats, result)
+    return broken
+
+
+def run_batch(
+    sources: Iterable[pathlib.Path],
+    output_dir: pathlib.Path,
+    workers: Optional[int] = None,
+    cache_dir: Optional[pathlib.Path] = None,
+    collect_stats: bool = False,
+) -> Batch_Stats:
+    """
+    Decapsulates the HTML of all `sources` into `output_dir` using `workers` processes
+    (as many as there are CPUs if None) and returns the statistics of the run.
+    The workers share the parse cache in `cache_dir`, if given.
+    If `collect_stats` is True, the statistics of each document are collected in the `documents` of the result.
+    A worker process which dies breaks the pool, the files not converted then are converted again in new pools,
+    halved each time, so only a file which breaks a pool of its own is reported as failed.
+    """
+    utils.provide_dir(output_dir)
+    stats = Batch_Stats()
+    pairs = assign_targets(sources, output_dir)
+    logger.info(f"Converting {len(pairs)} files into {output_dir}")
+    pending = [pairs]
+    while pending:
+        pairs = pending.pop()
+        broken = run_pool(pairs, workers, cache_dir, collect_stats, stats)
+        if len(pairs) == 1:
+            for (source, target), err in broken.items():
+                target.unlink(missing_ok=True)
+                report(stats, Job_Result(source, target, 0, 0.0, repr(err)))
+        elif broken:
+            logger.warning(utils.warn(f"A worker process died, converting {len(broken)} files again"))
+            broken = list(broken)
+            half = (len(broken) + 1) // 2
+            pending.extend(part for part in (broken[half:], broken[:half]) if part)
+    logger.info(stats.summary())
+    return stats
+
+
+if __name__ == "__main__":
+    pass
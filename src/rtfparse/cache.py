@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+
+
+"""
+On-disk cache of the tokens of parsed documents.
+
+A document which has been parsed before is not tokenized again, its events are replayed from the cached tokens.
+The entries are keyed by a hash of the document's content, the version of rtfparse and the names of the skipped groups,
+so a changed document or a new version of the parser never gets stale tokens.
+
+Each entry is a file in the cache directory. Entries are written into a temporary file first
+and then renamed over the entry, so worker processes sharing the directory never read a partially written entry.
+When the entries grow over `max_size` bytes, the least recently used ones are deleted.
+"""
+
+import array
+import functools
+import hashlib
+import logging
+import marshal
+import os
+import pathlib
+import sys
+import tempfile
+import zlib
+from typing import Callable, Iterable, Iterator, Optional
+
+# Own modules
+from rtfparse import entities, tokenizer, utils
+from rtfparse.__about__ import __version__
+from rtfparse.enums import Bytestring_Type
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+FORMAT_VERSION = 2
+SUFFIX = ".tokens"
+# Token kinds by their number in the cache entries, and the other way round
+KINDS = tuple(Bytestring_Type)
+KIND_NUMBERS = {kind: number for number, kind in enumerate(KINDS)}
+
+
+class Parse_Cache:
+    """
+    A directory of cached token streams, at most `max_size` bytes large
+    """
+
+    def __init__(self, directory: pathlib.Path, max_size: int = 256 * 1024 * 1024) -> None:
+        self.directory = utils.provide_dir(pathlib.Path(directory))
+        self.max_size = max_size
+        self._size = None  # size of the entries as last seen by this process, scanned when first needed
+        # Marshalled data is specific to the Python version
+        python = f"{sys.version_info[0]}.{sys.version_info[1]}"
+        self.version = f"rtfparse {__version__} format {FORMAT_VERSION} marshal {marshal.version} python {python}".encode("ascii")
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, data: utils.Buffer, skip: Iterable[str] = ()) -> str:
+        """
+        Returns the key of the entry of `data` tokenized with the groups named in `skip` skipped
+        """
+        digest = hashlib.blake2b(self.version, digest_size=20)
+        digest.update(b"\0".join(name.encode("ascii") for name in sorted(skip)))
+        digest.update(b"\0")
+        digest.update(data)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> pathlib.Path:
+        return self.directory / f"{key}{SUFFIX}"
+
+    def get(self, key: str) -> Optional[Iterator[tokenizer.Token]]:
+        """
+        Returns the cached tokens of `key`, or None if they are not cached or their entry is corrupt, which is then deleted
+        """
+        path = self.path(key)
+        try:
+            with open(path, mode="rb") as file:
+                entry = file.read()
+            # Mark the entry as recently used
+            os.utime(path)
+            tokens = load_tokens(entry)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, EOFError, TypeError, zlib.error) as err:
+            logger.warning(utils.warn(f"Dropping the unreadable cache entry {path}: {err!r}"))
+            self.discard(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return tokens
+
+    def put(self, key: str, tokens: list[tokenizer.Token]) -> None:
+        """
+        Caches the `tokens` under `key`, replacing the entry atomically
+        """
+        entry = dump_tokens(tokens)
+        try:
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError as err:
+            logger.warning(utils.warn(f"Cannot write the cache entry {key}: {err!r}"))
+            return
+        try:
+            with os.fdopen(descriptor, mode="wb") as file:
+                file.write(entry)
+            os.replace(temporary, self.path(key))
+        except OSError as err:
+            logger.warning(utils.warn(f"Cannot write the cache entry {key}: {err!r}"))
+            self.discard(pathlib.Path(temporary))
+            return
+        if self._size is None:
+            self._size = self.scan_size()
+        else:
+            self._size += len(entry)
+        if self._size > self.max_size:
+            self.evict()
+
+    def scan_size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def entries(self) -> Iterator[tuple[pathlib.Path, int, float]]:
+        """
+        Yields the path, size and time of last use of every entry
+        """
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Deleted by another process in the meantime
+                continue
+            yield path, stat.st_size, stat.st_mtime
+
+    def evict(self) -> None:
+        """
+        Deletes the least recently used entries until the entries take at most three quarters of `max_size`,
+        so that not every following `put` has to evict again
+        """
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        limit = self.max_size * 3 // 4
+        evicted = 0
+        for path, entry_size, _ in entries:
+            if size <= limit:
+                break
+            self.discard(path)
+            size -= entry_size
+            evicted += 1
+        self._size = size
+        logger.debug(f"Evicted {evicted} entries from the cache {self.directory}")
+
+    def discard(self, path: pathlib.Path) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        for path, _, _ in self.entries():
+            self.discard(path)
+        self._size = 0
+
+    def iter_events(
+        self,
+        data: utils.Buffer,
+        encoding: str,
+        root: Optional[entities.Group] = None,
+        skip: frozenset[str] = frozenset(),
+        trace: Optional[Callable[[tokenizer.Token], None]] = None,
+    ) -> Iterator[entities.Event]:
+        """
+        Yields the events of `data` like `entities.iter_events`, replaying the cached tokens if `data` has been parsed before.
+        Otherwise, the tokens are recorded and cached as soon as the document has been read to its end.
+        """
+        key = self.key(data, skip)
+        tokens = self.get(key)
+        if tokens is not None:
+            logger.debug(f"Replaying the cached tokens of {key}")
+            if trace is not None:
+                tokens = tokenizer.traced(tokens, trace)
+            yield from entities.iter_events(data, encoding, root=root, skip=skip, tokens=tokens)
+            return
+        tokens = list()
+        record = tokens.append
+        if trace is not None:
+
+            def record(token: tokenizer.Token) -> None:
+                tokens.append(token)
+                trace(token)
+
+        events = entities.iter_events(data, encoding, root=root, skip=skip, trace=record)
+        first = next(events)
+        yield first
+        for event in events:
+            if event.kind is Bytestring_Type.GROUP_END and event.entity is first.entity:
+                # The end of the document, consumers of the events need not read any further
+                self.put(key, tokens)
+            yield event
+
+
+def intern(column: Iterable) -> tuple[tuple, bytes]:
+    """
+    Returns the distinct values of `column` and the index of each value among them.
+    Values are told apart by their type, too, so that True is not taken for 1.
+    """
+    table = dict()
+    setdefault = table.setdefault
+    ids = array.array("I", [setdefault((value.__class__, value), len(table)) for value in column])
+    return tuple(value for _, value in table), ids.tobytes()
+
+
+def extern(values: tuple, ids: bytes, count: int) -> Iterator:
+    """
+    Returns an iterator of the values at the `count` indices `ids` into `values`
+    """
+    indices = array.array("I")
+    indices.frombytes(ids)
+    if len(indices) != count or (indices and max(indices) >= len(values)):
+        raise ValueError("Column of values does not fit the tokens")
+    return map(values.__getitem__, indices)
+
+
+def dump_tokens(tokens: list[tokenizer.Token]) -> bytes:
+    """
+    Serializes `tokens` column by column: kinds as bytes, positions as arrays,
+    names and parameters as tables of their distinct values with an array of indices into them,
+    compressed with the fastest level of zlib
+    """
+    kinds, starts, ends, names, parameters = zip(*tokens) if tokens else ((), (), (), (), ())
+    typecode = "I" if not ends or max(ends) < 2**32 else "q"
+    columns = marshal.dumps(
+        (
+            typecode,
+            bytes(map(KIND_NUMBERS.__getitem__, kinds)),
+            array.array(typecode, starts).tobytes(),
+            array.array(typecode, ends).tobytes(),
+            intern(names),
+            intern(parameters),
+        )
+    )
+    return zlib.compress(columns, 1)
+
+
+def load_tokens(entry: bytes) -> Iterator[tokenizer.Token]:
+    """
+    Returns an iterator of the tokens serialized in `entry`, which creates them only as they are read.
+    The columns are checked here, so a corrupt entry raises an error right away and not while its tokens are read.
+    """
+    typecode, kinds, starts, ends, names, parameters = marshal.loads(zlib.decompress(entry))
+    count = len(kinds)
+    if kinds and max(kinds) >= len(KINDS):
+        raise ValueError("Unknown kind of token")
+    start_positions = array.array(typecode)
+    start_positions.frombytes(starts)
+    end_positions = array.array(typecode)
+    end_positions.frombytes(ends)
+    if len(start_positions) != count or len(end_positions) != count:
+        raise ValueError("Column of positions does not fit the tokens")
+    columns = zip(map(KINDS.__getitem__, kinds), start_positions, end_positions, extern(*names, count), extern(*parameters, count))
+    return map(functools.partial(tuple.__new__, tokenizer.Token), columns)
+
+
+if __name__ == "__main__":
+    pass
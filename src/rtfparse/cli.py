@@ -1,30 +1,34 @@
 #!/usr/bin/env python
 # PYTHON_ARGCOMPLETE_OK
 
-import io
+import contextlib
+import json
 import logging
 import logging.config
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
+from typing import Optional
 
 import argcomplete
-import compressed_rtf as cr
-import extract_msg as em
 from provide_dir import provide_dir
 
-from rtfparse import logging_conf
+from rtfparse import batch, incremental, logging_conf, metrics, msg, tokenizer
 from rtfparse.__about__ import __version__
+from rtfparse.cache import Parse_Cache
 from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers import Renderer
 from rtfparse.renderers.html_decapsulator import HTML_Decapsulator
+from rtfparse.renderers.plain_text import Plain_Text_Renderer
 
 
-def setup_logger(directory: Path) -> logging.Logger:
+def setup_logger(directory: Path, debug: bool = False) -> logging.Logger:
     """
-    Returns a logger and a path to directory where the logs are saved
+    Returns a logger and a path to directory where the logs are saved.
+    The debug log is only written if `debug` is True.
     """
     try:
         provide_dir(directory)
-        logger_config = logging_conf.create_dict_config(directory, "rtfparse.debug.log", "rtfparse.info.log", "rtfparse.errors.log")
+        logger_config = logging_conf.create_dict_config(directory, "rtfparse.debug.log", "rtfparse.info.log", "rtfparse.errors.log", debug)
     except FileExistsError:
         print(f"Failed to create the directory `{str(directory)}` because it already exists as a file.")
         print(f"Please create the directory `{str(directory)}`")
@@ -34,7 +38,8 @@ def setup_logger(directory: Path) -> logging.Logger:
     return logger
 
 
-logger = setup_logger(Path.home() / "rtfparse")
+log_dir = Path.home() / "rtfparse"
+logger = setup_logger(log_dir)
 
 
 def argument_parser() -> ArgumentParser:
@@ -46,50 +51,153 @@ def argument_parser() -> ArgumentParser:
     parser.add_argument("-r", "--rtf-file", action="store", metavar="PATH", type=Path, help="path to the rtf file")
     parser.add_argument("-m", "--msg-file", action="store", metavar="PATH", type=Path, help="Parse RTF from MS Outlook's .msg file")
     parser.add_argument("-d", "--decapsulate-html", action="store_true", help="Decapsulate HTML from RTF")
+    parser.add_argument("-t", "--plain-text", action="store_true", help="Extract the visible plain text from RTF")
     parser.add_argument("-i", "--embed-img", action="store_true", help="Embed images from email to HTML")
+    parser.add_argument("--debug", action="store_true", help="write the debug log including a trace of every token parsed (slow)")
     parser.add_argument("-o", "--output-file", metavar="PATH", type=Path, help="path to the desired output file")
     parser.add_argument("-a", "--attachments-dir", metavar="PATH", type=Path, help="path to directory where to save email attachments")
+    parser.add_argument("--save-rtf", action="store_true", help="also write the RTF of the .msg file into a .rtf file next to it")
+    parser.add_argument(
+        "-b",
+        "--batch",
+        nargs="+",
+        metavar="PATH_OR_GLOB",
+        default=list(),
+        help="decapsulate HTML from all .rtf and .msg files in these files, directories or globs",
+    )
+    parser.add_argument("-l", "--file-list", metavar="PATH", type=Path, help="batch mode: text file with one file, directory or glob per line")
+    parser.add_argument("-O", "--output-dir", metavar="PATH", type=Path, help="batch mode: directory where to write the decapsulated HTML files")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=int,
+        help="number of worker processes: in batch mode (default: number of CPUs), or parsing one large .rtf file in parallel (default: 1)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="PATH",
+        type=Path,
+        help="cache the tokens of parsed documents in this directory, documents parsed before are not tokenized again",
+    )
+    parser.add_argument(
+        "--stats", metavar="PATH", type=Path, help="write statistics of parsing and rendering as JSON into this file, one line per file parsed"
+    )
     return parser
 
 
 def decapsulate(rp: Rtf_Parser, target_file: Path) -> None:
-    renderer = HTML_Decapsulator()
-    with open(target_file, mode="w", encoding="utf-8") as htmlfile:
+    renderer = HTML_Decapsulator(rp.stats)
+    with open(target_file, mode="wb") as htmlfile:
         logger.info("Rendering the encapsulated HTML")
         renderer.render(rp.parsed, htmlfile)
         logger.info("Encapsulated HTML rendered")
 
 
+def extract_text(rp: Rtf_Parser, target_file: Path) -> None:
+    renderer = Plain_Text_Renderer(rp.stats)
+    with open(target_file, mode="wb") as textfile:
+        logger.info("Rendering the plain text")
+        renderer.render(rp.parsed, textfile)
+        logger.info("Plain text rendered")
+
+
+def renderers_of(cli_args: Namespace, stats: Optional[metrics.Parse_Stats] = None) -> list[tuple[Renderer, Path]]:
+    """
+    Returns the renderers asked for and the paths of their output files
+    """
+    renderers = list()
+    if cli_args.output_file:
+        if cli_args.decapsulate_html:
+            renderers.append((HTML_Decapsulator(stats), cli_args.output_file.with_suffix(".html")))
+        if cli_args.plain_text:
+            renderers.append((Plain_Text_Renderer(stats), cli_args.output_file.with_suffix(".txt")))
+    return renderers
+
+
+def convert_msg(cli_args: Namespace, stats: Optional[metrics.Parse_Stats] = None) -> None:
+    """
+    Parses the RTF of the .msg file while it is being decompressed and renders it into the output files right away,
+    without holding the whole RTF in memory
+    """
+    with msg.Msg_File(cli_args.msg_file) as message, contextlib.ExitStack() as stack:
+        if cli_args.attachments_dir:
+            message.save_attachments(cli_args.attachments_dir)
+        copy = stack.enter_context(open(cli_args.msg_file.with_suffix(".rtf"), mode="wb")) if cli_args.save_rtf else None
+        outputs = [(renderer, stack.enter_context(open(path, mode="wb"))) for renderer, path in renderers_of(cli_args, stats)]
+        parser = incremental.Incremental_Parser()
+
+        def render(events: list) -> None:
+            for renderer, file in outputs:
+                renderer.render_events(events, file)
+
+        logger.info(f"Parsing the RTF of {cli_args.msg_file}")
+        for chunk in metrics.timed(stats, message.iter_rtf(copy=copy), "decompress"):
+            with metrics.measure(stats, "parse") as stage:
+                events = parser.feed(chunk)
+                stage.bytes += len(chunk)
+            render(events)
+        with metrics.measure(stats, "parse"):
+            events = parser.close()
+        render(events)
+        logger.info(f"RTF of {cli_args.msg_file} parsed")
+
+
+def write_stats(documents: list[dict], target: Path) -> None:
+    """
+    Writes the statistics of the documents into `target`, as JSON one document per line
+    """
+    target.write_text("".join(json.dumps(document) + "\n" for document in documents), encoding="utf-8")
+    logger.info(f"Statistics of {len(documents)} files written into {target}")
+
+
+def run_batch(cli_args: Namespace) -> None:
+    sources = batch.collect_sources(cli_args.batch, cli_args.file_list)
+    stats = batch.run_batch(sources, cli_args.output_dir, cli_args.jobs, cli_args.cache_dir, cli_args.stats is not None)
+    if stats.failed:
+        logger.error(f"{stats.failed} files could not be converted")
+    if cli_args.stats is not None:
+        write_stats(stats.documents, cli_args.stats)
+
+
 def run(cli_args: Namespace) -> None:
+    if cli_args.batch or cli_args.file_list:
+        run_batch(cli_args)
+        return
+    trace = tokenizer.log_token if cli_args.debug else None
+    cache = None if cli_args.cache_dir is None else Parse_Cache(cli_args.cache_dir)
+    stats = None if cli_args.stats is None else metrics.Parse_Stats()
     if cli_args.rtf_file and cli_args.rtf_file.exists():
         with open(cli_args.rtf_file, mode="rb") as rtf_file:
-            rp = Rtf_Parser(rtf_file=rtf_file)
+            rp = Rtf_Parser(rtf_file=rtf_file, trace=trace, cache=cache, jobs=cli_args.jobs or 1, stats=stats)
             rp.parse_file()
     elif cli_args.msg_file:
-        msg = em.openMsg(f"{cli_args.msg_file}")
-        if cli_args.attachments_dir:
-            provide_dir(cli_args.attachments_dir)
-            for attachment in msg.attachments:
-                with open(cli_args.attachments_dir / f"{attachment.longFilename}", mode="wb") as att_file:
-                    att_file.write(attachment.data)
-        decompressed_rtf = cr.decompress(msg.compressedRtf)
-        with open(cli_args.msg_file.with_suffix(".rtf"), mode="wb") as email_rtf:
-            email_rtf.write(decompressed_rtf)
-        with io.BytesIO(decompressed_rtf) as rtf_file:
-            rp = Rtf_Parser(rtf_file=rtf_file)
-            rp.parse_file()
+        if stats is not None:
+            stats.source = str(cli_args.msg_file)
+        convert_msg(cli_args, stats)
+        if stats is not None:
+            write_stats([stats.as_dict()], cli_args.stats)
+        return
     if cli_args.decapsulate_html and cli_args.output_file:
         decapsulate(rp, cli_args.output_file.with_suffix(".html"))
+    if cli_args.plain_text and cli_args.output_file:
+        extract_text(rp, cli_args.output_file.with_suffix(".txt"))
+    if stats is not None:
+        write_stats([stats.as_dict()], cli_args.stats)
 
 
 def main() -> None:
     """
     Entry point for any component start from the commmand line
     """
-    logger.debug("rtfparse started")
     parser = argument_parser()
     argcomplete.autocomplete(parser)
     cli_args = parser.parse_args()
+    if cli_args.debug:
+        setup_logger(log_dir, debug=True)
+    logger.debug("rtfparse started")
+    if (cli_args.batch or cli_args.file_list) and not cli_args.output_dir:
+        parser.error("batch mode needs --output-dir")
     logger.debug(f"Parsed arguments: {cli_args}")
     try:
         run(cli_args)
@@ -2,198 +2,448 @@
 
 
 import io
+import itertools
 import logging
 
+# Typing
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+
 # Own modules
-from rtfparse import re_patterns, utils
+from rtfparse import tokenizer, utils
 from rtfparse.enums import Bytestring_Type
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
 
-# Constants, number of bytes to read when creating entities
-CHARACTER = BACKSLASH = DELIMITER = MINUS = GROUP_END = len(b"\\")
-SYMBOL = IGNORABLE = BACKSLASH + CHARACTER
-GROUP_START = BACKSLASH + IGNORABLE
-MAX_CW_LETTERS = 32  # As specified in RTF Spec
-INTEGER_MAGNITUDE = 32  # As specified in RTF Spec
-PLAIN_TEXT = CONTROL_WORD = BACKSLASH + MAX_CW_LETTERS + MINUS + len(str((1 << INTEGER_MAGNITUDE) // 2)) + DELIMITER
+class Entity:
+    """
+    Base of all entities. Entities use `__slots__` instead of a `__dict__`
+    to keep the memory footprint of large parsed documents small.
+    """
 
+    __slots__ = ("encoding", "start_position")
+    text = ""
 
-class Entity:
-    def __init__(self) -> None:
-        self.text = ""
-
-    @classmethod
-    def probe(cls, pattern: re_patterns.Bytes_Regex, file: io.BufferedReader) -> Bytestring_Type:
-        logger.debug(f"Probing file at position {file.tell()}")
-        original_position = file.tell()
-        while True:
-            probed = file.read(len(re_patterns.probe_pattern))
-            logger.debug(f"{probed = }")
-            file.seek(original_position)
-            logger.debug(f"Probe returned to position {file.tell()}")
-            if re_patterns.group_start.match(probed):
-                result = Bytestring_Type.GROUP_START
-            elif re_patterns.group_end.match(probed):
-                result = Bytestring_Type.GROUP_END
-            elif re_patterns.control_word.match(probed):
-                result = Bytestring_Type.CONTROL_WORD
-            elif re_patterns.control_symbol.match(probed):
-                result = Bytestring_Type.CONTROL_SYMBOL
-            elif re_patterns.plain_text.match(probed):
-                result = Bytestring_Type.PLAIN_TEXT
-            else:
-                logger.debug("This does not match anything, it's probably a newline, moving on")
-                original_position += 1
-                file.seek(original_position)
-                logger.debug(f"Probe moved to position {file.tell()}")
-                if not probed:
-                    logger.debug("Reached unexpected end of file.")
-                    result = Bytestring_Type.GROUP_END
-                    break
-                continue
-            break
-        logger.debug(f"Probe {result = }")
-        logger.debug(f"Probe leaving file at position {file.tell()}")
-        return result
+
+class Payload(NamedTuple):
+    """
+    Binary data of a `\\binN` control word or the hex encoded data of a picture,
+    referenced by its span in the parsed buffer instead of being copied out of it.
+    """
+
+    source: utils.Buffer
+    start: int
+    end: int
+    hex_encoded: bool = False
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start
+
+    @property
+    def raw(self) -> bytes:
+        return self.source[self.start : self.end]
+
+    def decode(self) -> bytes:
+        """
+        Returns the binary data. Hex encoded data are decoded at once, whitespace between the hex digits is skipped.
+        """
+        if self.hex_encoded:
+            return bytes.fromhex(str(self.raw, "ascii"))
+        return bytes(self.raw)
+
+    def detached(self) -> "Payload":
+        """
+        Returns this payload with its own copy of the data, not referencing the parsed buffer anymore
+        """
+        return Payload(self.raw, 0, self.length, self.hex_encoded)
 
 
 class Control_Word(Entity):
-    def __init__(self, encoding: str, file: io.BufferedReader) -> None:
-        super().__init__()
+    __slots__ = ("control_name", "parameter", "payload")
+
+    def __init__(self, encoding: str, token: tokenizer.Token, data: utils.Buffer) -> None:
         self.encoding = encoding
-        logger.debug(f"Reading Control Word at file position {file.tell()}")
-        self.control_name = "missing"
-        self.parameter = ""
-        self.bindata = b""
-        self.start_position = file.tell()
-        logger.debug(f"Starting at file position {self.start_position}")
-        probe = file.read(CONTROL_WORD)
-        if match := re_patterns.control_word.match(probe):
-            self.control_name = match.group("control_name").decode(self.encoding)
-            logger.debug(f"Preliminary {self.control_name = }")
-            parameter = match.group("parameter")
-            if parameter is not None:
-                self.parameter = int(parameter.decode(self.encoding))
-                logger.debug(f"{self.parameter = }")
-                self.control_name = self.control_name.removesuffix(str(self.parameter))
-                logger.debug(f"Final {self.control_name = }")
-            target_position = self.start_position + match.span()[1]
-            if match.group("other"):
-                logger.debug(f"Delimiter is {match.group('other').decode(self.encoding)}, len: {len(match.group('delimiter'))}")
-                target_position -= len(match.group("delimiter"))
-            file.seek(target_position)
-            # handle \binN:
-            if self.control_name == "bin":
-                self.bindata = file.read(utils.twos_complement(self.parameter, INTEGER_MAGNITUDE))
-        else:
-            logger.warning("Missing Control Word")
-            file.seek(self.start_position)
+        self.control_name = token.name
+        self.parameter = token.parameter
+        self.payload = None
+        self.start_position = token.start
+        # handle \binN:
+        if self.control_name == "bin":
+            self.payload = Payload(data, token.end, token.end + tokenizer.bin_length(self.parameter, len(data) - token.end))
+
+    @property
+    def bindata(self) -> bytes:
+        if self.payload is None:
+            return b""
+        return self.payload.decode()
+
+    def __getstate__(self) -> tuple[None, dict]:
+        # Pickle a copy of the binary data rather than the buffer, which may be a memory-mapped file
+        payload = None if self.payload is None else self.payload.detached()
+        return None, {
+            "encoding": self.encoding,
+            "start_position": self.start_position,
+            "control_name": self.control_name,
+            "parameter": self.parameter,
+            "payload": payload,
+        }
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__}: {self.control_name}{self.parameter}>"
 
 
 class Control_Symbol(Entity):
-    def __init__(self, encoding: str, file: io.BufferedReader) -> None:
-        super().__init__()
+    __slots__ = ("char", "text")
+
+    def __init__(self, encoding: str, token: tokenizer.Token) -> None:
         self.encoding = encoding
-        self.start_position = file.tell()
-        logger.debug(f"Reading Symbol at file position {self.start_position}")
-        self.char = ""
-        self.text = chr(file.read(SYMBOL)[-1])
-        if self.text == "'":
-            self.char = file.read(SYMBOL).decode(self.encoding)
-            self.text = bytes((int(self.char, base=16),)).decode(self.encoding)
-            logger.debug(f"Encountered escaped ANSI character, read two more bytes: {self.char}, character: {self.text}")
-            if self.text in "\\{}":
-                file.seek(file.tell() - SYMBOL)
+        self.start_position = token.start
+        self.char = token.parameter
+        # The characters of a run of `\\'hh` escapes are decoded together, multibyte characters may span several escapes
+        self.text = tokenizer.decode_hex(token.parameter, encoding) if token.name == "'" else token.name
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__}: {self.text}>"
 
 
 class Plain_Text(Entity):
-    def __init__(self, encoding: str, file: io.BufferedReader) -> None:
-        super().__init__()
+    """
+    Plain text keeps a reference to the parsed buffer and decodes its text only when it is accessed
+    """
+
+    __slots__ = ("end_position", "_source", "_text", "_wrapped")
+
+    def __init__(self, encoding: str, token: tokenizer.Token, data: utils.Buffer) -> None:
         self.encoding = encoding
-        self.text = ""
-        logger.debug("Constructing Plain_Text")
-        while True:
-            self.start_position = file.tell()
-            read = file.read(PLAIN_TEXT)
-            logger.debug(f"Read file from {self.start_position} to position {file.tell()}, read: {read}")
-            # see if we have read all the plain text there is:
-            if match := re_patterns.plain_text.match(read):
-                logger.debug("This matches the plain text pattern")
-                _text = match.group("text").decode(self.encoding)
-                logger.debug(f"{_text = }")
-                self.text = "".join((self.text, _text))
-                logger.debug(f"{self.text = }")
-                if len(_text) == PLAIN_TEXT:
-                    continue
-                else:
-                    file.seek(self.start_position + len(_text))
-                    break
-            else:
-                file.seek(self.start_position)
-                break
-        logger.debug(f"Returned to position {file.tell()}")
+        self.start_position = token.start
+        self.end_position = token.end
+        if token.name:
+            # Text of `\uN` characters, decoded by the tokenizer
+            self._source = None
+            self._text = token.name
+        else:
+            self._source = data
+            self._text = None
+            # Text wrapped over line breaks, which are left out when it is decoded
+            self._wrapped = token.parameter is True
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            if self._wrapped:
+                return str(bytes(self._source[self.start_position : self.end_position]).translate(None, b"\r\n"), self.encoding)
+            return str(self._source[self.start_position : self.end_position], self.encoding)
+        return self._text
+
+    @text.setter
+    def text(self, text: str) -> None:
+        self._text = text
+        self._source = None
+
+    def __getstate__(self) -> tuple[None, dict]:
+        # Pickle the decoded text rather than the buffer, which may be a memory-mapped file
+        return None, {
+            "encoding": self.encoding,
+            "start_position": self.start_position,
+            "end_position": self.end_position,
+            "_source": None,
+            "_text": self.text,
+        }
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__}: {self.text}>"
 
 
+class Event(NamedTuple):
+    """
+    A parsing event. `entity` is the group which starts or ends,
+    or the control word, control symbol or plain text which has been read.
+    """
+
+    kind: Bytestring_Type
+    entity: Entity
+
+
 class Group(Entity):
-    def __init__(self, encoding: str, file: io.BufferedReader) -> None:
-        super().__init__()
-        logger.debug("Group.__init__")
+    __slots__ = ("known", "name", "ignorable", "structure", "end_position")
+
+    def __init__(self, encoding: str, file: Optional[io.BufferedReader] = None) -> None:
         self.encoding = encoding
         self.known = False
         self.name = "unknown"
         self.ignorable = False
         self.structure = list()
+        self.start_position = 0
+        self.end_position = 0
+        if file is not None:
+            self.parse(file)
+
+    def parse(self, file: io.BufferedReader) -> None:
+        """
+        Parses the group starting at the current position of `file`
+        and leaves `file` positioned right after the group's end
+        """
         parsed_object = utils.what_is_being_parsed(file)
         logger.debug(f"Creating destination group from {parsed_object}")
-        self.start_position = file.tell()
-        logger.debug(f"Starting at file position {self.start_position}")
-        probe = file.read(GROUP_START)
-        logger.debug(f"Read file up to position {file.tell()}, read {probe = }")
-        if match := re_patterns.group_start.match(probe):
-            self.known = bool(match.group("group_start"))
-            self.ignorable = bool(match.group("ignorable"))
-            if not self.ignorable:
-                file.seek(self.start_position + GROUP_START - IGNORABLE)
-                logger.debug(f"Returned to position {file.tell()}")
-        else:
-            logger.warning(utils.warn("Expected a group but found no group start. Creating unknown group"))
-            file.seek(self.start_position)
-        while True:
-            probed = self.probe(re_patterns.probe, file)
-            if probed is Bytestring_Type.CONTROL_WORD:
-                self.structure.append(Control_Word(self.encoding, file))
-            elif probed is Bytestring_Type.GROUP_END:
-                file.read(GROUP_END)
-                break
-            elif probed is Bytestring_Type.GROUP_START:
-                self.structure.append(Group(self.encoding, file))
-            elif probed is Bytestring_Type.CONTROL_SYMBOL:
-                self.structure.append(Control_Symbol(self.encoding, file))
+        position = file.tell()
+        file.seek(0)
+        data = file.read()
+        self.build(iter_events(data, self.encoding, position, root=self))
+        file.seek(self.end_position)
+
+    def open(self, token: tokenizer.Token) -> None:
+        self.known = True
+        self.ignorable = token.parameter
+        self.start_position = token.start
+
+    def build(self, events: Iterable[Event]) -> None:
+        """
+        Fills the structure of this group and of its nested groups with the entities from `events`.
+        The first event must be the start of this group, the building ends with its end.
+        Nested groups are built iteratively with an explicit stack of the open groups,
+        so the nesting depth is not limited by Python's recursion limit.
+        Skipped and lazy groups are added as they are, their structure is not touched, so lazy groups stay unparsed.
+        """
+        stack = list()
+        group = self
+        append = group.structure.append
+        events = iter(events)
+        # Skip the start of this group itself
+        next(events, None)
+        for kind, entity in events:
+            if kind is Bytestring_Type.GROUP_START:
+                append(entity)
+                # Skipped and lazy groups know their end from their start, their end event follows right away
+                if entity.end_position:
+                    continue
+                stack.append(group)
+                group = entity
+                append = group.structure.append
+            elif kind is Bytestring_Type.GROUP_END:
+                if entity is not group:
+                    # The end of a skipped or lazy group, which has not been opened
+                    continue
+                if not stack:
+                    break
+                group = stack.pop()
+                append = group.structure.append
             else:
-                self.structure.append(Plain_Text(self.encoding, file))
-        # name the group like its first Control Word
-        # this way the renderer will be able to ignore entire groups based on their first control word
-        try:
-            if isinstance(self.structure[0], Control_Word):
-                self.name = self.structure[0].control_name
-        except IndexError:
-            pass
+                append(entity)
+
+    def skipped(self, token: tokenizer.Token) -> None:
+        """
+        Makes this group the skipped group of `token`, with its name and position but without any structure
+        """
+        self.open(token)
+        if token.name:
+            self.name = token.name
+        self.end_position = token.end
 
     def __repr__(self) -> str:
         return f"<Group {self.name}>"
 
 
+class Lazy_Group(Group):
+    """
+    A group whose content is parsed from the buffer only when its `structure` is first accessed.
+    Its nested groups are lazy, too.
+    `ends` are the ends of the groups in the buffer, shared by all lazy groups of a document,
+    which were recorded when the group was skipped. Parsing the group does not scan its nested groups again for their ends.
+    """
+
+    __slots__ = ("_source", "_skip", "_uc", "_ends", "_structure")
+
+    def __init__(
+        self,
+        encoding: str,
+        token: tokenizer.Token,
+        data: utils.Buffer,
+        skip: frozenset[str] = frozenset(),
+        uc: int = 1,
+        ends: Optional[dict[int, int]] = None,
+    ) -> None:
+        super().__init__(encoding)
+        self.skipped(token)
+        self._source = data
+        self._skip = skip
+        self._uc = uc
+        self._ends = ends
+        self._structure = None
+
+    @property
+    def structure(self) -> list:
+        if self._structure is None:
+            group = Group(self.encoding)
+            events = iter_events(
+                self._source, self.encoding, self.start_position, root=group, skip=self._skip, lazy=True, uc=self._uc, ends=self._ends
+            )
+            group.build(events)
+            self._structure = group.structure
+            self._source = self._ends = None
+        return self._structure
+
+    @structure.setter
+    def structure(self, structure: list) -> None:
+        self._structure = structure
+        self._source = self._ends = None
+
+    def __getstate__(self) -> tuple[None, dict]:
+        # Pickle the materialized structure rather than the buffer, which may be a memory-mapped file
+        state = {name: getattr(self, name) for name in ("encoding", "start_position", "known", "name", "ignorable", "end_position", "_skip", "_uc")}
+        state["_structure"] = self.structure
+        state["_source"] = state["_ends"] = None
+        return None, state
+
+
+def iter_events(
+    data: utils.Buffer,
+    encoding: str,
+    position: int = 0,
+    root: Optional[Group] = None,
+    skip: frozenset[str] = frozenset(),
+    lazy: bool = False,
+    trace: Optional[Callable[[tokenizer.Token], None]] = None,
+    uc: int = 1,
+    tokens: Optional[Iterable[tokenizer.Token]] = None,
+    ends: Optional[dict[int, int]] = None,
+) -> Iterator[Event]:
+    """
+    Yields the events of the group which starts at `position` in `data` while reading it.
+    Groups in the events never get any structure, only their name,
+    which is set as soon as their first Control Word has been read.
+    Groups which are still open at the end of `data` get their end events there.
+    If `root` is given, it is used as the group starting at `position`.
+    Nested groups named in `skip` are not parsed, only their start and end events are yielded.
+    If `lazy` is True, the groups nested in the root are `Lazy_Group`s, parsed only when their structure is accessed.
+    `trace` is called with every token read, e.g. `tokenizer.log_token`.
+    `uc` is the count of fallback characters of `\\uN` characters in effect at `position`.
+    `tokens` are the tokens read by an earlier call with the same `skip`, e.g. recorded by a `trace` hook.
+    If they are given, `data` is not tokenized again.
+    `ends` are the ends of the groups in `data` recorded so far for lazy groups, a new record is started if it is not given.
+    """
+    new_event = tuple.__new__
+    # The counts of fallback characters of the open groups, kept by the tokenizer
+    fallbacks = [uc]
+    replayed = tokens is not None
+    if lazy and ends is None:
+        ends = dict()
+    tokens = iter(tokens) if replayed else tokenizer.tokenize(data, encoding, position, uc=fallbacks)
+    group = Group(encoding) if root is None else root
+    first = next(tokens, None)
+    started = first is not None and first.kind is Bytestring_Type.GROUP_START and first.start == position
+    if started:
+        group.open(first)
+        if (skip or lazy) and not replayed:
+            # The root group itself is never skipped, only the groups nested in it
+            tokens = tokenizer.tokenize(data, encoding, first.end, skip, lazy, fallbacks, ends)
+    else:
+        logger.warning(utils.warn("Expected a group but found no group start. Creating unknown group"))
+        group.start_position = position
+        if first is not None:
+            tokens = itertools.chain((first,), tokens)
+    # Without a trace hook the tokens are not wrapped, so tracing costs nothing unless it is enabled
+    if trace is not None:
+        if started:
+            trace(first)
+        tokens = tokenizer.traced(tokens, trace)
+    yield new_event(Event, (Bytestring_Type.GROUP_START, group))
+    stack = list()
+    # name the group like its first Control Word
+    # this way the renderer will be able to ignore entire groups based on their first control word
+    unnamed = True
+    for token in tokens:
+        kind = token.kind
+        if kind is Bytestring_Type.PLAIN_TEXT:
+            yield new_event(Event, (kind, Plain_Text(encoding, token, data)))
+        elif kind is Bytestring_Type.CONTROL_WORD:
+            if unnamed:
+                group.name = token.name
+            yield new_event(Event, (kind, Control_Word(encoding, token, data)))
+        elif kind is Bytestring_Type.GROUP_START:
+            stack.append(group)
+            group = Group(encoding)
+            group.open(token)
+            yield new_event(Event, (kind, group))
+            unnamed = True
+            continue
+        elif kind is Bytestring_Type.GROUP_END:
+            group.end_position = token.end
+            yield new_event(Event, (kind, group))
+            if not stack:
+                return
+            group = stack.pop()
+        elif kind is Bytestring_Type.SKIPPED_GROUP:
+            if token.name in skip:
+                skipped = Group(encoding)
+                skipped.skipped(token)
+            else:
+                skipped = Lazy_Group(encoding, token, data, skip, fallbacks[-1], ends)
+            yield new_event(Event, (Bytestring_Type.GROUP_START, skipped))
+            yield new_event(Event, (Bytestring_Type.GROUP_END, skipped))
+        else:
+            yield new_event(Event, (kind, Control_Symbol(encoding, token)))
+        unnamed = False
+    # Reached the end of data, close all groups which are still open
+    while True:
+        group.end_position = len(data)
+        yield new_event(Event, (Bytestring_Type.GROUP_END, group))
+        if not stack:
+            return
+        group = stack.pop()
+
+
+# The kind of event of each type of entity, for dispatching on the type of an entity with one lookup
+EVENT_KINDS = {
+    Group: Bytestring_Type.GROUP_START,
+    Lazy_Group: Bytestring_Type.GROUP_START,
+    Control_Word: Bytestring_Type.CONTROL_WORD,
+    Control_Symbol: Bytestring_Type.CONTROL_SYMBOL,
+    Plain_Text: Bytestring_Type.PLAIN_TEXT,
+}
+
+
+def event_kind(item: Entity) -> Bytestring_Type:
+    """
+    Returns the kind of event of `item`, also for subclasses of the entities
+    """
+    for entity_type, kind in tuple(EVENT_KINDS.items()):
+        if isinstance(item, entity_type):
+            EVENT_KINDS[type(item)] = kind
+            return kind
+    return Bytestring_Type.PLAIN_TEXT
+
+
+def walk(group: Group, skip: Iterable[str] = (), skip_ignorable: bool = False) -> Iterator[Event]:
+    """
+    Yields the events of all entities nested in an already parsed `group`, in document order.
+    The start and end of `group` itself are not included.
+    Groups named in `skip` are not descended into, so lazy groups among them are never parsed.
+    Neither are ignorable groups (`{\\*...}`) if `skip_ignorable` is True.
+    """
+    new_event = tuple.__new__
+    kinds = EVENT_KINDS
+    group_start = Bytestring_Type.GROUP_START
+    groups = [group]
+    stack = [iter(group.structure)]
+    while stack:
+        for item in stack[-1]:
+            kind = kinds.get(type(item)) or event_kind(item)
+            yield new_event(Event, (kind, item))
+            if kind is group_start:
+                if item.name in skip or (skip_ignorable and item.ignorable):
+                    yield new_event(Event, (Bytestring_Type.GROUP_END, item))
+                    continue
+                groups.append(item)
+                stack.append(iter(item.structure))
+                break
+        else:
+            stack.pop()
+            ended = groups.pop()
+            if stack:
+                yield new_event(Event, (Bytestring_Type.GROUP_END, ended))
+
+
 if __name__ == "__main__":
     pass
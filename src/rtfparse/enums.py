@@ -11,6 +11,7 @@ class Bytestring_Type(Enum):
     CONTROL_WORD = auto()
     CONTROL_SYMBOL = auto()
     PLAIN_TEXT = auto()
+    SKIPPED_GROUP = auto()
 
 
 if __name__ == "__main__":
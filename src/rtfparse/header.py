@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+
+"""
+Scanner of the header of RTF documents, which tells their character set, code page and default font.
+
+The header is matched with one regular expression over a window at the start of the document,
+which is widened only while the header reaches its end. The buffer is scanned in place, nothing is copied or parsed.
+"""
+
+import codecs
+import functools
+import logging
+import re
+from typing import NamedTuple, Optional
+
+# Own modules
+from rtfparse import re_patterns, utils
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+WINDOW = 256  # first size of the window scanned for the header
+MAX_WINDOW = 64 * 1024  # the header is not looked for any further into the document
+# Encodings of the character sets
+CHARSETS = {"ansi": "cp1252", "mac": "mac_roman", "pc": "cp437", "pca": "cp850"}
+# Code pages which Python does not know by their name cpN
+CODE_PAGES = {
+    10000: "mac_roman",
+    10006: "mac_greek",
+    10007: "mac_cyrillic",
+    10029: "mac_latin2",
+    10079: "mac_iceland",
+    10081: "mac_turkish",
+    20127: "ascii",
+    20866: "koi8_r",
+    21866: "koi8_u",
+    28591: "latin_1",
+    28592: "iso8859_2",
+    28595: "iso8859_5",
+    28597: "iso8859_7",
+    28599: "iso8859_9",
+    28605: "iso8859_15",
+    51932: "euc_jp",
+    51949: "euc_kr",
+    54936: "gb18030",
+}
+
+
+class Header(NamedTuple):
+    """
+    What the header of a document tells about it. `end` is the position right after the header.
+    """
+
+    charset: Optional[str]
+    code_page: Optional[int]
+    default_font: Optional[int]
+    end: int
+    codec: codecs.CodecInfo
+
+    @property
+    def encoding(self) -> str:
+        return self.codec.name
+
+
+def match_header(data: utils.Buffer) -> Optional[re.Match]:
+    window = WINDOW
+    while True:
+        match = re_patterns.header.match(data, 0, window)
+        # Widen the window only if the header may go on beyond it
+        if match is None or match.end() < window or window >= len(data) or window >= MAX_WINDOW:
+            return match
+        window *= 4
+
+
+def end_of(data: utils.Buffer) -> int:
+    """
+    Returns the position right after the header of the document in `data`, or 0 if it does not start with a group
+    """
+    match = match_header(data)
+    return 0 if match is None else match.end()
+
+
+def scan(data: utils.Buffer) -> Header:
+    """
+    Returns the header of the document in `data`
+    """
+    match = match_header(data)
+    if match is None:
+        logger.warning(utils.warn("The document does not start with a group, assuming the ANSI character set"))
+        return Header(None, None, None, 0, lookup_charset("ansi"))
+    charset, code_page, default_font = match.group("charset", "code_page", "default_font")
+    charset = None if charset is None else charset.decode("ascii")
+    code_page = None if code_page is None else int(code_page)
+    default_font = None if default_font is None else int(default_font)
+    if code_page is not None:
+        codec = lookup_code_page(code_page)
+    else:
+        if charset is None:
+            logger.warning(utils.warn("Found no character set in the header, assuming the ANSI character set"))
+        codec = lookup_charset(charset or "ansi")
+    return Header(charset, code_page, default_font, match.end(), codec)
+
+
+@functools.lru_cache(maxsize=None)
+def lookup_code_page(code_page: int) -> codecs.CodecInfo:
+    """
+    Returns the codec of the ANSI code page `code_page`
+    """
+    if code_page == 65001:
+        logger.warning("Found encoding '65001', but often this is actually 'cp1252', so I'm taking that")
+        return codecs.lookup("cp1252")
+    try:
+        return codecs.lookup(CODE_PAGES.get(code_page, f"cp{code_page}"))
+    except LookupError:
+        logger.warning(utils.warn(f"Unknown code page {code_page}, decoding as cp1252"))
+        return codecs.lookup("cp1252")
+
+
+@functools.lru_cache(maxsize=None)
+def lookup_charset(charset: str) -> codecs.CodecInfo:
+    """
+    Returns the codec of the character set `charset` ("ansi", "mac", "pc" or "pca")
+    """
+    return codecs.lookup(CHARSETS[charset])
+
+
+if __name__ == "__main__":
+    pass
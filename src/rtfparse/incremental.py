@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+
+
+"""
+Push-style parsing of RTF documents which arrive in chunks, e.g. from a socket, a pipe or a decompressor.
+
+Only the unfinished rest of the data fed so far is kept between the chunks.
+A token which reaches the end of the fed data may continue in the next chunk,
+so it is parsed only when more data or the end of the document has arrived.
+"""
+
+import itertools
+import logging
+from typing import Iterable, Iterator, Optional
+
+# Own modules
+from rtfparse import entities, header, re_patterns, tokenizer, utils
+from rtfparse.enums import Bytestring_Type
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class Incremental_Parser:
+    """
+    Parses an RTF document fed into it chunk by chunk.
+    `feed` returns the events completed by a chunk, `close` the remaining events at the end of the document.
+    The entities of the events have their positions in the whole document,
+    their text and binary data are copied out of the chunks.
+    """
+
+    def __init__(self, encoding: Optional[str] = None) -> None:
+        self.encoding = encoding  # detected from the start of the document if None
+        self._buffer = bytearray()
+        self._offset = 0  # position of the buffer's start in the document
+        self._group = None
+        self._stack = list()
+        self._unnamed = True
+        self._uc = [1]  # counts of fallback characters of `\uN` characters of the open groups, kept by the tokenizer
+        self._done = False
+        self._closed = False
+        # If a run of plain text, escaped or `\uN` characters reaches the end of the buffer:
+        # the kind of the run and the position up to which the buffer has been scanned for its end
+        self._open_run = None
+
+    def feed(self, chunk: bytes) -> list[entities.Event]:
+        """
+        Adds `chunk` to the document and returns the events it has completed
+        """
+        if self._closed:
+            raise ValueError("Cannot feed a closed parser")
+        if self._done:
+            return list()
+        self._buffer += chunk
+        if self.encoding is None:
+            # Wait until the header is followed by something else, the start of a control word might still go on with a header word
+            if header.end_of(self._buffer) + 1 >= len(self._buffer) and len(self._buffer) < header.MAX_WINDOW:
+                return list()
+            self.encoding = header.scan(self._buffer).encoding
+        return self.parse(final=False)
+
+    def close(self) -> list[entities.Event]:
+        """
+        Ends the document and returns its remaining events, closing the groups which are still open
+        """
+        if self._closed:
+            return list()
+        self._closed = True
+        if self.encoding is None:
+            self.encoding = header.scan(self._buffer).encoding
+        events = self.parse(final=True)
+        if self._group is None:
+            logger.warning(utils.warn("Expected a group but found no group start. Creating unknown group"))
+            self._group = entities.Group(self.encoding)
+            events.append(entities.Event(Bytestring_Type.GROUP_START, self._group))
+        # Reached the end of the document, close all groups which are still open
+        while not self._done:
+            self._group.end_position = self._offset
+            events.append(entities.Event(Bytestring_Type.GROUP_END, self._group))
+            if self._stack:
+                self._group = self._stack.pop()
+            else:
+                self._done = True
+        return events
+
+    def parse(self, final: bool) -> list[entities.Event]:
+        """
+        Returns the events of the complete tokens in the buffer and removes them from it.
+        If `final` is False, a token reaching (almost) the end of the buffer is left there, as it may continue in the next chunk.
+        """
+        events = list()
+        append = events.append
+        new_event = tuple.__new__
+        event = entities.Event
+        data = self._buffer
+        size = len(data)
+        consumed = 0
+        offset = self._offset
+        encoding = self.encoding
+        plain_text = Bytestring_Type.PLAIN_TEXT
+        control_word = Bytestring_Type.CONTROL_WORD
+        control_symbol = Bytestring_Type.CONTROL_SYMBOL
+        if self._open_run is not None and not final:
+            # Only the data added since the run has been held back are scanned, until the run ends.
+            # Tokenizing the whole run again with every chunk would take time quadratic in its length.
+            run, position = self._open_run
+            position = scan_run(run, data, position, self._uc[-1])
+            if position is not None:
+                self._open_run = run, position
+                return events
+        self._open_run = None
+        held = None
+        if self._group is None:
+            tokens = tokenizer.tokenize(data, encoding, uc=self._uc)
+            first = next(tokens, None)
+            if first is None or (not final and first.end + 1 >= size):
+                return events
+            self.open(first, data, events)
+            consumed = first.end if first.kind is Bytestring_Type.GROUP_START else 0
+            tokens = itertools.chain(() if consumed else (first,), tokens)
+        else:
+            tokens = tokenizer.tokenize(data, encoding, uc=self._uc)
+        # The state of the open groups, kept in local variables while the tokens are handled
+        group = self._group
+        stack = self._stack
+        unnamed = self._unnamed
+        # The tokenizer changes the counts of fallback characters only after the tokens which have been handled
+        for token in tokens:
+            kind = token.kind
+            end = token.end
+            if kind is control_word and token.name == "bin":
+                # The data may go on in the next chunks, the length is limited by the buffer only at the end of the document
+                end += tokenizer.bin_length(token.parameter, size - end if final else None)
+            # The byte after a token can still change it: `\fs` may get a `-12` parameter, `{` may be followed by `\*`,
+            # a run of escaped or `\uN` characters may go on with more of them
+            if not final:
+                if end + 1 >= size and (end > size or not is_complete(token, data)):
+                    held = token
+                    break
+                if (kind is control_symbol and token.parameter != "" or kind is plain_text) and continues_run(token, data):
+                    held = token
+                    break
+            if kind is plain_text:
+                entity = entities.Plain_Text(encoding, token, data)
+                # The buffer does not keep the text, decode it now
+                entity.text = entity.text
+                entity.start_position += offset
+                entity.end_position += offset
+                append(new_event(event, (kind, entity)))
+                unnamed = False
+            elif kind is control_word:
+                if unnamed:
+                    group.name = token.name
+                    unnamed = False
+                entity = entities.Control_Word(encoding, token, data)
+                if entity.payload is not None:
+                    entity.payload = entity.payload.detached()
+                entity.start_position += offset
+                append(new_event(event, (kind, entity)))
+            elif kind is control_symbol:
+                entity = entities.Control_Symbol(encoding, token)
+                entity.start_position += offset
+                append(new_event(event, (kind, entity)))
+                unnamed = False
+            elif kind is Bytestring_Type.GROUP_START:
+                stack.append(group)
+                group = entities.Group(encoding)
+                group.open(token)
+                group.start_position += offset
+                append(new_event(event, (kind, group)))
+                unnamed = True
+            else:
+                group.end_position = offset + token.end
+                append(new_event(event, (kind, group)))
+                unnamed = False
+                if not stack:
+                    self._done = True
+                    consumed = size
+                    break
+                group = stack.pop()
+            consumed = end if end < size else size
+        else:
+            if final:
+                consumed = size
+        self._group = group
+        self._unnamed = unnamed
+        if held is not None and held.kind is plain_text and not held.name:
+            # Plain text and picture data may go on for megabytes, look only for their end in the next chunks
+            self._open_run = "text", held.end - consumed
+        elif held is not None and held.kind is control_symbol and held.parameter != "":
+            # The last escape of the run may be incomplete, it is scanned again from its start
+            self._open_run = "hex", held.start - consumed
+        elif held is not None and held.kind is plain_text:
+            # The `\uN` characters are decoded from the start of the run once it has ended
+            self._open_run = "unicode", held.start - consumed
+        del self._buffer[:consumed]
+        self._offset += consumed
+        return events
+
+    def open(self, token: tokenizer.Token, data: bytearray, events: list[entities.Event]) -> None:
+        """
+        Appends the start of the document's group to `events`, opened by `token` if it is a group start
+        """
+        self._group = entities.Group(self.encoding)
+        if token.kind is Bytestring_Type.GROUP_START:
+            self._group.open(token)
+            self._group.start_position += self._offset
+        else:
+            logger.warning(utils.warn("Expected a group but found no group start. Creating unknown group"))
+            self._group.start_position = self._offset + token.start
+        events.append(entities.Event(Bytestring_Type.GROUP_START, self._group))
+
+
+def is_complete(token: tokenizer.Token, data: bytearray) -> bool:
+    """
+    Tells if `token` cannot continue after its end, even if more data follow:
+    group ends, control symbols and escaped `\\'hh` characters with both hex digits
+    """
+    if token.kind is Bytestring_Type.GROUP_END:
+        return True
+    if token.kind is Bytestring_Type.CONTROL_SYMBOL:
+        return data[token.start + 1] != ord("'") or token.end - token.start >= 4
+    return False
+
+
+def continues_run(token: tokenizer.Token, data: bytearray) -> bool:
+    """
+    Tells if `token` is a run of plain text, escaped `\\'hh` or `\\uN` characters which the rest of `data` may yet continue
+    """
+    if token.kind is Bytestring_Type.CONTROL_SYMBOL and token.parameter != "":
+        return re_patterns.hex_run_continuation.fullmatch(data, token.end) is not None
+    if token.kind is Bytestring_Type.PLAIN_TEXT:
+        if token.name:
+            return re_patterns.unicode_continuation.fullmatch(data, token.end) is not None
+        # Only line breaks follow, the text may go on after them
+        return data[token.end] in b"\r\n" and re_patterns.line_breaks.fullmatch(data, token.end) is not None
+    return False
+
+
+def scan_run(run: str, data: bytearray, position: int, fallbacks: int) -> Optional[int]:
+    """
+    Scans a held back run of plain text ("text"), escaped characters ("hex") or `\\uN` characters ("unicode") from `position` for its end.
+    A run of `\\uN` characters is scanned skipping the `fallbacks` fallback characters after each of them.
+    Returns the position to scan on from when more data have arrived if the run may still go on, None if it has ended.
+    """
+    if run == "text":
+        end = re_patterns.open_run.match(data, position).end()
+        return end if end == len(data) else None
+    if run == "hex":
+        end = re_patterns.hex_run.match(data, position).end()
+        return end if re_patterns.hex_run_continuation.fullmatch(data, end) is not None else None
+    size = len(data)
+    skip_fallback = re_patterns.fallback.match
+    while (found := re_patterns.unicode.match(data, position)) is not None:
+        end = found.end()
+        for _ in range(fallbacks):
+            skipped = skip_fallback(data, end)
+            if skipped is None:
+                # The fallback characters may be yet to come
+                return position if re_patterns.unicode_continuation.fullmatch(data, end) is not None else None
+            end = skipped.end()
+        # A character or fallback reaching (almost) the end of the buffer may still change, e.g. `\u123` or `\'e`
+        if end + 1 >= size:
+            return position
+        position = end
+    return position if re_patterns.unicode_continuation.fullmatch(data, position) is not None else None
+
+
+def iter_events(chunks: Iterable[bytes], encoding: Optional[str] = None) -> Iterator[entities.Event]:
+    """
+    Yields the events of the document arriving in `chunks` as soon as each chunk has completed them
+    """
+    parser = Incremental_Parser(encoding)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+if __name__ == "__main__":
+    pass
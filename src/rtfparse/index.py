@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+
+
+"""
+Index of the groups of a document: where each of them starts and ends, how deep it is nested and its name.
+
+The index is built by one scan which looks only at braces, binary data, `\\ucN` and the first control word of each group,
+and can be saved next to the document. Its columns are compact arrays, and the groups of each name are listed together,
+so finding all `\\pict` groups or parsing only the `\\info` group takes time in proportion to the groups found,
+not to the document.
+
+Layout of a saved index (all integers little-endian):
+
+    header      magic, format version, typecode of the positions, number of groups, size and modification time of the document,
+                section offsets and lengths
+    encoding    the encoding of the document
+    sections    names, starts, ends, depths, name numbers, ignorable flags, `\\ucN` counts, offsets of the names in postings, postings
+"""
+
+import array
+import logging
+import os
+import pathlib
+import struct
+import sys
+from typing import Iterable, Iterator, NamedTuple, Union
+
+# Own modules
+from rtfparse import entities, pictures, re_patterns, tokenizer, utils
+from rtfparse.enums import Bytestring_Type
+from rtfparse.parser import map_file
+from rtfparse.serialization import Format_Error, aligned, to_little_endian
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+MAGIC = b"RTFI"
+FORMAT_VERSION = 1
+SUFFIX = ".rtfidx"  # appended to the name of the document to get the name of its saved index
+# Sections and the typecodes of their arrays, "" for the typecode of the positions
+SECTIONS = (
+    ("names", "B"),
+    ("starts", ""),
+    ("ends", ""),
+    ("depths", "I"),
+    ("name_numbers", "I"),
+    ("flags", "B"),
+    ("ucs", "I"),
+    ("name_offsets", "I"),
+    ("postings", "I"),
+)
+HEADER = struct.Struct("<4sBcxxQQq" + "QQ" * len(SECTIONS))
+
+
+class Group_Span(NamedTuple):
+    """
+    A group of the document. `end` is the position after its closing brace, `depth` is 0 for the document itself,
+    `name` is its first control word or "" if it does not start with one, `uc` the count of fallback characters
+    of `\\uN` characters in effect at its start.
+    """
+
+    number: int
+    start: int
+    end: int
+    depth: int
+    name: str
+    ignorable: bool
+    uc: int
+
+
+class Structure_Index:
+    """
+    The groups of a document in the order of their starts, in columns.
+    `postings` lists the numbers of the groups of each name together, from `name_offsets[name number]` on.
+    """
+
+    def __init__(
+        self,
+        encoding: str,
+        names: list[str],
+        starts: Iterable[int],
+        ends: Iterable[int],
+        depths: Iterable[int],
+        name_numbers: Iterable[int],
+        flags: Iterable[int],
+        ucs: Iterable[int],
+        name_offsets: Iterable[int],
+        postings: Iterable[int],
+        size: int = 0,
+        modified: int = 0,
+    ) -> None:
+        self.encoding = encoding
+        self.names = names
+        self.starts = starts
+        self.ends = ends
+        self.depths = depths
+        self.name_numbers = name_numbers
+        self.flags = flags
+        self.ucs = ucs
+        self.name_offsets = name_offsets
+        self.postings = postings
+        self.size = size  # size of the indexed document
+        self.modified = modified  # modification time of the indexed file in nanoseconds, 0 if it is not a file
+        self.numbers = {name: number for number, name in enumerate(names)}
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def span(self, number: int) -> Group_Span:
+        """
+        Returns the group number `number`
+        """
+        return Group_Span(
+            number,
+            self.starts[number],
+            self.ends[number],
+            self.depths[number],
+            self.names[self.name_numbers[number]],
+            bool(self.flags[number]),
+            self.ucs[number],
+        )
+
+    def count(self, name: str) -> int:
+        """
+        Returns the number of groups named `name`
+        """
+        number = self.numbers.get(name)
+        if number is None:
+            return 0
+        return self.name_offsets[number + 1] - self.name_offsets[number]
+
+    def find(self, name: str) -> list[Group_Span]:
+        """
+        Returns the groups named `name` in document order
+        """
+        number = self.numbers.get(name)
+        if number is None:
+            return list()
+        return [self.span(group) for group in self.postings[self.name_offsets[number] : self.name_offsets[number + 1]]]
+
+    def parse(self, data: utils.Buffer, span: Group_Span, skip: Iterable[str] = ()) -> entities.Group:
+        """
+        Parses only the group `span` of the document in `data`. Groups named in `skip` are not parsed.
+        """
+        group = entities.Group(self.encoding)
+        group.build(entities.iter_events(data, self.encoding, span.start, root=group, skip=frozenset(skip), uc=span.uc))
+        return group
+
+    def iter_pictures(self, data: utils.Buffer) -> Iterator[pictures.Picture]:
+        """
+        Yields the pictures of the document in `data` without scanning the rest of it
+        """
+        for span in self.find("pict"):
+            token = tokenizer.Token(Bytestring_Type.SKIPPED_GROUP, span.start, span.end, span.name, span.ignorable)
+            yield pictures.read_picture(data, token, self.encoding)
+
+    def is_current(self, path: pathlib.Path) -> bool:
+        """
+        Tells if the file at `path` has not changed since it has been indexed
+        """
+        status = os.stat(path)
+        return status.st_size == self.size and status.st_mtime_ns == self.modified
+
+    def save(self, target: Union[pathlib.Path, str]) -> None:
+        """
+        Writes the index into the file `target`
+        """
+        typecode = "I" if self.size < 2**32 else "Q"
+        columns = dict(
+            names=array.array("B", " ".join(self.names).encode("ascii")),
+            starts=array.array(typecode, self.starts),
+            ends=array.array(typecode, self.ends),
+            depths=array.array("I", self.depths),
+            name_numbers=array.array("I", self.name_numbers),
+            flags=array.array("B", self.flags),
+            ucs=array.array("I", self.ucs),
+            name_offsets=array.array("I", self.name_offsets),
+            postings=array.array("I", self.postings),
+        )
+        sections = [to_little_endian(columns[name]) for name, _ in SECTIONS]
+        encoding = self.encoding.encode("ascii")
+        position = aligned(HEADER.size + 1 + len(encoding))
+        table = list()
+        for section in sections:
+            table.extend((position, len(section)))
+            position = aligned(position + len(section))
+        with open(target, mode="wb") as file:
+            file.write(HEADER.pack(MAGIC, FORMAT_VERSION, typecode.encode("ascii"), len(self), self.size, self.modified, *table))
+            file.write(bytes((len(encoding),)) + encoding)
+            written = HEADER.size + 1 + len(encoding)
+            for offset, section in zip(table[::2], sections):
+                file.write(bytes(offset - written))
+                file.write(section)
+                written = offset + len(section)
+        logger.debug(f"Saved the index of {len(self)} groups into {target}")
+
+
+def build(data: utils.Buffer, encoding: str, modified: int = 0) -> Structure_Index:
+    """
+    Returns the index of the groups of the document in `data`.
+    Groups which do not end, end at the end of `data`.
+    """
+    match = re_patterns.index_scan.match
+    size = len(data)
+    starts = array.array("Q")
+    ends = array.array("Q")
+    depths = array.array("I")
+    name_numbers = array.array("I")
+    flags = array.array("B")
+    ucs = array.array("I")
+    numbers = {b"": 0}
+    # The numbers of the open groups and the counts of fallback characters in effect in them
+    opened = list()
+    uc = [1]
+    position = 0
+    while found := match(data, position):
+        kind = found.lastgroup
+        position = found.end()
+        if kind == "group_start":
+            name, parameter = found.group("name", "name_parameter")
+            opened.append(len(starts))
+            starts.append(found.start("group_start"))
+            ends.append(size)
+            depths.append(len(opened) - 1)
+            flags.append(found.group("ignorable") is not None)
+            ucs.append(uc[-1])
+            uc.append(uc[-1])
+            if name is None:
+                name = b""
+            elif parameter is not None:
+                if name == b"bin":
+                    position += tokenizer.bin_length(parameter, size - position)
+                elif name == b"uc":
+                    uc[-1] = max(int(parameter), 0)
+                elif name == b"u":
+                    # A `\uN` character is plain text, the group has no name
+                    name = b""
+            name_numbers.append(numbers.setdefault(name, len(numbers)))
+        elif kind == "group_end":
+            # Closing braces without an open group are ignored
+            if opened:
+                ends[opened.pop()] = position
+                uc.pop()
+        elif kind == "parameter":
+            position += tokenizer.bin_length(found.group("parameter"), size - position)
+        elif kind == "uc":
+            uc[-1] = max(int(found.group("uc")), 0)
+    # List the groups of each name together, in document order
+    counts = [0] * len(numbers)
+    for number in name_numbers:
+        counts[number] += 1
+    name_offsets = array.array("I", [0])
+    for count in counts:
+        name_offsets.append(name_offsets[-1] + count)
+    postings = array.array("I", bytes(4 * len(name_numbers)))
+    filled = list(name_offsets[:-1])
+    for group, number in enumerate(name_numbers):
+        postings[filled[number]] = group
+        filled[number] += 1
+    names = [str(name, "ascii") for name in numbers]
+    logger.debug(f"Indexed {len(starts)} groups with {len(names)} names")
+    return Structure_Index(encoding, names, starts, ends, depths, name_numbers, flags, ucs, name_offsets, postings, size, modified)
+
+
+def path_of(path: pathlib.Path) -> pathlib.Path:
+    """
+    Returns the path of the saved index of the document at `path`
+    """
+    return path.with_name(path.name + SUFFIX)
+
+
+def load(source: Union[pathlib.Path, str]) -> Structure_Index:
+    """
+    Returns the index saved in the file `source`, which is memory-mapped. Its columns are not read until they are queried.
+    """
+    with open(source, mode="rb") as file:
+        view = memoryview(map_file(file))
+    if len(view) < HEADER.size:
+        raise Format_Error("Too short for an index")
+    magic, version, typecode, count, size, modified, *table = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise Format_Error("Not an index of a document")
+    if version != FORMAT_VERSION:
+        raise Format_Error(f"Index format version {version} is not supported, only version {FORMAT_VERSION}")
+    typecode = typecode.decode("ascii")
+    encoding_length = view[HEADER.size]
+    encoding = str(view[HEADER.size + 1 : HEADER.size + 1 + encoding_length], "ascii")
+    columns = dict()
+    for (name, code), offset, length in zip(SECTIONS, table[::2], table[1::2]):
+        if offset + length > len(view):
+            raise Format_Error(f"Section {name} reaches beyond the end of the index")
+        section = view[offset : offset + length]
+        code = code or typecode
+        if sys.byteorder == "big" and code != "B":
+            column = array.array(code, section.tobytes())
+            column.byteswap()
+            columns[name] = column
+        else:
+            columns[name] = section.cast(code)
+    if len(columns["starts"]) != count:
+        raise Format_Error(f"The index should have {count} groups, but has {len(columns['starts'])}")
+    names = str(columns.pop("names"), "ascii").split(" ")
+    return Structure_Index(encoding, names, size=size, modified=modified, **columns)
+
+
+if __name__ == "__main__":
+    pass
@@ -26,10 +26,10 @@ The custom logger is configured to propagate its log records to the root logger
 import pathlib
 
 
-def create_dict_config(directory: pathlib.Path, all_log: str, info_log: str, error_log: str) -> dict:
+def create_dict_config(directory: pathlib.Path, all_log: str, info_log: str, error_log: str, debug: bool = False) -> dict:
     """
     Creates a logging configuration with path to logfiles set as
-    given by the arguments
+    given by the arguments. The debug logfile `all_log` is only written if `debug` is True.
     """
     file_formatter_conf = {
         "format": "{message:<50s} {levelname:>9s} {asctime}.{msecs:03.0f} {module} {funcName} ",
@@ -78,16 +78,23 @@ def create_dict_config(directory: pathlib.Path, all_log: str, info_log: str, err
 
     handlers_dict = {
         "root_console_handler": root_console_handler_conf,
-        "root_file_handler": root_file_handler_conf,
         "custom_error_file_handler": custom_error_file_handler_conf,
         "custom_info_file_handler": custom_info_file_handler_conf,
     }
+    root_handlers = ["root_console_handler", "custom_error_file_handler", "custom_info_file_handler"]
 
-    custom_logger_conf = {"propagate": True, "handlers": ["custom_error_file_handler", "custom_info_file_handler"], "level": "DEBUG"}
+    # Writing every debug message into a file slows everything down, so the debug log is opt-in
+    if debug:
+        handlers_dict["root_file_handler"] = root_file_handler_conf
+        root_handlers.insert(0, "root_file_handler")
+
+    level = "DEBUG" if debug else "INFO"
+
+    custom_logger_conf = {"propagate": True, "handlers": ["custom_error_file_handler", "custom_info_file_handler"], "level": level}
 
     root_logger_conf = {
-        "handlers": ["root_file_handler", "root_console_handler", "custom_error_file_handler", "custom_info_file_handler"],
-        "level": "DEBUG",
+        "handlers": root_handlers,
+        "level": level,
     }
 
     loggers_dict = {"custom_logger": custom_logger_conf}
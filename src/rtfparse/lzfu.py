@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+
+
+"""
+Decompressor of compressed RTF (LZFu, [MS-OXRTFCP]), the format of the RTF body of MS Outlook messages.
+
+The data is decompressed chunk by chunk as it arrives, so the decompressed document never has to be held whole,
+e.g. to feed it straight into `incremental.Incremental_Parser`.
+"""
+
+import logging
+import struct
+import zlib
+from typing import Iterable, Iterator
+
+# Own modules
+from rtfparse import utils
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+HEADER = struct.Struct("<IIII")  # size of the compressed data after this field, size of the RTF, type, CRC
+COMPRESSED = 0x75465A4C  # "LZFu"
+UNCOMPRESSED = 0x414C454D  # "MELA"
+DICTIONARY_SIZE = 4096
+MASK = DICTIONARY_SIZE - 1
+# The dictionary starts filled with RTF which most documents begin with
+INITIAL_DICTIONARY = (
+    rb"{\rtf1\ansi\mac\deff0\deftab720{\fonttbl;}{\f0\fnil \froman \fswiss \fmodern \fscript \fdecor MS Sans SerifSymbolArialTimes New RomanCourier"
+    rb"{\colortbl\red0\green0\blue0" + b"\r\n" + rb"\par \pard\plain\f0\fs20\b\i\u\tab\tx"
+)
+
+
+class Decompression_Error(ValueError):
+    """
+    The data is not compressed RTF
+    """
+
+
+class Decompressor:
+    """
+    Decompresses compressed RTF fed into it chunk by chunk, like `zlib.decompressobj`.
+    `decompress` returns the RTF decompressed from a chunk, `flush` checks the end of the data.
+    """
+
+    def __init__(self) -> None:
+        self._header = None
+        self._input = bytearray()
+        self._remaining = 0  # bytes of the compressed data after the header not read yet
+        self._dictionary = bytearray(INITIAL_DICTIONARY) + bytearray(DICTIONARY_SIZE - len(INITIAL_DICTIONARY))
+        self._position = len(INITIAL_DICTIONARY)  # where the next byte is written into the dictionary
+        self._crc = 0xFFFFFFFF  # CRC of the data read so far, as `zlib.crc32` continues it
+        self._ended = False  # whether the end of the RTF has been decoded
+        self.size = 0  # number of bytes decompressed so far
+        self.eof = False  # whether all the compressed data has been read
+
+    def decompress(self, chunk: bytes) -> bytes:
+        """
+        Returns the RTF decompressed from `chunk` and the data fed before it.
+        A control byte and its literals and references are decompressed only when they have all arrived.
+        """
+        if self.eof:
+            return b""
+        self._input += chunk
+        if self._header is None:
+            if len(self._input) < HEADER.size:
+                return b""
+            self.read_header()
+        data = self._input[: self._remaining]
+        del self._input[: len(data)]
+        self._remaining -= len(data)
+        if self._header[2] == UNCOMPRESSED:
+            output = data
+        elif self._ended:
+            # The rest of the data after the end of the RTF only counts for the CRC
+            output = b""
+        else:
+            output, consumed = self.decode(data, final=not self._remaining)
+            if not self._ended:
+                # An incomplete control group is decoded with the next chunk
+                self._input[:0] = data[consumed:]
+                self._remaining += len(data) - consumed
+                data = data[:consumed]
+        self._crc = zlib.crc32(data, self._crc)
+        self.size += len(output)
+        if not self._remaining:
+            self.finish()
+        return bytes(output)
+
+    def read_header(self) -> None:
+        size, raw_size, kind, crc = HEADER.unpack_from(self._input)
+        if kind not in (COMPRESSED, UNCOMPRESSED):
+            raise Decompression_Error(f"Unknown type of compressed RTF {kind:#010x}")
+        self._header = (size, raw_size, kind, crc)
+        # The size counts the rest of the header, too
+        self._remaining = size - HEADER.size + 4
+        del self._input[: HEADER.size]
+        logger.debug(f"Decompressing {self._remaining} bytes into {raw_size} bytes of RTF")
+
+    def decode(self, data: bytearray, final: bool) -> tuple[bytearray, int]:
+        """
+        Returns the bytes decoded from the control groups in `data` and the number of bytes of `data` read.
+        A control group is read only if it is complete, unless `final` is True.
+        """
+        output = bytearray()
+        append = output.append
+        dictionary = self._dictionary
+        position = self._position
+        size = len(data)
+        index = 0
+        while index < size:
+            control = data[index]
+            # A control byte has one bit for each of the following 8 literals (0) or references (1) of 2 bytes
+            needed = 9 + control.bit_count()
+            if index + needed > size and not final:
+                break
+            index += 1
+            for bit in range(8):
+                if control & (1 << bit):
+                    if index + 2 > size:
+                        index = size
+                        break
+                    reference = data[index] << 8 | data[index + 1]
+                    index += 2
+                    offset = reference >> 4
+                    if offset == position:
+                        # A reference to the position being written marks the end of the RTF
+                        self._ended = True
+                        self._position = position
+                        return output, index
+                    length = (reference & 0xF) + 2
+                    if offset + length <= DICTIONARY_SIZE and position + length <= DICTIONARY_SIZE and (position - offset) & MASK >= length:
+                        # Neither the copied bytes nor their copy wrap around the end of the dictionary, nor do they overlap
+                        piece = dictionary[offset : offset + length]
+                        dictionary[position : position + length] = piece
+                        output += piece
+                        position = (position + length) & MASK
+                    else:
+                        for step in range(length):
+                            byte = dictionary[(offset + step) & MASK]
+                            dictionary[position] = byte
+                            append(byte)
+                            position = (position + 1) & MASK
+                else:
+                    if index >= size:
+                        break
+                    byte = data[index]
+                    index += 1
+                    dictionary[position] = byte
+                    append(byte)
+                    position = (position + 1) & MASK
+        self._position = position
+        return output, index
+
+    def finish(self) -> None:
+        self.eof = True
+        _, raw_size, kind, crc = self._header
+        if kind == COMPRESSED and self._crc ^ 0xFFFFFFFF != crc:
+            logger.warning(utils.warn(f"CRC of the compressed RTF is {self._crc ^ 0xFFFFFFFF:#010x}, expected {crc:#010x}"))
+        if self.size != raw_size:
+            logger.warning(utils.warn(f"Decompressed {self.size} bytes of RTF, expected {raw_size}"))
+
+    def flush(self) -> bytes:
+        """
+        Ends the data and returns what is left of the RTF
+        """
+        if self._header is None:
+            raise Decompression_Error("The compressed RTF ends within its header")
+        if self.eof:
+            return b""
+        output = b""
+        if self._header[2] == COMPRESSED and not self._ended:
+            output, _ = self.decode(self._input, final=True)
+            self.size += len(output)
+        logger.warning(utils.warn(f"The compressed RTF ends {self._remaining} bytes early"))
+        self.finish()
+        return bytes(output)
+
+
+def iter_decompressed(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Yields the RTF decompressed from the compressed RTF arriving in `chunks`
+    """
+    decompressor = Decompressor()
+    for chunk in chunks:
+        output = decompressor.decompress(chunk)
+        if output:
+            yield output
+    output = decompressor.flush()
+    if output:
+        yield output
+
+
+def decompress(data: bytes) -> bytes:
+    """
+    Returns the RTF decompressed from the compressed RTF `data`
+    """
+    return b"".join(iter_decompressed((data,)))
+
+
+if __name__ == "__main__":
+    pass
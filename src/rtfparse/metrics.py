@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+
+
+"""
+Opt-in statistics of parsing and rendering a document, to find out where the time goes and which documents are pathological.
+
+`Parse_Stats` counts the tokens of each kind and their bytes, the groups of each name and the deepest nesting
+through its `trace` hook, and times the stages of the work (reading, scanning the header, parsing, rendering).
+The time of a stage does not include the time of the stages nested in it,
+e.g. a renderer consuming the events of a parser which is timed as well is charged only for rendering.
+Nothing is counted or timed unless a `Parse_Stats` is given to the parser or the renderer.
+"""
+
+import collections
+import contextlib
+import json
+import logging
+import time
+from typing import Iterable, Iterator, Optional, TypeVar
+
+# Own modules
+from rtfparse import tokenizer
+from rtfparse.enums import Bytestring_Type
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+Item = TypeVar("Item")
+
+# The kinds of tokens `Parse_Stats.trace` tells apart
+CONTROL_WORD = Bytestring_Type.CONTROL_WORD
+GROUP_START = Bytestring_Type.GROUP_START
+GROUP_END = Bytestring_Type.GROUP_END
+SKIPPED_GROUP = Bytestring_Type.SKIPPED_GROUP
+
+
+class Stage_Stats:
+    """
+    Statistics of a stage: how many times it has been entered, the seconds spent in it
+    and the bytes it has processed (its input when parsing, its output when rendering)
+    """
+
+    __slots__ = ("calls", "seconds", "bytes")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes = 0
+
+    def as_dict(self) -> dict:
+        megabytes_per_second = self.bytes / self.seconds / 1_000_000 if self.seconds else 0.0
+        return dict(calls=self.calls, seconds=self.seconds, bytes=self.bytes, megabytes_per_second=megabytes_per_second)
+
+
+class Parse_Stats:
+    """
+    Statistics of parsing and rendering a document.
+
+    `stages` maps the names of the stages to their `Stage_Stats`,
+    `tokens` and `token_bytes` the names of the kinds of tokens to their numbers and bytes,
+    `groups` the names of the groups (their first control words, "" for groups which do not start with one) to their numbers.
+    `max_depth` is the deepest nesting of groups, the document itself is at depth 1.
+    """
+
+    def __init__(self, source: str = "") -> None:
+        self.source = source  # what has been parsed, e.g. the path of the file
+        self.stages = dict()
+        self.tokens = collections.Counter()
+        self.token_bytes = collections.Counter()
+        self.groups = collections.Counter()
+        self.max_depth = 0
+        # State of `trace`
+        self._depth = 0
+        self._unnamed = False
+        # The stages being timed, innermost last, and since when the innermost one is being timed
+        self._running = list()
+        self._since = 0.0
+
+    def stage(self, name: str) -> Stage_Stats:
+        """
+        Returns the statistics of the stage `name`
+        """
+        found = self.stages.get(name)
+        if found is None:
+            found = self.stages[name] = Stage_Stats()
+        return found
+
+    def enter(self, stage: Stage_Stats) -> None:
+        """
+        Starts timing `stage`, pausing the stage being timed so far
+        """
+        now = time.perf_counter()
+        if self._running:
+            self._running[-1].seconds += now - self._since
+        self._running.append(stage)
+        self._since = now
+
+    def leave(self) -> None:
+        """
+        Stops timing the stage entered last, resuming the stage entered before it
+        """
+        now = time.perf_counter()
+        self._running.pop().seconds += now - self._since
+        self._since = now
+
+    @contextlib.contextmanager
+    def measure(self, name: str) -> Iterator[Stage_Stats]:
+        """
+        Times the stage `name` while in the context and yields its statistics, e.g. to add the bytes it processes
+        """
+        stage = self.stage(name)
+        stage.calls += 1
+        self.enter(stage)
+        try:
+            yield stage
+        finally:
+            self.leave()
+
+    def timed(self, items: Iterable[Item], name: str) -> Iterator[Item]:
+        """
+        Yields `items`, timing the stage `name` only while the next item is being made,
+        not while the consumer of the items works on them
+        """
+        stage = self.stage(name)
+        stage.calls += 1
+        items = iter(items)
+        running = self._running
+        clock = time.perf_counter
+        # `enter` and `leave` inlined, they are called for every item
+        while True:
+            now = clock()
+            if running:
+                running[-1].seconds += now - self._since
+            running.append(stage)
+            self._since = now
+            try:
+                item = next(items, None)
+            finally:
+                now = clock()
+                running.pop()
+                stage.seconds += now - self._since
+                self._since = now
+            if item is None:
+                return
+            yield item
+
+    def trace(self, token: tokenizer.Token) -> None:
+        """
+        A trace hook which counts `token`, e.g. `Rtf_Parser(..., trace=stats.trace)`
+        """
+        kind = token.kind
+        # `_name_` is a plain attribute, `name` a much slower property
+        name = kind._name_
+        self.tokens[name] += 1
+        self.token_bytes[name] += token.end - token.start
+        if self._unnamed:
+            # A group is named like its first token if that is a control word
+            self._unnamed = False
+            self.groups[token.name if kind is CONTROL_WORD else ""] += 1
+        if kind is GROUP_START:
+            self._depth += 1
+            self._unnamed = True
+            if self._depth > self.max_depth:
+                self.max_depth = self._depth
+        elif kind is GROUP_END:
+            self._depth -= 1
+        elif kind is SKIPPED_GROUP:
+            self.groups[token.name] += 1
+            if self._depth >= self.max_depth:
+                self.max_depth = self._depth + 1
+
+    def as_dict(self) -> dict:
+        """
+        Returns the statistics as a dictionary of plain values, the groups and tokens with the most frequent first
+        """
+        return dict(
+            source=self.source,
+            stages={name: stage.as_dict() for name, stage in self.stages.items()},
+            tokens={name: dict(count=count, bytes=self.token_bytes[name]) for name, count in self.tokens.most_common()},
+            max_depth=self.max_depth,
+            groups=dict(self.groups.most_common()),
+        )
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        return json.dumps(self.as_dict(), indent=indent)
+
+
+def measure(stats: Optional[Parse_Stats], name: str) -> contextlib.AbstractContextManager:
+    """
+    Times the stage `name` in `stats` while in the context, or nothing if `stats` is None.
+    Yields the statistics of the stage, which are thrown away if `stats` is None.
+    """
+    if stats is None:
+        return contextlib.nullcontext(Stage_Stats())
+    return stats.measure(name)
+
+
+def timed(stats: Optional[Parse_Stats], items: Iterable[Item], name: str) -> Iterable[Item]:
+    """
+    Returns `items`, timed as the stage `name` in `stats` unless `stats` is None
+    """
+    if stats is None:
+        return items
+    return stats.timed(items, name)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+
+
+"""
+Streaming reader of MS Outlook .msg files.
+
+The compressed RTF body of a message is read from its stream in chunks and decompressed chunk by chunk,
+so it can be fed straight into `incremental.Incremental_Parser` without holding the whole RTF.
+Attachments are copied into files in chunks, one at a time.
+"""
+
+import logging
+import pathlib
+import shutil
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+import olefile
+
+# Own modules
+from rtfparse import lzfu, utils
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+CHUNK_SIZE = 16 * 1024  # compressed RTF decompresses into chunks several times larger
+RTF_STREAM = "__substg1.0_10090102"  # PidTagRtfCompressed
+ATTACHMENT_PREFIX = "__attach_version1.0_#"
+ATTACHMENT_DATA = "__substg1.0_37010102"  # PidTagAttachDataBinary
+# Streams of the name of an attachment by preference: long file name, file name, display name, in Unicode or in the code page
+ATTACHMENT_NAMES = (
+    ("__substg1.0_3707001F", "utf-16-le"),
+    ("__substg1.0_3707001E", "cp1252"),
+    ("__substg1.0_3704001F", "utf-16-le"),
+    ("__substg1.0_3704001E", "cp1252"),
+    ("__substg1.0_3001001F", "utf-16-le"),
+    ("__substg1.0_3001001E", "cp1252"),
+)
+
+
+class Attachment(NamedTuple):
+    storage: str  # name of the storage of the attachment in the message
+    name: str
+
+
+class Msg_File:
+    """
+    An MS Outlook .msg file, opened with `olefile`
+    """
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = pathlib.Path(path)
+        self.ole = olefile.OleFileIO(str(self.path))
+
+    def __enter__(self) -> "Msg_File":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.ole.close()
+
+    def iter_rtf(self, chunk_size: int = CHUNK_SIZE, copy: Optional[BinaryIO] = None) -> Iterator[bytes]:
+        """
+        Yields the RTF body of the message decompressed chunk by chunk.
+        The RTF is also written into `copy`, if given.
+        """
+        if not self.ole.exists(RTF_STREAM):
+            raise ValueError(f"{self.path} has no RTF body")
+        with self.ole.openstream(RTF_STREAM) as stream:
+            chunks = iter(lambda: stream.read(chunk_size), b"")
+            for chunk in lzfu.iter_decompressed(chunks):
+                if copy is not None:
+                    copy.write(chunk)
+                yield chunk
+
+    def attachments(self) -> list[Attachment]:
+        """
+        Returns the attachments of the message (not of the messages attached to it)
+        """
+        attachments = list()
+        for entry in self.ole.listdir(streams=False, storages=True):
+            if len(entry) != 1 or not entry[0].startswith(ATTACHMENT_PREFIX):
+                continue
+            storage = entry[0]
+            attachments.append(Attachment(storage, self.attachment_name(storage) or f"attachment_{len(attachments)}"))
+        return attachments
+
+    def attachment_name(self, storage: str) -> str:
+        for stream, encoding in ATTACHMENT_NAMES:
+            if self.ole.exists(f"{storage}/{stream}"):
+                with self.ole.openstream(f"{storage}/{stream}") as file:
+                    name = str(file.read(), encoding, errors="replace").rstrip("\x00")
+                # Keep the attachment in the target directory whatever its name says
+                name = pathlib.PurePath(name.replace("\\", "/")).name
+                if name:
+                    return name
+        return ""
+
+    def save_attachments(self, directory: pathlib.Path, chunk_size: int = CHUNK_SIZE) -> list[pathlib.Path]:
+        """
+        Writes the data of the attachments into files in `directory`, copying them in chunks of `chunk_size` bytes.
+        Returns the paths of the written files. Attachments without data, e.g. attached messages, are not written.
+        """
+        directory = utils.provide_dir(pathlib.Path(directory))
+        saved = list()
+        for attachment in self.attachments():
+            stream = f"{attachment.storage}/{ATTACHMENT_DATA}"
+            if not self.ole.exists(stream):
+                logger.warning(utils.warn(f"Attachment {attachment.name} of {self.path} has no data to save"))
+                continue
+            target = directory / attachment.name
+            with self.ole.openstream(stream) as source, open(target, mode="wb") as file:
+                shutil.copyfileobj(source, file, chunk_size)
+            logger.debug(f"Saved attachment {target}")
+            saved.append(target)
+        return saved
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+
+"""
+Parsing of a single large document in several processes.
+
+A pre-scan looks only at braces, binary data and `\\ucN` to find the groups at the top level of the document,
+which is then cut between them into partitions of about the same size.
+Worker processes map the file, parse a partition each and send back its entities in the binary format of `serialization`.
+The partitions are stitched together in order into the tree of the document, which is the same as the one parsed in one process.
+"""
+
+import itertools
+import logging
+import os
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+# Own modules
+from rtfparse import entities, re_patterns, serialization, tokenizer, utils
+from rtfparse.enums import Bytestring_Type
+from rtfparse.parser import map_file
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+PARTS_PER_JOB = 4  # more partitions than workers even out the load of the workers
+MIN_PARTITION_SIZE = 256 * 1024  # smaller partitions cost more to send and stitch than to parse
+
+
+class Partition(NamedTuple):
+    start: int
+    end: int
+    uc: int  # count of fallback characters of `\uN` characters in effect at `start`
+
+
+def partition(data: utils.Buffer, position: int, parts: int) -> tuple[list[Partition], int]:
+    """
+    Cuts the content of the group whose opening brace ends at `position` into at most `parts` partitions
+    of about the same size, each starting with a group at the top level of the content.
+    Returns the partitions and the end of the group, or the length of `data` if the group does not end.
+    """
+    match = re_patterns.structure_scan.match
+    size = len(data)
+    step = max((size - position) // parts, 1)
+    starts = [position]
+    counts = [1]
+    cut = position + step
+    depth = 1
+    uc = 1
+    end = size
+    while found := match(data, position):
+        kind = found.lastgroup
+        position = found.end()
+        if kind == "group_start":
+            if depth == 1 and position > cut:
+                starts.append(position - 1)
+                counts.append(uc)
+                cut = position - 1 + step
+            depth += 1
+        elif kind == "group_end":
+            depth -= 1
+            if not depth:
+                end = position
+                break
+        elif kind == "parameter":
+            position += tokenizer.bin_length(found.group("parameter"), size - position)
+        elif kind == "uc" and depth == 1:
+            uc = max(int(found.group("uc")), 0)
+    # The content ends before the closing brace of the group
+    ends = starts[1:] + [size if depth else end - 1]
+    return [Partition(start, stop, count) for start, stop, count in zip(starts, ends, counts)], end
+
+
+def parse_partition(path: str, encoding: str, part: Partition, skip: frozenset[str]) -> bytes:
+    """
+    Parses a partition of the document in the file at `path` and returns its entities in the binary format,
+    as the structure of a group which is not part of the document
+    """
+    with open(path, mode="rb") as file:
+        data = map_file(file)
+    # The partition ends with the start of a group at the top level, no token reaches over it
+    tokens = itertools.takewhile(lambda token: token.start < part.end, tokenizer.tokenize(data, encoding, part.start, skip, uc=[part.uc]))
+    opening = tokenizer.Token(Bytestring_Type.GROUP_START, part.start, part.start, "", False)
+    content = entities.Group(encoding)
+    content.build(entities.iter_events(data, encoding, part.start, root=content, skip=skip, tokens=itertools.chain((opening,), tokens)))
+    return serialization.dumps(content)
+
+
+def parse(
+    path: pathlib.Path, data: utils.Buffer, encoding: str, jobs: Optional[int] = None, skip: frozenset[str] = frozenset()
+) -> Optional[entities.Group]:
+    """
+    Returns the tree of the document in the file at `path`, mapped into `data`, parsed by `jobs` processes
+    (as many as there are CPUs if None). Groups named in `skip` are not parsed.
+    Returns None if there is only one process, or if the document is too small to be worth parsing in parallel or does not start with a group.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    parts = min(jobs * PARTS_PER_JOB, len(data) // MIN_PARTITION_SIZE)
+    first = next(tokenizer.tokenize(data, encoding), None)
+    if jobs < 2 or parts < 2 or first is None or first.kind is not Bytestring_Type.GROUP_START or first.start:
+        logger.debug(f"Not parsing {path} in parallel")
+        return None
+    partitions, end = partition(data, first.end, parts)
+    if len(partitions) < 2:
+        logger.debug(f"Found no groups to cut {path} between")
+        return None
+    logger.info(f"Parsing {path} in {len(partitions)} partitions with {jobs} processes")
+    parsed = entities.Group(encoding)
+    parsed.open(first)
+    parsed.end_position = end
+    arguments = (itertools.repeat(str(path)), itertools.repeat(encoding), partitions, itertools.repeat(skip))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for number, dumped in enumerate(executor.map(parse_partition, *arguments)):
+            content = serialization.loads(dumped)
+            if not number:
+                # The document is named like the first partition, which starts where its content does
+                parsed.name = content.name
+            parsed.structure.extend(content.structure)
+    return parsed
+
+
+if __name__ == "__main__":
+    pass
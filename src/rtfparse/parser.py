@@ -3,84 +3,270 @@
 
 import io
 import logging
+import mmap
+import os
 import pathlib
+import stat
 from argparse import Namespace
 
 # Typing
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional, Union
 
 # Own modules
-from rtfparse import entities, utils
+from rtfparse import entities, header, metrics, pictures, tokenizer, utils
+from rtfparse.cache import Parse_Cache
+
+if TYPE_CHECKING:
+    # The index imports this module, so it is imported at runtime only where it is used
+    from rtfparse import index
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
 
 class Rtf_Parser:
-    def __init__(self, rtf_path: Optional[pathlib.Path] = None, rtf_file: Optional[Union[io.BufferedReader, io.BytesIO]] = None) -> None:
+    def __init__(
+        self,
+        rtf_path: Optional[pathlib.Path] = None,
+        rtf_file: Optional[Union[io.BufferedReader, io.BytesIO]] = None,
+        rtf_buffer: Optional[utils.Buffer] = None,
+        lazy: bool = False,
+        skip: Iterable[str] = (),
+        trace: Optional[Callable[[tokenizer.Token], None]] = None,
+        cache: Optional[Parse_Cache] = None,
+        jobs: Optional[int] = 1,
+        stats: Optional[metrics.Parse_Stats] = None,
+    ) -> None:
         self.rtf_path = rtf_path
         self.rtf_file = rtf_file
-        if not (self.rtf_path or self.rtf_file):
-            raise ValueError("Need `rtf_path` or `rtf_file` argument")
-        self.ENCODING_PROBE = 48  # look for encoding information in the first 48 bytes of the file
+        self.rtf_buffer = rtf_buffer
+        self.lazy = lazy  # parse the content of groups only when it is accessed
+        self.skip = frozenset(skip)  # names of groups whose content is not parsed at all
+        self.trace = trace  # called with every token read, e.g. `tokenizer.log_token`
+        self.cache = cache  # tokens of documents parsed before, not used for lazy parsing
+        self.jobs = jobs  # processes parsing a large file in parallel (None for one per CPU), not used for lazy or traced parsing
+        self.stats = stats  # counts the tokens and times the stages of parsing, which then uses one process like tracing
+        self.header = None  # character set, code page and default font of the document, known once it is read
+        if not (self.rtf_path or self.rtf_file or self.rtf_buffer is not None):
+            raise ValueError("Need `rtf_path`, `rtf_file` or `rtf_buffer` argument")
+
+    def read_header(self, data: utils.Buffer) -> header.Header:
+        """
+        Scans the header of the document in `data` in place and keeps it in `header`
+        """
+        with metrics.measure(self.stats, "header"):
+            self.header = header.scan(data)
+        logger.info(f"recognized encoding {self.header.encoding}")
+        return self.header
 
     def read_encoding(self, file: Union[io.BufferedReader, io.BytesIO]) -> str:
-        probed = file.read(self.ENCODING_PROBE)
-        group = entities.Group("cp1252", io.BytesIO(probed))
-        recognized_encodings = ("ansi", "ansicpg", "mac", "pc", "pca")
-        # Gather all control words, which could define an encoding:
-        names = tuple(filter(lambda item: isinstance(item, entities.Control_Word) and item.control_name in recognized_encodings, group.structure))
-        # Check if the ANSI code page is set as a parameter of any of the control words:
-        encoding = None
-        for item in names:
-            # if any item is a Control_Word which has a parameter, we assume that this is the parameter of \ansicpg, and that corresponds to the codepage we are looking for
-            if item.parameter:
-                param = item.parameter
-            else:
-                param = None
-        if param:
-            if param == 65001:
-                logger.warning("Found encoding '65001', but often this is actually 'cp1252', so I'm taking that")
-                encoding = "cp1252"
-            else:
-                encoding = f"cp{param}"
-        else:
-            if names[0].control_name == "ansi":
-                logger.warning("Found encoding 'ansi', but often this is actually 'cp1252', so I'm taking that")
-                encoding = "cp1252"
-            elif names[0].control_name == "mac":
-                encoding = "mac_roman"
-            elif names[0].control_name == "pc":
-                encoding = "cp437"
-            elif names[0].control_name == "pca":
-                encoding = "cp850"
+        """
+        Returns the encoding of the document at the start of `file` and leaves `file` positioned there
+        """
+        probed = file.read(header.MAX_WINDOW)
         file.seek(0)
-        logger.info(f"recognized encoding {encoding}")
-        return encoding
+        return self.read_header(probed).encoding
 
-    def parse_file(self) -> entities.Group:
+    def describe(self) -> str:
         if self.rtf_path is not None:
-            file = open(self.rtf_path, mode="rb")
+            return str(self.rtf_path)
+        elif self.rtf_file is not None:
+            return utils.what_is_being_parsed(self.rtf_file)
+        else:
+            return utils.what_is_being_parsed(self.rtf_buffer)
+
+    def file_path(self) -> Optional[pathlib.Path]:
+        """
+        Returns the path of the parsed file, or None if the document is not a file on disk
+        """
+        if self.rtf_buffer is not None:
+            return None
+        elif self.rtf_path is not None:
+            return pathlib.Path(self.rtf_path)
+        elif is_regular_file(self.rtf_file) and isinstance(self.rtf_file.name, (str, pathlib.Path)) and pathlib.Path(self.rtf_file.name).is_file():
+            return pathlib.Path(self.rtf_file.name)
+        else:
+            return None
+
+    def parse_parallel(self, data: utils.Buffer, encoding: str) -> Optional[entities.Group]:
+        """
+        Returns the tree of the document parsed by `jobs` processes, or None if it is parsed in this process
+        """
+        path = self.file_path()
+        if self.jobs == 1 or self.lazy or self.tracer() is not None or self.cache is not None or path is None:
+            return None
+        # Imported here, as the binary format the workers send their partitions in imports this module
+        from rtfparse import parallel
+
+        return parallel.parse(path, data, encoding, self.jobs, self.skip)
+
+    def tracer(self) -> Optional[Callable[[tokenizer.Token], None]]:
+        """
+        Returns the trace hook to pass every token read to: `trace`, the one of `stats`, both of them or None
+        """
+        if self.stats is None:
+            return self.trace
+        elif self.trace is None:
+            return self.stats.trace
+        else:
+            first, second = self.trace, self.stats.trace
+
+            def trace(token: tokenizer.Token) -> None:
+                first(token)
+                second(token)
+
+            return trace
+
+    def read_document(self) -> utils.Buffer:
+        """
+        Returns the whole document like `read_data`, counted and timed as the stage "read" in `stats`
+        """
+        with metrics.measure(self.stats, "read") as stage:
+            data = self.read_data()
+            stage.bytes += len(data)
+        if self.stats is not None and not self.stats.source:
+            self.stats.source = self.describe()
+        return data
+
+    def read_data(self) -> utils.Buffer:
+        """
+        Returns the whole document as a buffer without copying it where possible:
+        files are memory-mapped, `rtf_buffer` and the contents of `io.BytesIO` are used as they are.
+        Parsed entities keep a reference to the buffer, so a memory-mapped file stays open as long as they live.
+        """
+        if self.rtf_buffer is not None:
+            return self.rtf_buffer
+        elif self.rtf_path is not None:
+            with open(self.rtf_path, mode="rb") as file:
+                return map_file(file)
+        elif isinstance(self.rtf_file, io.BytesIO):
+            return self.rtf_file.getvalue()
         elif self.rtf_file is not None:
-            file = self.rtf_file
+            return map_file(self.rtf_file)
         else:
-            file = io.BytesIO(b"")
-        parsed_object = utils.what_is_being_parsed(file)
+            return b""
+
+    def parse_file(self) -> entities.Group:
+        parsed_object = self.describe()
         logger.info(f"Parsing the structure of {parsed_object}")
         try:
-            encoding = self.read_encoding(file)
-            self.parsed = entities.Group(encoding, file)
+            data = self.read_document()
+            encoding = self.read_header(data).encoding
+            with metrics.measure(self.stats, "parse") as stage:
+                stage.bytes += len(data)
+                self.parsed = self.parse_parallel(data, encoding)
+                if self.parsed is None:
+                    self.parsed = entities.Group(encoding)
+                    trace = self.tracer()
+                    if self.cache is not None and not self.lazy:
+                        events = self.cache.iter_events(data, encoding, root=self.parsed, skip=self.skip, trace=trace)
+                    else:
+                        events = entities.iter_events(data, encoding, root=self.parsed, skip=self.skip, lazy=self.lazy, trace=trace)
+                    self.parsed.build(events)
         except Exception as err:
             logger.exception(err)
             self.parsed = Namespace()
             self.parsed.structure = list()
         finally:
-            if self.rtf_path is not None:
-                logger.debug(f"Closing {parsed_object}")
-                file.close()
             logger.info(f"Structure of {parsed_object} parsed")
             return self.parsed
 
+    def iter_events(self) -> Iterator[entities.Event]:
+        """
+        Yields the events of the document (group starts and ends, control words, control symbols and plain text)
+        while parsing it, without building the tree of its structure.
+        Groups named in `skip` are yielded without their content.
+        """
+        parsed_object = self.describe()
+        logger.info(f"Streaming the structure of {parsed_object}")
+        data = self.read_document()
+        encoding = self.read_header(data).encoding
+        if self.cache is not None:
+            events = self.cache.iter_events(data, encoding, skip=self.skip, trace=self.tracer())
+        else:
+            events = entities.iter_events(data, encoding, skip=self.skip, trace=self.tracer())
+        if self.stats is not None:
+            self.stats.stage("parse").bytes += len(data)
+        # Only the time spent making the events is charged to parsing, not the time spent by their consumer
+        yield from metrics.timed(self.stats, events, "parse")
+        logger.info(f"Structure of {parsed_object} streamed")
+
+    def read_index(self, save: bool = False, data: Optional[utils.Buffer] = None) -> "index.Structure_Index":
+        """
+        Returns the `index.Structure_Index` of the groups of the document.
+        For a file, an index saved next to it is loaded if the file has not changed since, otherwise the document is indexed
+        and the index is saved next to the file if `save` is True.
+        `data` is the document if it has been read with `read_data` already, it is read only if it has to be indexed otherwise.
+        """
+        # Imported here, as the index reads its file with `map_file`
+        from rtfparse import index
+
+        path = self.file_path()
+        saved = None if path is None else index.path_of(path)
+        if saved is not None and saved.is_file():
+            try:
+                loaded = index.load(saved)
+                if loaded.is_current(path):
+                    logger.debug(f"Loaded the index of {path} from {saved}")
+                    return loaded
+            except (index.Format_Error, OSError) as err:
+                logger.warning(utils.warn(f"Cannot use the index {saved}: {err}"))
+        if data is None:
+            data = self.read_data()
+        built = index.build(data, self.read_header(data).encoding, 0 if path is None else os.stat(path).st_mtime_ns)
+        if save and saved is not None:
+            built.save(saved)
+        return built
+
+    def parse_groups(self, name: str) -> Iterator[entities.Group]:
+        """
+        Yields the groups named `name` (by their first control word) in document order,
+        parsing only them and finding them in the index of the document
+        """
+        data = self.read_data()
+        found = self.read_index(data=data)
+        for span in found.find(name):
+            yield found.parse(data, span, self.skip)
+
+    def iter_pictures(self) -> Iterator[pictures.Picture]:
+        """
+        Yields the pictures embedded in the document without parsing the rest of it
+        """
+        parsed_object = self.describe()
+        logger.info(f"Extracting pictures from {parsed_object}")
+        data = self.read_data()
+        encoding = self.read_header(data).encoding
+        yield from pictures.iter_pictures(data, encoding)
+
+
+def is_regular_file(file: object) -> bool:
+    """
+    Tells if `file` reads the bytes of a regular file on disk as they are. Pipes, FIFOs and terminals are not regular files,
+    neither are streams like the ones of `gzip.open`, whose file numbers are the ones of the compressed files underneath.
+    """
+    if not (isinstance(file, io.FileIO) or (isinstance(file, io.BufferedReader) and isinstance(file.raw, io.FileIO))):
+        return False
+    try:
+        return stat.S_ISREG(os.fstat(file.fileno()).st_mode)
+    except (OSError, ValueError):
+        return False
+
+
+def map_file(file: io.BufferedReader) -> utils.Buffer:
+    """
+    Memory-maps the whole `file` read-only if it is a regular file. Falls back to reading it
+    if it cannot be mapped, e.g. because it is empty.
+    Other streams, e.g. pipes, are read from their current position.
+    """
+    if not is_regular_file(file):
+        return file.read()
+    try:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, io.UnsupportedOperation):
+        if file.seekable():
+            file.seek(0)
+        return file.read()
+
 
 if __name__ == "__main__":
     pass
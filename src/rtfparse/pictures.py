@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+
+"""
+Extraction of pictures embedded in RTF documents.
+
+The `\\pict` groups are located without tokenizing their content.
+Their data is referenced as a `Payload` in the scanned buffer and decoded only when it is asked for,
+hex encoded data at once rather than chunk by chunk.
+"""
+
+import logging
+import pathlib
+from typing import Iterator, Optional
+
+# Own modules
+from rtfparse import re_patterns, tokenizer, utils
+from rtfparse.entities import Payload
+from rtfparse.enums import Bytestring_Type
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+# Control words naming the format of a picture and the extension of a file with its data
+FORMATS = {
+    "emfblip": "emf",
+    "pngblip": "png",
+    "jpegblip": "jpg",
+    "macpict": "pict",
+    "pmmetafile": "met",
+    "wmetafile": "wmf",
+    "dibitmap": "dib",
+    "wbitmap": "bmp",
+}
+DIMENSIONS = ("picw", "pich", "picwgoal", "pichgoal")
+
+
+class Picture:
+    """
+    A picture found in a `\\pict` group spanning from `start_position` to `end_position`
+    """
+
+    __slots__ = ("start_position", "end_position", "format", "picw", "pich", "picwgoal", "pichgoal", "payload")
+
+    def __init__(self, start_position: int, end_position: int) -> None:
+        self.start_position = start_position
+        self.end_position = end_position
+        self.format = "unknown"
+        self.picw = None
+        self.pich = None
+        self.picwgoal = None
+        self.pichgoal = None
+        self.payload: Optional[Payload] = None
+
+    @property
+    def extension(self) -> str:
+        return FORMATS.get(self.format, "bin")
+
+    @property
+    def data(self) -> bytes:
+        if self.payload is None:
+            return b""
+        return self.payload.decode()
+
+    def save(self, path: pathlib.Path) -> pathlib.Path:
+        """
+        Writes the picture's data into `path`. If `path` is a directory,
+        the file is named by the picture's position and format.
+        """
+        if path.is_dir():
+            path = path / f"picture_{self.start_position}.{self.extension}"
+        path.write_bytes(self.data)
+        logger.info(f"Saved {self!r} to {path}")
+        return path
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}: {self.format} {self.picw}x{self.pich}>"
+
+
+def read_picture(data: utils.Buffer, token: tokenizer.Token, encoding: str) -> Picture:
+    """
+    Reads the properties and locates the data of the picture in the skipped `\\pict` group of `token`
+    """
+    picture = Picture(token.start, token.end)
+    # Nested groups like {\*\blipuid ...} are skipped, the group end is the end of the picture
+    for found in tokenizer.tokenize(data, encoding, token.start + 1, lazy=True):
+        kind = found.kind
+        if kind is Bytestring_Type.CONTROL_WORD:
+            if found.name in FORMATS:
+                picture.format = found.name
+            elif found.name in DIMENSIONS:
+                setattr(picture, found.name, found.parameter)
+            elif found.name == "bin":
+                picture.payload = Payload(data, found.end, found.end + tokenizer.bin_length(found.parameter, len(data) - found.end))
+        elif kind is Bytestring_Type.PLAIN_TEXT:
+            # The hex encoded data is the last thing in the group
+            run = re_patterns.raw_sdata.match(data, found.start)
+            picture.payload = Payload(data, found.start, run.end(), True)
+            break
+        elif kind is Bytestring_Type.GROUP_END:
+            break
+    return picture
+
+
+def iter_pictures(data: utils.Buffer, encoding: str) -> Iterator[Picture]:
+    """
+    Yields the pictures embedded in `data` in document order
+    """
+    for token in tokenizer.tokenize(data, encoding, skip=frozenset(("pict",))):
+        if token.kind is Bytestring_Type.SKIPPED_GROUP:
+            yield read_picture(data, token, encoding)
+
+
+if __name__ == "__main__":
+    pass
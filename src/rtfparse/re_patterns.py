@@ -47,6 +47,7 @@ _letters = rb"a-zA-Z"
 ascii_letters = group(_letters) + rb"{1,32}"
 _digits = rb"0-9"
 _hdigits = rb"0-9a-f"
+_hex_pair = group(rb"0-9a-fA-F") + rb"{2}"
 ignorable = named_regex_group("ignorable", rb"\\\*")
 rtf_brace_open = named_regex_group("group_start", not_preceded_by(unnamed_rtf_backslash, rb"\{") + ignorable + rb"?")
 rtf_brace_close = named_regex_group("group_end", not_preceded_by(unnamed_rtf_backslash, rb"\}"))
@@ -84,6 +85,7 @@ class Bytes_Regex:
         self.pattern_bytes = Bytes
         self.pattern = re.compile(Bytes, flags)
         self.match = self.pattern.match
+        self.fullmatch = self.pattern.fullmatch
 
     def regex101(self) -> None:
         print(self.pattern_bytes.decode("ascii"))
@@ -99,5 +101,168 @@ group_end = Bytes_Regex(rtf_brace_close)
 plain_text = Bytes_Regex(plain_text_pattern)
 
 
-raw_pcdata = Bytes_Regex(named_regex_group("pcdata", rb".*?") + pcdata_delimiter, flags=re.DOTALL)
-raw_sdata = Bytes_Regex(named_regex_group("sdata", group(_hdigits + rb"\r\n") + rb"+"), flags=re.DOTALL)
+# A run of plain text. Text wrapped over line breaks goes on as `wrapped_text`,
+# so a paragraph or the hex data of a picture written in lines of 80 or 128 bytes is one token and not two per line.
+pcdata = (
+    named_regex_group("text", not_control_character_or_newline + rb"+")
+    + named_regex_group("wrapped_text", no_capture(group(_newline) + rb"+" + not_control_character_or_newline + rb"+") + rb"+")
+    + rb"?"
+)
+
+
+# The tokenizer matches this at arbitrary positions of the whole buffer,
+# so it must not look behind the position it starts at.
+# Each alternative is a named group, `lastgroup` tells which one has matched.
+token = Bytes_Regex(
+    rb"|".join(
+        (
+            pcdata,
+            named_regex_group(
+                "control_word",
+                rb"\\"
+                + named_regex_group("control_name", ascii_letters)
+                + named_regex_group("parameter", rb"-?" + group(_digits) + rb"{1,10}")
+                + rb"?"
+                + no_capture(rb"|".join((rb" ", _newline)))
+                + rb"?",
+            ),
+            named_regex_group("group_start", rb"\{" + ignorable + rb"?"),
+            named_regex_group("group_end", rb"\}"),
+            named_regex_group("newline", group(_newline) + rb"+"),
+            # A run of escaped characters, possibly broken by newlines, is one token, so multibyte characters are decoded whole
+            named_regex_group(
+                "hex",
+                rb"\\'"
+                + named_regex_group(
+                    "hdigits",
+                    no_capture(_hex_pair + no_capture(group(_newline) + rb"*\\'" + _hex_pair) + rb"*") + rb"|.{0,2}",
+                ),
+            ),
+            named_regex_group("symbol", rb"\\" + group(rb"^" + _digits)),
+            named_regex_group("stray", rb"\\"),
+        )
+    ),
+    flags=re.DOTALL,
+)
+
+# Skips to the next brace, escape or binary data when skipping over the content of a group
+group_scan = Bytes_Regex(
+    not_control_character
+    + rb"*"
+    + no_capture(
+        rb"|".join(
+            (
+                named_regex_group("group_start", rb"\{"),
+                named_regex_group("group_end", rb"\}"),
+                rb"\\bin" + named_regex_group("parameter", rb"-?" + group(_digits) + rb"{1,10}") + rb" ?",
+                rb"\\.",
+            )
+        )
+    ),
+    flags=re.DOTALL,
+)
+# Skips to the next brace, binary data or `\ucN` when cutting a document into partitions.
+# Other escapes and control words are skipped over without stopping, as the loop is unrolled.
+_other_escape = no_capture(rb"|".join((rb"\\" + group(rb"^bu"), rb"\\b(?!in)", rb"\\u(?!c)")))
+_structure_skip = not_control_character + rb"*" + no_capture(_other_escape + not_control_character + rb"*") + rb"*"
+_structure_stops = (
+    named_regex_group("group_end", rb"\}"),
+    rb"\\bin" + named_regex_group("parameter", rb"-?" + group(_digits) + rb"{1,10}") + rb" ?",
+    rb"\\uc" + named_regex_group("uc", rb"-?" + group(_digits) + rb"{1,10}"),
+    rb"\\bin",
+    rb"\\uc",
+)
+structure_scan = Bytes_Regex(
+    _structure_skip + no_capture(rb"|".join((named_regex_group("group_start", rb"\{"), *_structure_stops))),
+    flags=re.DOTALL,
+)
+# Like `structure_scan`, but also reads the first control word of each group, which names it
+index_scan = Bytes_Regex(
+    _structure_skip
+    + no_capture(
+        rb"|".join(
+            (
+                named_regex_group(
+                    "group_start",
+                    rb"\{"
+                    + ignorable
+                    + rb"?"
+                    + no_capture(
+                        group(_newline)
+                        + rb"*\\"
+                        + named_regex_group("name", ascii_letters)
+                        + named_regex_group("name_parameter", rb"-?" + group(_digits) + rb"{1,10}")
+                        + rb"? ?"
+                    )
+                    + rb"?",
+                ),
+                *_structure_stops,
+            )
+        )
+    ),
+    flags=re.DOTALL,
+)
+# What may still follow the end of a run of plain text and continue it
+line_breaks = Bytes_Regex(group(_newline) + rb"*")
+# The rest of a run of plain text, possibly wrapped over line breaks, or of picture data
+open_run = Bytes_Regex(not_control_character + rb"*")
+# A run of escaped characters, possibly broken by newlines
+hex_run = Bytes_Regex(no_capture(group(_newline) + rb"*\\'" + _hex_pair) + rb"*")
+# What may still follow the end of a run of escaped characters and continue it
+hex_run_continuation = Bytes_Regex(group(_newline) + rb"*" + no_capture(rb"\\" + no_capture(rb"'" + group(rb"0-9a-fA-F") + rb"?") + rb"?") + rb"?")
+# The next `\uN` character of a run of them, after the fallback characters of the previous one
+unicode = Bytes_Regex(
+    group(_newline)
+    + rb"*\\u"
+    + named_regex_group("unicode", rb"-?" + group(_digits) + rb"{1,10}")
+    + no_capture(rb"|".join((rb" ", _newline)))
+    + rb"?"
+)
+# One fallback character of a `\uN` character: an escaped character, a control word or symbol, or a byte of text
+fallback = Bytes_Regex(
+    group(_newline)
+    + rb"*"
+    + no_capture(
+        rb"|".join(
+            (
+                rb"\\'" + _hex_pair,
+                rb"\\" + ascii_letters + no_capture(rb"-?" + group(_digits) + rb"{1,10}") + rb"?" + no_capture(rb"|".join((rb" ", _newline))) + rb"?",
+                rb"\\" + group(rb"^" + _letters),
+                group(rb"^" + _control_characters_or_newline),
+            )
+        )
+    ),
+    flags=re.DOTALL,
+)
+# What may still follow the end of a run of `\uN` characters and continue it
+unicode_continuation = Bytes_Regex(group(_newline) + rb"*" + no_capture(rb"\\" + no_capture(rb"u-?" + group(_digits) + rb"{0,10}") + rb"?") + rb"?")
+
+# The header of a document: its opening brace and the control words before its first group or text.
+# Repeated named groups keep their last match, so one match finds the character set, code page and default font.
+header = Bytes_Regex(
+    group(rb" \t" + _newline)
+    + rb"*\{"
+    + no_capture(
+        rb"|".join(
+            (
+                rb"\\ansicpg" + named_regex_group("code_page", rb"-?" + group(_digits) + rb"{1,10}") + rb" ?",
+                rb"\\"
+                + named_regex_group("charset", rb"ansi|mac|pca|pc")
+                + rb"(?!"
+                + group(_letters)
+                + rb")"
+                + no_capture(rb"-?" + group(_digits) + rb"{1,10}")
+                + rb"? ?",
+                rb"\\deff" + named_regex_group("default_font", rb"-?" + group(_digits) + rb"{1,10}") + rb" ?",
+                rb"\\" + ascii_letters + no_capture(rb"-?" + group(_digits) + rb"{1,10}") + rb"? ?",
+                group(_newline) + rb"+",
+            )
+        )
+    )
+    + rb"*"
+)
+
+
+raw_pcdata = Bytes_Regex(pcdata)
+# Hex encoded data of a picture, whitespace between the hex digits included
+raw_sdata = Bytes_Regex(named_regex_group("sdata", group(rb"0-9a-fA-F \t" + _newline) + rb"*"))
@@ -1,8 +1,238 @@
 #!/usr/bin/env python
 
 
+import io
+
+# Typing
+from typing import Callable, Iterable, Optional, Union
+
+from rtfparse import entities, metrics
+from rtfparse.enums import Bytestring_Type
+
+# Handlers of `Renderer` which render nothing, so they are not called unless they are overridden
+SILENT_HANDLERS = ("control_word", "group_start", "group_end")
+
+
 class Renderer:
-    pass
+    """
+    Base of renderers. A renderer turns the events of a document into text.
+
+    Subclasses map the names of control words and the text of control symbols
+    to the names of their handler methods in the class attributes `control_words` and `control_symbols`
+    (the mappings of base classes are inherited, subclasses can override single entries).
+    Control words without a handler go to `control_word`, control symbols without one to `control_symbol`,
+    plain text to `plain_text` and the starts and ends of groups to `group_start` and `group_end`.
+    A handler gets the entity and returns the text it renders (or "").
+
+    The handlers are looked up in dispatch tables compiled once for every renderer class,
+    so rendering an event takes one dictionary lookup and no exception is raised for control words without a handler.
+    Groups named in `ignore_groups` are not rendered, except for their start and end,
+    neither are ignorable groups (`{\\*...}`) if `ignore_ignorable_groups` is True.
+    If `stats` are given, the time spent rendering and the size of the output are added to them
+    as the stage "render" followed by the name of the renderer's class.
+    """
+
+    control_words: dict[str, str] = dict()
+    control_symbols: dict[str, str] = dict()
+    ignore_groups: Iterable[str] = ()
+    ignore_ignorable_groups = False
+    flush_size = 8192  # number of rendered fragments collected before they are written at once
+
+    def __init__(self, stats: Optional[metrics.Parse_Stats] = None) -> None:
+        self.stats = stats
+        # State of `render_events`, kept between its calls so that a document can be rendered in batches of events
+        self.opened = None
+        self.ignored_depth = 0
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.compile_dispatch_tables()
+
+    @classmethod
+    def compile_dispatch_tables(cls) -> None:
+        """
+        Compiles the tables of the handler functions of this class
+        """
+        words = dict()
+        symbols = dict()
+        for klass in reversed(cls.__mro__):
+            words.update(vars(klass).get("control_words", dict()))
+            symbols.update(vars(klass).get("control_symbols", dict()))
+        cls._word_table = {name: getattr(cls, method) for name, method in words.items()}
+        cls._symbol_table = {text: getattr(cls, method) for text, method in symbols.items()}
+        cls._default_word = cls.handler("control_word")
+        cls._default_symbol = cls.handler("control_symbol")
+        cls._kind_table = {
+            Bytestring_Type.GROUP_START: cls.handler("group_start"),
+            Bytestring_Type.GROUP_END: cls.handler("group_end"),
+            Bytestring_Type.PLAIN_TEXT: cls.handler("plain_text"),
+        }
+
+    @classmethod
+    def handler(cls, name: str) -> Optional[Callable]:
+        """
+        Returns the handler `name` of this class, or None if it is a handler of `Renderer` which renders nothing
+        """
+        handler = getattr(cls, name)
+        if name in SILENT_HANDLERS and handler is getattr(Renderer, name):
+            return None
+        return handler
+
+    def control_word(self, item: entities.Control_Word) -> str:
+        return ""
+
+    def control_symbol(self, item: entities.Control_Symbol) -> str:
+        return item.text
+
+    def plain_text(self, item: entities.Plain_Text) -> str:
+        return item.text
+
+    def group_start(self, item: entities.Group) -> str:
+        return ""
+
+    def group_end(self, item: entities.Group) -> str:
+        return ""
+
+    def reset(self) -> None:
+        """
+        Forgets the state of the document rendered before
+        """
+        self.opened = None
+        self.ignored_depth = 0
+
+    def render(self, parsed: entities.Group, file: Union[io.TextIOBase, io.BufferedIOBase]) -> None:
+        """
+        Renders the parsed tree of a document into `file`. Text is written into a binary file encoded as UTF-8.
+        """
+        self.reset()
+        self.render_events(entities.walk(parsed, self.ignore_groups, self.ignore_ignorable_groups), file)
+
+    def render_to_string(self, parsed: entities.Group) -> str:
+        """
+        Returns the rendered parsed tree of a document
+        """
+        self.reset()
+        parts = list()
+        with metrics.measure(self.stats, self.stage_name()) as stage:
+            self.collect(entities.walk(parsed, self.ignore_groups, self.ignore_ignorable_groups), parts)
+            rendered = "".join(parts)
+            stage.bytes += len(rendered)
+        return rendered
+
+    def render_to_bytes(self, parsed: entities.Group, encoding: str = "utf-8") -> bytes:
+        """
+        Returns the rendered parsed tree of a document encoded with `encoding`
+        """
+        return self.render_to_string(parsed).encode(encoding)
+
+    def render_events(self, events: Iterable[entities.Event], file: Union[io.TextIOBase, io.BufferedIOBase]) -> None:
+        """
+        Renders the events of a document as they arrive,
+        e.g. from `Rtf_Parser.iter_events`, without the need for a parsed tree.
+        The events of a document may also be passed in consecutive batches to consecutive calls.
+        The rendered text is written into `file` in large chunks, into a binary file encoded as UTF-8.
+        """
+        if self.stats is None:
+            self.write_events(events, writer(file))
+        else:
+            with self.stats.measure(self.stage_name()) as stage:
+                self.write_events(events, counted(writer(file), stage))
+
+    def write_events(self, events: Iterable[entities.Event], write: Callable[[str], object]) -> None:
+        """
+        Renders `events` and passes the rendered text to `write` in large chunks
+        """
+        parts = list()
+        self.collect(events, parts, write)
+        if parts:
+            write("".join(parts))
+
+    def stage_name(self) -> str:
+        """
+        Returns the name of the stage of rendering in `stats`
+        """
+        return f"render {type(self).__name__}"
+
+    def collect(self, events: Iterable[entities.Event], parts: list[str], write: Optional[Callable[[str], object]] = None) -> None:
+        """
+        Renders `events` by appending the rendered fragments to `parts`.
+        If `write` is given, it is called with the joined fragments, which are then cleared, every `flush_size` fragments.
+        """
+        append = parts.append
+        flush_size = self.flush_size
+        # Read from the class, the handlers are called with `self` explicitly
+        cls = type(self)
+        words = cls._word_table
+        symbols = cls._symbol_table
+        kinds = cls._kind_table
+        default_word = cls._default_word
+        default_symbol = cls._default_symbol
+        ignore_groups = frozenset(self.ignore_groups)
+        ignore_ignorable_groups = self.ignore_ignorable_groups
+        control_word = Bytestring_Type.CONTROL_WORD
+        control_symbol = Bytestring_Type.CONTROL_SYMBOL
+        group_start = Bytestring_Type.GROUP_START
+        group_end = Bytestring_Type.GROUP_END
+        # A group is ignored by its name, which is known only after its first event has arrived
+        opened = self.opened
+        ignored_depth = self.ignored_depth
+        for kind, item in events:
+            if opened is not None:
+                if opened.name in ignore_groups or (ignore_ignorable_groups and opened.ignorable):
+                    ignored_depth = 1
+                opened = None
+            if ignored_depth:
+                if kind is group_start:
+                    ignored_depth += 1
+                    continue
+                elif kind is group_end:
+                    ignored_depth -= 1
+                # Only the end of the ignored group itself is rendered
+                if ignored_depth:
+                    continue
+            if kind is control_word:
+                handler = words.get(item.control_name, default_word)
+            elif kind is control_symbol:
+                handler = symbols.get(item.text, default_symbol)
+            else:
+                if kind is group_start:
+                    opened = item
+                handler = kinds[kind]
+            if handler is not None:
+                text = handler(self, item)
+                if text:
+                    append(text)
+                    if write is not None and len(parts) >= flush_size:
+                        write("".join(parts))
+                        parts.clear()
+        self.opened = opened
+        self.ignored_depth = ignored_depth
+
+
+Renderer.compile_dispatch_tables()
+
+
+def writer(file: Union[io.TextIOBase, io.BufferedIOBase]) -> Callable[[str], object]:
+    """
+    Returns a function writing text into `file`, encoded as UTF-8 if `file` is a binary file
+    """
+    if isinstance(file, (io.RawIOBase, io.BufferedIOBase)):
+        write = file.write
+        return lambda text: write(text.encode("utf-8"))
+    return file.write
+
+
+def counted(write: Callable[[str], object], stage: metrics.Stage_Stats) -> Callable[[str], object]:
+    """
+    Returns a function calling `write` and adding the bytes (or characters of a text file) written to `stage`
+    """
+
+    def write_counted(text: str) -> object:
+        written = write(text)
+        stage.bytes += len(text) if written is None else written
+        return written
+
+    return write_counted
 
 
 if __name__ == "__main__":
@@ -1,10 +1,10 @@
 #!/usr/bin/env python
 
 
-import io
 import logging
+from typing import Optional
 
-from rtfparse import entities, utils
+from rtfparse import entities, metrics, utils
 from rtfparse.renderers import Renderer
 
 # Setup logging
@@ -12,13 +12,30 @@ logger = logging.getLogger(__name__)
 
 
 class HTML_Decapsulator(Renderer):
-    def __init__(self) -> None:
-        super().__init__()
+    control_words = {"par": "newline", "line": "newline", "tab": "tab", "fromhtml": "check_fromhtml", "htmlrtf": "ignore_rtf_toggle"}
+    control_symbols = {
+        # Obsolete formula character used by Word 5.1 for Macintosh
+        "|": "nothing",
+        # Non-breaking space
+        "~": "nonbreaking_space",
+        # Optional hyphen
+        "-": "nothing",
+        # Non-breaking hyphen
+        "_": "nonbreaking_hyphen",
+        # Subentry in an index entry
+        ":": "nothing",
+        # Ignorable outside of Group
+        "*": "ignorable",
+    }
+    ignore_groups = ("fonttbl", "colortbl", "generator", "formatConverter", "pntext", "pntxta", "pntxtb")
+
+    def __init__(self, stats: Optional[metrics.Parse_Stats] = None) -> None:
+        super().__init__(stats)
+        self.ignore_rtf = False
+
+    def reset(self) -> None:
+        super().reset()
         self.ignore_rtf = False
-        self.render_word_func = dict(
-            (("par", self.newline), ("line", self.newline), ("tab", self.tab), ("fromhtml", self.check_fromhtml), ("htmlrtf", self.ignore_rtf_toggle))
-        )
-        self.ignore_groups = ("fonttbl", "colortbl", "generator", "formatConverter", "pntext", "pntxta", "pntxtb")
 
     def ignore_rtf_toggle(self, cw: entities.Control_Word) -> str:
         if cw.parameter == "" or cw.parameter == 1:
@@ -47,47 +64,34 @@ class HTML_Decapsulator(Renderer):
         else:
             return "\t"
 
-    def render_symbol(self, item: entities.Control_Symbol, file: io.TextIOWrapper) -> None:
+    def nothing(self, item: entities.Control_Symbol) -> str:
+        return ""
+
+    def nonbreaking_space(self, item: entities.Control_Symbol) -> str:
+        if self.ignore_rtf:
+            return ""
+        return "\u00a0"
+
+    def nonbreaking_hyphen(self, item: entities.Control_Symbol) -> str:
+        if self.ignore_rtf:
+            return ""
+        return "\u2011"
+
+    def ignorable(self, item: entities.Control_Symbol) -> str:
         if not self.ignore_rtf:
-            # Obsolete formula character used by Word 5.1 for Macintosh
-            if item.text == "|":
-                pass
-            # Non-breaking space
-            elif item.text == "~":
-                file.write("\u00a0")
-            # Optional hyphen
-            elif item.text == "-":
-                pass
-            # Non-breaking hyphen
-            elif item.text == "_":
-                file.write("\u2011")
-            # Subentry in an index entry
-            elif item.text == ":":
-                pass
-            # Ignorable outside of Group
-            elif item.text == "*":
-                logger.warning(utils.warn("Found an IGNORABLE control symbol which is not a group start!"))
-            # Probably any symbol converted from a hex code: \'hh
-            else:
-                file.write(item.text)
-
-    def render(self, parsed: entities.Group, file: io.TextIOWrapper) -> None:
-        for item in parsed.structure:
-            if isinstance(item, entities.Group):
-                if item.name not in self.ignore_groups:
-                    self.render(item, file)
-            elif isinstance(item, entities.Control_Word):
-                try:
-                    file.write(self.render_word_func[item.control_name](item))
-                except KeyError:
-                    pass
-            elif isinstance(item, entities.Control_Symbol):
-                self.render_symbol(item, file)
-            elif isinstance(item, entities.Plain_Text):
-                if not self.ignore_rtf:
-                    file.write(item.text)
-            else:
-                pass
+            logger.warning(utils.warn("Found an IGNORABLE control symbol which is not a group start!"))
+        return ""
+
+    def control_symbol(self, item: entities.Control_Symbol) -> str:
+        # Probably any symbol converted from a hex code: \'hh
+        if self.ignore_rtf:
+            return ""
+        return item.text
+
+    def plain_text(self, item: entities.Plain_Text) -> str:
+        if self.ignore_rtf:
+            return ""
+        return item.text
 
 
 if __name__ == "__main__":
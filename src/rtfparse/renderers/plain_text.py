@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+
+
+import logging
+from typing import Optional
+
+from rtfparse import entities, metrics
+from rtfparse.renderers import Renderer
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+# Control words which stand for a single character
+SPECIAL_CHARACTERS = {
+    "emdash": "\u2014",
+    "endash": "\u2013",
+    "emspace": "\u2003",
+    "enspace": "\u2002",
+    "qmspace": "\u2005",
+    "bullet": "\u2022",
+    "lquote": "\u2018",
+    "rquote": "\u2019",
+    "ldblquote": "\u201c",
+    "rdblquote": "\u201d",
+    "zwj": "\u200d",
+    "zwnj": "\u200c",
+    "ltrmark": "\u200e",
+    "rtlmark": "\u200f",
+}
+
+
+class Plain_Text_Renderer(Renderer):
+    """
+    Renders the visible text of any RTF document.
+
+    Destinations which hold no visible text (tables of fonts, colors and styles, document information, pictures,
+    field instructions, ...) and all ignorable groups (`{\\*...}`) are not rendered.
+    Neither is hidden text (`\\v`). Paragraphs, lines, rows and pages end with a newline, tabs and table cells with a tab.
+    `\\uN` characters and `\\'hh` escapes are rendered as the characters they stand for.
+    """
+
+    control_words = {
+        "par": "newline",
+        "line": "newline",
+        "row": "newline",
+        "nestrow": "newline",
+        "page": "newline",
+        "sect": "newline",
+        "tab": "tab",
+        "cell": "tab",
+        "nestcell": "tab",
+        "v": "hidden_text",
+        "plain": "plain",
+        **{name: "special_character" for name in SPECIAL_CHARACTERS},
+    }
+    control_symbols = {
+        # Paragraph mark: a backslash before a line break
+        "\r": "newline",
+        "\n": "newline",
+        # Obsolete formula character used by Word 5.1 for Macintosh
+        "|": "nothing",
+        # Non-breaking space
+        "~": "nonbreaking_space",
+        # Optional hyphen
+        "-": "nothing",
+        # Non-breaking hyphen
+        "_": "nonbreaking_hyphen",
+        # Subentry in an index entry
+        ":": "nothing",
+        # Ignorable outside of Group
+        "*": "nothing",
+    }
+    ignore_groups = (
+        "fonttbl",
+        "colortbl",
+        "stylesheet",
+        "listtable",
+        "listoverridetable",
+        "revtbl",
+        "rsidtbl",
+        "filetbl",
+        "info",
+        "pict",
+        "nonshppict",
+        "objdata",
+        "objclass",
+        "objname",
+        "fldinst",
+        "sp",
+        "xe",
+        "tc",
+        "pntxta",
+        "pntxtb",
+        "generator",
+        "themedata",
+        "colorschememapping",
+        "datastore",
+        "latentstyles",
+        "xmlnstbl",
+    )
+    ignore_ignorable_groups = True
+
+    def __init__(self, stats: Optional[metrics.Parse_Stats] = None) -> None:
+        super().__init__(stats)
+        self.hidden = False
+        self.hidden_stack = list()
+
+    def reset(self) -> None:
+        super().reset()
+        self.hidden = False
+        self.hidden_stack.clear()
+
+    def group_start(self, item: entities.Group) -> str:
+        # Character formatting like hidden text ends with the group
+        self.hidden_stack.append(self.hidden)
+        return ""
+
+    def group_end(self, item: entities.Group) -> str:
+        if self.hidden_stack:
+            self.hidden = self.hidden_stack.pop()
+        return ""
+
+    def hidden_text(self, cw: entities.Control_Word) -> str:
+        self.hidden = cw.parameter != 0
+        return ""
+
+    def plain(self, cw: entities.Control_Word) -> str:
+        self.hidden = False
+        return ""
+
+    def newline(self, item: entities.Entity) -> str:
+        if self.hidden:
+            return ""
+        return "\n"
+
+    def tab(self, cw: entities.Control_Word) -> str:
+        if self.hidden:
+            return ""
+        return "\t"
+
+    def special_character(self, cw: entities.Control_Word) -> str:
+        if self.hidden:
+            return ""
+        return SPECIAL_CHARACTERS[cw.control_name]
+
+    def nothing(self, item: entities.Control_Symbol) -> str:
+        return ""
+
+    def nonbreaking_space(self, item: entities.Control_Symbol) -> str:
+        if self.hidden:
+            return ""
+        return "\u00a0"
+
+    def nonbreaking_hyphen(self, item: entities.Control_Symbol) -> str:
+        if self.hidden:
+            return ""
+        return "\u2011"
+
+    def control_symbol(self, item: entities.Control_Symbol) -> str:
+        # `\'hh` escapes and escaped characters like `\{`
+        if self.hidden:
+            return ""
+        return item.text
+
+    def plain_text(self, item: entities.Plain_Text) -> str:
+        if self.hidden:
+            return ""
+        return item.text
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+
+
+"""
+Compact binary format of parsed RTF documents.
+
+A parsed tree is saved as the stream of its events (see `entities.walk`), column by column:
+the kinds of the events as bytes and three integer columns holding positions and indices into a table of values.
+The values (names of control words and groups, parameters, texts) are stored once each,
+strings as one UTF-8 blob, integers as an array. Binary data of control words is stored as it is.
+
+All sections are aligned arrays read with `memoryview.cast`, so a memory-mapped file is loaded without copying the columns,
+and binary data keeps referencing the mapped file.
+
+Layout (all integers little-endian):
+
+    header      magic, format version, typecode of the integer columns, number of events, section offsets and lengths
+    sections    string offsets, string blob, integer values, kinds, columns a, b and c, payload rows, payload blob
+
+The columns of each kind of event:
+
+    event           a                   b                       c
+    group start     start position      index of the name       flags: known 1, ignorable 2
+    group end       end position        0                       0
+    control word    start position      index of the name       index of the parameter
+    control symbol  start position      index of the text       index of the hex digits
+    plain text      start position      end position            index of the text
+"""
+
+import array
+import io
+import itertools
+import logging
+import pathlib
+import struct
+import sys
+from typing import BinaryIO, Iterator, Union
+
+# Own modules
+from rtfparse import entities, utils
+from rtfparse.enums import Bytestring_Type
+from rtfparse.parser import map_file
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+MAGIC = b"RTFP"
+FORMAT_VERSION = 1
+SECTIONS = ("string_offsets", "strings", "integers", "kinds", "a", "b", "c", "payload_rows", "payload_blob")
+HEADER = struct.Struct("<4sBcxxQ" + "QQ" * len(SECTIONS))
+ALIGNMENT = 8
+# Kinds of events by their number in the format, and the other way round
+KINDS = (
+    Bytestring_Type.GROUP_START,
+    Bytestring_Type.GROUP_END,
+    Bytestring_Type.CONTROL_WORD,
+    Bytestring_Type.CONTROL_SYMBOL,
+    Bytestring_Type.PLAIN_TEXT,
+)
+KIND_NUMBERS = {kind: number for number, kind in enumerate(KINDS)}
+
+
+class Format_Error(ValueError):
+    """
+    The data is not a parsed document in a format this version of rtfparse can read
+    """
+
+
+def to_little_endian(column: array.array) -> bytes:
+    if sys.byteorder == "big":
+        column = array.array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+class Values:
+    """
+    Table of the distinct strings and integers of a document, each gets an index
+    """
+
+    def __init__(self) -> None:
+        self.strings = dict()
+        self.integers = dict()
+
+    def index(self, value: Union[str, int]) -> int:
+        # Strings come first, integers are numbered after all the strings once the table is complete
+        if value.__class__ is str:
+            return self.strings.setdefault(value, len(self.strings))
+        return ~self.integers.setdefault(value, len(self.integers))
+
+    def resolve(self, index: int) -> int:
+        return len(self.strings) + ~index if index < 0 else index
+
+
+def dumps(parsed: entities.Group) -> bytes:
+    """
+    Returns the parsed tree of a document in the binary format
+    """
+    output = io.BytesIO()
+    dump(parsed, output)
+    return output.getvalue()
+
+
+def dump(parsed: entities.Group, file: BinaryIO) -> None:
+    """
+    Writes the parsed tree of a document in the binary format into `file`
+    """
+    values = Values()
+    index = values.index
+    kinds = bytearray()
+    column_a = list()
+    column_b = list()
+    column_c = list()
+    payloads = list()
+    group_start = Bytestring_Type.GROUP_START
+    group_end = Bytestring_Type.GROUP_END
+    control_word = Bytestring_Type.CONTROL_WORD
+    control_symbol = Bytestring_Type.CONTROL_SYMBOL
+    # The events of the root group itself are not walked
+    events = itertools.chain(((group_start, parsed),), entities.walk(parsed), ((group_end, parsed),))
+    for kind, item in events:
+        kinds.append(KIND_NUMBERS[kind])
+        if kind is group_start:
+            column_a.append(item.start_position)
+            column_b.append(index(item.name))
+            column_c.append(bool(item.known) | bool(item.ignorable) << 1)
+        elif kind is group_end:
+            column_a.append(item.end_position)
+            column_b.append(0)
+            column_c.append(0)
+        elif kind is control_word:
+            column_a.append(item.start_position)
+            column_b.append(index(item.control_name))
+            column_c.append(index(item.parameter))
+            if item.payload is not None:
+                payloads.append((len(kinds) - 1, item.payload))
+        elif kind is control_symbol:
+            column_a.append(item.start_position)
+            column_b.append(index(item.text))
+            column_c.append(index(item.char))
+        else:
+            column_a.append(item.start_position)
+            column_b.append(item.end_position)
+            column_c.append(index(item.text))
+    resolve = values.resolve
+    column_b = [resolve(value) if kind in (0, 2, 3) else value for kind, value in zip(kinds, column_b)]
+    column_c = [resolve(value) if kind in (2, 3, 4) else value for kind, value in zip(kinds, column_c)]
+    encoded = [string.encode("utf-8", errors="surrogatepass") for string in values.strings]
+    string_offsets = array.array("Q", [0])
+    for string in encoded:
+        string_offsets.append(string_offsets[-1] + len(string))
+    payload_blob = bytearray()
+    payload_rows = array.array("Q")
+    for event, payload in payloads:
+        payload_rows.extend((event, len(payload_blob), payload.length, payload.hex_encoded))
+        payload_blob += payload.raw
+    largest = max(max(column, default=0) for column in (column_a, column_b, column_c))
+    typecode = "I" if largest < 2**32 else "Q"
+    sections = (
+        to_little_endian(string_offsets),
+        b"".join(encoded),
+        to_little_endian(array.array("q", values.integers)),
+        bytes(kinds),
+        to_little_endian(array.array(typecode, column_a)),
+        to_little_endian(array.array(typecode, column_b)),
+        to_little_endian(array.array(typecode, column_c)),
+        to_little_endian(payload_rows),
+        bytes(payload_blob),
+    )
+    # Sections start at multiples of ALIGNMENT, the encoding of the document is stored right after the header
+    encoding = (parsed.encoding or "").encode("ascii")
+    position = aligned(HEADER.size + 1 + len(encoding))
+    table = list()
+    for section in sections:
+        table.extend((position, len(section)))
+        position = aligned(position + len(section))
+    file.write(HEADER.pack(MAGIC, FORMAT_VERSION, typecode.encode("ascii"), len(kinds), *table))
+    file.write(bytes((len(encoding),)) + encoding)
+    written = HEADER.size + 1 + len(encoding)
+    for offset, section in zip(table[::2], sections):
+        file.write(bytes(offset - written))
+        file.write(section)
+        written = offset + len(section)
+    logger.debug(f"Dumped {len(kinds)} events with {len(values.strings) + len(values.integers)} distinct values")
+
+
+def aligned(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+def read_columns(data: utils.Buffer) -> tuple:
+    """
+    Returns the encoding, the columns, the values and the payloads of the parsed document saved in `data`
+    """
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise Format_Error("Too short for a parsed document")
+    magic, version, typecode, count, *table = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise Format_Error("Not a parsed document")
+    if version != FORMAT_VERSION:
+        raise Format_Error(f"Format version {version} is not supported, only version {FORMAT_VERSION}")
+    typecode = typecode.decode("ascii")
+    encoding_length = view[HEADER.size]
+    encoding = str(view[HEADER.size + 1 : HEADER.size + 1 + encoding_length], "ascii") or None
+    sections = dict()
+    for name, offset, length in zip(SECTIONS, table[::2], table[1::2]):
+        if offset + length > len(view):
+            raise Format_Error(f"Section {name} reaches beyond the end of the data")
+        sections[name] = view[offset : offset + length]
+
+    def column(name: str, code: str) -> Union[memoryview, array.array]:
+        section = sections[name]
+        if sys.byteorder == "big":
+            swapped = array.array(code, section.tobytes())
+            swapped.byteswap()
+            return swapped
+        return section.cast(code)
+
+    string_offsets = column("string_offsets", "Q")
+    strings = sections["strings"]
+    values = [
+        str(strings[string_offsets[number] : string_offsets[number + 1]], "utf-8", "surrogatepass") for number in range(len(string_offsets) - 1)
+    ]
+    values.extend(column("integers", "q"))
+    payloads = dict()
+    rows = column("payload_rows", "Q")
+    blob_offset = table[2 * SECTIONS.index("payload_blob")]
+    for row in range(0, len(rows), 4):
+        event, offset, length, hex_encoded = rows[row : row + 4]
+        payloads[event] = entities.Payload(data, blob_offset + offset, blob_offset + offset + length, bool(hex_encoded))
+    return encoding, sections["kinds"], column("a", typecode), column("b", typecode), column("c", typecode), values, payloads
+
+
+def iter_events(data: utils.Buffer) -> Iterator[entities.Event]:
+    """
+    Yields the events of the parsed document saved in `data` in the binary format, e.g. to render it with `Renderer.render_events`
+    """
+    yield from events_of(*read_columns(data))
+
+
+def events_of(encoding: str, kinds: memoryview, column_a, column_b, column_c, values: list, payloads: dict) -> Iterator[entities.Event]:
+    """
+    Creates the entities of the events from the columns
+    """
+    new_event = tuple.__new__
+    new_entity = object.__new__
+    event = entities.Event
+    group_class = entities.Group
+    control_word_class = entities.Control_Word
+    control_symbol_class = entities.Control_Symbol
+    plain_text_class = entities.Plain_Text
+    start_kind, end_kind, word_kind, symbol_kind, text_kind = KINDS
+    stack = list()
+    group = None
+    for number, (kind, a, b, c) in enumerate(zip(kinds, column_a, column_b, column_c)):
+        if kind == 4:
+            item = new_entity(plain_text_class)
+            item.encoding = encoding
+            item.start_position = a
+            item.end_position = b
+            item._source = None
+            item._text = values[c]
+            yield new_event(event, (text_kind, item))
+        elif kind == 2:
+            item = new_entity(control_word_class)
+            item.encoding = encoding
+            item.start_position = a
+            item.control_name = values[b]
+            item.parameter = values[c]
+            item.payload = payloads.get(number)
+            yield new_event(event, (word_kind, item))
+        elif kind == 3:
+            item = new_entity(control_symbol_class)
+            item.encoding = encoding
+            item.start_position = a
+            item.text = values[b]
+            item.char = values[c]
+            yield new_event(event, (symbol_kind, item))
+        elif kind == 0:
+            if group is not None:
+                stack.append(group)
+            group = group_class(encoding)
+            group.start_position = a
+            group.name = values[b]
+            group.known = bool(c & 1)
+            group.ignorable = bool(c & 2)
+            yield new_event(event, (start_kind, group))
+        elif kind == 1:
+            if group is None:
+                raise Format_Error("Found the end of a group which has not started")
+            group.end_position = a
+            yield new_event(event, (end_kind, group))
+            group = stack.pop() if stack else None
+        else:
+            raise Format_Error(f"Unknown kind of event {kind}")
+
+
+def tree_of(encoding: str, kinds: memoryview, column_a, column_b, column_c, values: list, payloads: dict) -> entities.Group:
+    """
+    Creates the entities of the events from the columns and builds them into the tree right away,
+    which takes about half the time of building it from the events
+    """
+    new_entity = object.__new__
+    group_class = entities.Group
+    control_word_class = entities.Control_Word
+    control_symbol_class = entities.Control_Symbol
+    plain_text_class = entities.Plain_Text
+    stack = list()
+    root = group = None
+
+    def outside(item: entities.Entity) -> None:
+        raise Format_Error("Found an entity before the start of the document")
+
+    # Entities go into the innermost open group, there is none before the start of the document
+    append = outside
+    for number, (kind, a, b, c) in enumerate(zip(kinds, column_a, column_b, column_c)):
+        if kind == 4:
+            item = new_entity(plain_text_class)
+            item.encoding = encoding
+            item.start_position = a
+            item.end_position = b
+            item._source = None
+            item._text = values[c]
+            append(item)
+        elif kind == 2:
+            item = new_entity(control_word_class)
+            item.encoding = encoding
+            item.start_position = a
+            item.control_name = values[b]
+            item.parameter = values[c]
+            item.payload = payloads.get(number)
+            append(item)
+        elif kind == 3:
+            item = new_entity(control_symbol_class)
+            item.encoding = encoding
+            item.start_position = a
+            item.text = values[b]
+            item.char = values[c]
+            append(item)
+        elif kind == 0:
+            item = group_class(encoding)
+            item.start_position = a
+            item.name = values[b]
+            item.known = bool(c & 1)
+            item.ignorable = bool(c & 2)
+            if group is None:
+                root = item
+            else:
+                append(item)
+                stack.append(group)
+            group = item
+            append = group.structure.append
+        elif kind == 1:
+            if group is None:
+                raise Format_Error("Found the end of a group which has not started")
+            group.end_position = a
+            if not stack:
+                break
+            group = stack.pop()
+            append = group.structure.append
+        else:
+            raise Format_Error(f"Unknown kind of event {kind}")
+    return entities.Group(None) if root is None else root
+
+
+def loads(data: utils.Buffer) -> entities.Group:
+    """
+    Returns the parsed tree saved in `data` in the binary format.
+    Binary data of control words keeps referencing `data`.
+    """
+    return tree_of(*read_columns(data))
+
+
+def load(source: Union[pathlib.Path, BinaryIO]) -> entities.Group:
+    """
+    Returns the parsed tree saved in the binary format in the file `source`, which is memory-mapped rather than read
+    """
+    if isinstance(source, (str, pathlib.Path)):
+        with open(source, mode="rb") as file:
+            return loads(map_file(file))
+    return loads(map_file(source))
+
+
+if __name__ == "__main__":
+    pass
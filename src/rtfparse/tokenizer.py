@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+
+
+"""
+Single-pass tokenizer of RTF documents.
+
+The tokenizer scans an in-memory buffer exactly once, advancing an offset.
+It never reads from or seeks in a file. Each token records its kind,
+its span in the buffer, and (for control words and symbols) its name and parameter.
+The entities of the `entities` module are built from these tokens.
+"""
+
+import logging
+from typing import Callable, Iterator, NamedTuple, Optional, Union
+
+# Own modules
+from rtfparse import re_patterns, utils
+from rtfparse.enums import Bytestring_Type
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+# Constants
+INTEGER_MAGNITUDE = 32  # As specified in RTF Spec
+
+
+class Token(NamedTuple):
+    """
+    A lexical unit of RTF.
+
+    `start` and `end` delimit the token in the scanned buffer.
+    For plain text, `name` is "" as the text is decoded from the buffer, except for a run of `\\uN` characters
+    which has its decoded text as `name`. Plain text wrapped over line breaks is one token with the `parameter` True,
+    the line breaks are not part of its text.
+    For control words, `name` is the control word's name and `parameter` its integer parameter (or "" if it has none).
+    For control symbols, `name` is the symbol's text, for a run of escaped `\\'hh` characters `'`
+    with the hex digits of all the characters as `parameter` (which is "" for other symbols).
+    A group start has the `parameter` True if the group is ignorable (`{\\*`).
+    """
+
+    kind: Bytestring_Type
+    start: int
+    end: int
+    name: str = ""
+    parameter: Union[int, str, bool] = ""
+
+    @property
+    def span(self) -> tuple[int, int]:
+        return self.start, self.end
+
+
+def bin_length(parameter: Union[int, str], available: Optional[int] = None) -> int:
+    """
+    Returns the number of bytes of binary data following a `\\binN` control word,
+    never less than 0 and never more than `available`, the number of bytes after the control word, if it is known.
+    A parameter out of the range of 32 bits is not wrapped around, it only makes the data as long as possible.
+    """
+    if parameter == "":
+        return 0
+    try:
+        length = utils.twos_complement(int(parameter), INTEGER_MAGNITUDE)
+    except ValueError:
+        length = int(parameter)
+    length = max(length, 0)
+    if available is not None:
+        length = min(length, max(available, 0))
+    return length
+
+
+def decode_hex(hex_digits: str, encoding: str) -> str:
+    """
+    Decodes the characters of a run of escaped `\\'hh` control symbols from their hex digits at once,
+    so the characters of multibyte code pages spanning several escapes are decoded whole
+    """
+    try:
+        code = bytes.fromhex(hex_digits)
+    except ValueError:
+        logger.warning(utils.warn(f"Found an escaped character with invalid hex digits {hex_digits!r}"))
+        return ""
+    try:
+        return code.decode(encoding)
+    except UnicodeDecodeError:
+        logger.warning(utils.warn(f"Cannot decode escaped characters {hex_digits!r} with {encoding}"))
+        return code.decode(encoding, errors="replace")
+
+
+def hex_digits_of(raw: bytes) -> str:
+    """
+    Returns the hex digits of the `hdigits` group of a matched run of escaped characters
+    """
+    if len(raw) > 2:
+        raw = raw.replace(b"\\'", b"").replace(b"\r", b"").replace(b"\n", b"")
+    return raw.decode("latin-1")
+
+
+def decode_unicode(units: list[int]) -> str:
+    """
+    Decodes the UTF-16 code units of a run of `\\uN` characters, joining surrogate pairs.
+    Unpaired surrogates are replaced with U+FFFD.
+    """
+    text = "".join(map(chr, units))
+    for unit in units:
+        if 0xD800 <= unit < 0xE000:
+            return text.encode("utf-16-le", errors="surrogatepass").decode("utf-16-le", errors="replace")
+    return text
+
+
+def read_unicode(data: utils.Buffer, position: int, parameter: int, fallbacks: int) -> tuple[int, str]:
+    """
+    Reads the run of `\\uN` characters whose first one has the `parameter` and ends at `position`,
+    skipping the `fallbacks` fallback characters after each of them.
+    Returns the position after the run and its text.
+    """
+    skip_fallback = re_patterns.fallback.match
+    next_unicode = re_patterns.unicode.match
+    # Negative parameters are the upper half of the 16 bit code units
+    units = [parameter % 0x10000]
+    while True:
+        for _ in range(fallbacks):
+            found = skip_fallback(data, position)
+            if found is None:
+                break
+            position = found.end()
+        found = next_unicode(data, position)
+        if found is None:
+            return position, decode_unicode(units)
+        units.append(int(found.group("unicode")) % 0x10000)
+        position = found.end()
+
+
+def skip_group(data: utils.Buffer, position: int, ends: Optional[dict[int, int]] = None) -> int:
+    """
+    Returns the position of the brace which ends the group starting at `position`,
+    or the length of `data` if the group does not end.
+    Only braces, escapes and binary data are looked at, everything else is skipped over.
+    If `ends` is given, the end (after the closing brace) of this group and of every group nested in it is recorded there
+    by the position of its opening brace, so the nested groups need not be scanned again.
+    """
+    match = re_patterns.group_scan.match
+    depth = 0
+    starts = list()
+    while found := match(data, position):
+        kind = found.lastgroup
+        position = found.end()
+        if kind == "group_start":
+            depth += 1
+            if ends is not None:
+                starts.append(position - 1)
+        elif kind == "group_end":
+            depth -= 1
+            if ends is not None:
+                ends[starts.pop()] = position
+            if not depth:
+                return position - 1
+        elif kind == "parameter":
+            position += bin_length(found.group("parameter"), len(data) - position)
+    if ends is not None:
+        # Groups which do not end, end with the data
+        for start in starts:
+            ends[start] = len(data)
+    return len(data)
+
+
+def tokenize(
+    data: utils.Buffer,
+    encoding: str,
+    position: int = 0,
+    skip: frozenset[str] = frozenset(),
+    lazy: bool = False,
+    uc: Optional[list[int]] = None,
+    ends: Optional[dict[int, int]] = None,
+) -> Iterator[Token]:
+    """
+    Yields the tokens of `data` starting at `position`.
+    Every token is classified and consumed by a single match of `re_patterns.token`.
+    Newlines between tokens and stray backslashes are skipped, newlines within plain text are skipped when it is decoded,
+    the iteration ends at the end of `data`.
+    Groups named by their first control word in `skip`, or all groups if `lazy` is True,
+    are not tokenized but yielded as a single SKIPPED_GROUP token spanning the whole group.
+    A run of `\\uN` characters is yielded as a PLAIN_TEXT token with the decoded text as its `name`,
+    their fallback characters are skipped.
+    `uc` is the stack of the `\\ucN` counts of fallback characters of the open groups, the last one is in effect.
+    A token changes it only after it has been yielded, so a caller passing its own stack
+    reads the counts in effect at the start of the token it has got.
+    `ends` are the ends of groups recorded by `skip_group`, skipped groups found there are not scanned again,
+    the ends of the groups scanned are added to it.
+    """
+    match = re_patterns.token.match
+    new_token = tuple.__new__
+    # Control word names repeat a lot, share one string per name
+    names = dict()
+    size = len(data)
+    if uc is None:
+        uc = [1]
+    while position < size:
+        found = match(data, position)
+        kind = found.lastgroup
+        end = found.end()
+        if kind == "text":
+            yield new_token(Token, (Bytestring_Type.PLAIN_TEXT, position, end, "", ""))
+        elif kind == "wrapped_text":
+            yield new_token(Token, (Bytestring_Type.PLAIN_TEXT, position, end, "", True))
+        elif kind == "control_word":
+            raw_name = found.group("control_name")
+            try:
+                name = names[raw_name]
+            except KeyError:
+                name = names[raw_name] = raw_name.decode("ascii")
+            parameter = found.group("parameter")
+            parameter = "" if parameter is None else int(parameter)
+            if name == "u" and parameter != "":
+                end, text = read_unicode(data, end, parameter, uc[-1])
+                yield new_token(Token, (Bytestring_Type.PLAIN_TEXT, position, end, text, ""))
+                position = end
+                continue
+            yield new_token(Token, (Bytestring_Type.CONTROL_WORD, position, end, name, parameter))
+            if name == "bin":
+                end += bin_length(parameter, size - end)
+            elif name == "uc" and parameter != "":
+                uc[-1] = max(parameter, 0)
+        elif kind == "group_start":
+            ignorable = end - position > 1
+            if lazy or skip:
+                name = ""
+                peek = match(data, end)
+                while peek is not None and peek.lastgroup == "newline":
+                    peek = match(data, peek.end())
+                if peek is not None and peek.lastgroup == "control_word":
+                    name = peek.group("control_name").decode("ascii")
+                if lazy or name in skip:
+                    if ends is not None and position in ends:
+                        end = ends[position]
+                    else:
+                        end = min(skip_group(data, position, ends) + 1, size)
+                    yield new_token(Token, (Bytestring_Type.SKIPPED_GROUP, position, end, name, ignorable))
+                    position = end
+                    continue
+            yield new_token(Token, (Bytestring_Type.GROUP_START, position, end, "", ignorable))
+            # A group inherits the count of fallback characters
+            uc.append(uc[-1])
+        elif kind == "group_end":
+            yield new_token(Token, (Bytestring_Type.GROUP_END, position, end, "", ""))
+            if len(uc) > 1:
+                uc.pop()
+        elif kind == "symbol":
+            yield new_token(Token, (Bytestring_Type.CONTROL_SYMBOL, position, end, chr(data[position + 1]), ""))
+        elif kind == "hex":
+            yield new_token(Token, (Bytestring_Type.CONTROL_SYMBOL, position, end, "'", hex_digits_of(found.group("hdigits"))))
+        position = end
+
+
+def traced(tokens: Iterator[Token], trace: Callable[[Token], None]) -> Iterator[Token]:
+    """
+    Passes each of the `tokens` to the `trace` hook before yielding it
+    """
+    for token in tokens:
+        trace(token)
+        yield token
+
+
+def log_token(token: Token) -> None:
+    """
+    A trace hook which logs every token at DEBUG level
+    """
+    logger.debug(f"{token.kind.name:<14} {token.start:>10}-{token.end:<10} {token.name!r} {token.parameter!r}")
+
+
+if __name__ == "__main__":
+    pass
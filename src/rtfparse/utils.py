@@ -3,6 +3,7 @@
 
 import io
 import logging
+import mmap
 import pathlib
 
 # Typing
@@ -12,6 +13,10 @@ from typing import Union
 logger = logging.getLogger(__name__)
 
 
+# Anything the parser can scan without copying it
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
 program_name = home_dir_name = "rtfparse"
 dir_name = "".join((".", program_name))
 configuration_file_name = f"{program_name}_configuration.ini"
@@ -46,11 +51,13 @@ def warn(s: str) -> str:
     return " ".join(("◊", s))
 
 
-def what_is_being_parsed(file: Union[io.BufferedReader, io.BytesIO]) -> str:
+def what_is_being_parsed(file: Union[io.BufferedReader, io.BytesIO, Buffer]) -> str:
     if isinstance(file, io.BufferedReader):
         return file.name
     elif isinstance(file, io.BytesIO):
         return repr(file)
+    elif isinstance(file, (bytes, bytearray, memoryview, mmap.mmap)):
+        return f"<{type(file).__name__} of {len(file)} bytes>"
 
 
 def twos_complement(val, nbits):
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+
+import asyncio
+import io
+
+from rtfparse import aio
+from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers.html_decapsulator import HTML_Decapsulator
+
+DOCUMENT = rb"{\rtf1\ansi\ansicpg1252\fromhtml1 {\*\htmltag1 <p>}Caf\'e9 \htmlrtf {\b bold}\htmlrtf0  text\par}"
+# Ends while RTF is ignored, the renderer is left in that state
+UNFINISHED = rb"{\rtf1\ansi\fromhtml1 {\*\htmltag1 <p>}\htmlrtf text}"
+
+
+class Collector:
+    def __init__(self) -> None:
+        self.parts = list()
+
+    async def write(self, text: str) -> None:
+        self.parts.append(text)
+
+
+async def chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+def decapsulate(data: bytes, renderer: HTML_Decapsulator) -> str:
+    collector = Collector()
+    asyncio.run(aio.decapsulate(chunks(data, 7), collector, renderer=renderer, step=5))
+    return "".join(collector.parts)
+
+
+def test_decapsulate_like_parser() -> None:
+    expected = io.StringIO()
+    HTML_Decapsulator().render(Rtf_Parser(rtf_buffer=DOCUMENT).parse_file(), expected)
+    assert decapsulate(DOCUMENT, HTML_Decapsulator()) == expected.getvalue() == "<p>Caf\u00e9  text\n"
+
+
+def test_renderer_is_reset() -> None:
+    renderer = HTML_Decapsulator()
+    decapsulate(UNFINISHED, renderer)
+    assert renderer.ignore_rtf
+    assert decapsulate(DOCUMENT, renderer) == decapsulate(DOCUMENT, HTML_Decapsulator())
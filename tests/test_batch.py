@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+
+
+import multiprocessing
+import os
+import pathlib
+
+import pytest
+
+from rtfparse import batch
+
+DOCUMENT = rb"{\rtf1\ansi\fromhtml1 {\*\htmltag1 <p>}text\par}"
+
+
+CRASHING = "document_1.rtf"
+convert = batch.convert
+
+
+def crashing(source: pathlib.Path, *args) -> batch.Job_Result:
+    if source.name == CRASHING:
+        # Like a worker killed for running out of memory or crashed in an extension module
+        os._exit(1)
+    return convert(source, *args)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="the workers must inherit the crashing conversion")
+def test_crashed_worker_fails_only_its_file(tmp_path, monkeypatch) -> None:
+    sources = list()
+    for number in range(40):
+        sources.append(tmp_path / f"document_{number}.rtf")
+        sources[-1].write_bytes(DOCUMENT)
+    monkeypatch.setattr(batch, "convert", crashing)
+    stats = batch.run_batch(sources, tmp_path / "html", workers=2)
+    assert (stats.converted, stats.failed) == (39, 1)
+    converted = sorted(path.name for path in (tmp_path / "html").iterdir())
+    assert converted == sorted(f"document_{number}.html" for number in range(40) if number != 1)
+    assert all(path.read_text() == "<p>text\n" for path in (tmp_path / "html").iterdir())
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+
+import array
+import marshal
+import zlib
+from typing import Callable, Iterable
+
+import pytest
+
+from rtfparse import entities
+from rtfparse.cache import Parse_Cache
+
+DOCUMENT = rb"{\rtf1\ansi\ansicpg1252 {\fonttbl{\f0 Arial;}}{\b bold} text\par}"
+
+
+def signature(events: Iterable[entities.Event]) -> list[tuple]:
+    return [(event.kind, type(event.entity).__name__, event.entity.start_position) for event in events]
+
+
+def rewritten(change: Callable[[list], None]) -> Callable[[bytes], bytes]:
+    """
+    Returns a function which changes the columns of a cache entry and serializes them again
+    """
+
+    def corrupt(entry: bytes) -> bytes:
+        columns = list(marshal.loads(zlib.decompress(entry)))
+        change(columns)
+        return zlib.compress(marshal.dumps(tuple(columns)))
+
+    return corrupt
+
+
+def unknown_kind(columns: list) -> None:
+    columns[1] = columns[1][:-1] + bytes((200,))
+
+
+def name_out_of_table(columns: list) -> None:
+    values, ids = columns[4]
+    columns[4] = values, array.array("I", [len(values)] * (len(ids) // 4)).tobytes()
+
+
+def missing_position(columns: list) -> None:
+    columns[3] = columns[3][: -array.array(columns[0]).itemsize]
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    (lambda entry: entry[: len(entry) // 2], rewritten(unknown_kind), rewritten(name_out_of_table), rewritten(missing_position)),
+    ids=("truncated", "kind", "name", "position"),
+)
+def test_corrupt_entry_is_parsed_again(corrupt: Callable[[bytes], bytes], tmp_path, caplog) -> None:
+    cache = Parse_Cache(tmp_path)
+    expected = signature(cache.iter_events(DOCUMENT, "cp1252"))
+    path = cache.path(cache.key(DOCUMENT))
+    path.write_bytes(corrupt(path.read_bytes()))
+    assert signature(cache.iter_events(DOCUMENT, "cp1252")) == expected
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert "Dropping the unreadable cache entry" in caplog.text
+    # The document parsed again is cached again
+    assert signature(cache.iter_events(DOCUMENT, "cp1252")) == expected
+    assert cache.hits == 1
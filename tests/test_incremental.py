@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+
+
+import random
+
+import pytest
+
+from rtfparse import entities, header, incremental, tokenizer
+
+DOCUMENTS = {
+    "cp1252": (
+        rb"{\rtf1\ansi\ansicpg1252\deff0{\fonttbl{\f0\fswiss Arial;}}{\*\generator test;}"
+        rb"{\pard\fs-12 Caf\'e9\'e8\'ea plain text\par}"
+        b"\r\nwrapped over\r\nline breaks\r\n"
+        rb"{\uc2\u-12\'3f\'3f\u33636\'80\'80 after\u21717??\u22211?? smile}"
+        rb"\u55357?\u56832? \~\-\_\{\}\\"
+        rb"{\*\ignorable {\nested}}"
+        rb"{\object\objdata\bin5 {\}\'x}"
+        b"{\\pict\\pngblip 89504e47\r\n0d0a1a0a\r\n}"
+        rb"\bin0 \par}"
+    ),
+    "cp932": rb"{\rtf1\ansi\ansicpg932\deff0 \'82\'a0\'82" b"\r\n" rb"\'a2 text {\b \'93\'fa\'96\'7b}\par}",
+}
+
+
+def signature(events: list[entities.Event]) -> list[tuple]:
+    """
+    Returns what the events tell about the document, to compare events made by different parsers
+    """
+    return [
+        (
+            kind,
+            type(entity).__name__,
+            entity.start_position,
+            getattr(entity, "end_position", None),
+            getattr(entity, "name", None),
+            entity.text,
+            getattr(entity, "control_name", None),
+            getattr(entity, "parameter", None),
+            getattr(entity, "bindata", None),
+            getattr(entity, "ignorable", None),
+        )
+        for kind, entity in events
+    ]
+
+
+def chunked(data: bytes, size: int) -> list[bytes]:
+    return [data[start : start + size] for start in range(0, len(data), size)]
+
+
+def expected(data: bytes) -> list[tuple]:
+    return signature(list(entities.iter_events(data, header.scan(data).encoding)))
+
+
+@pytest.mark.parametrize("name", DOCUMENTS)
+@pytest.mark.parametrize("size", (1, 2, 3, 5, 7, 64, 1 << 20))
+def test_chunks_of_any_size(name: str, size: int) -> None:
+    data = DOCUMENTS[name]
+    assert signature(list(incremental.iter_events(chunked(data, size)))) == expected(data)
+
+
+@pytest.mark.parametrize("name", DOCUMENTS)
+def test_every_split(name: str) -> None:
+    data = DOCUMENTS[name]
+    reference = expected(data)
+    for split in range(1, len(data)):
+        assert signature(list(incremental.iter_events((data[:split], data[split:])))) == reference, f"split at {split}"
+
+
+@pytest.mark.parametrize(
+    "inside",
+    (rb"\bin5 {", rb"{\*", rb"\'e", rb"\u-1", rb"\u2", b"wrapped over\r", rb"\'82" b"\r"),
+)
+def test_splits_inside_tokens(inside: bytes) -> None:
+    data = next(data for data in DOCUMENTS.values() if inside in data)
+    start = data.index(inside)
+    reference = expected(data)
+    for split in range(start + 1, start + len(inside)):
+        # Also with the rest of the document fed byte by byte
+        chunks = [data[:split]] + chunked(data[split:], 1)
+        assert signature(list(incremental.iter_events(chunks))) == reference, f"split at {split}"
+
+
+def test_random_chunks() -> None:
+    rng = random.Random(0)
+    for data in DOCUMENTS.values():
+        reference = expected(data)
+        for _ in range(50):
+            chunks = list()
+            position = 0
+            while position < len(data):
+                size = rng.randint(1, 12)
+                chunks.append(data[position : position + size])
+                position += size
+            assert signature(list(incremental.iter_events(chunks))) == reference
+
+
+def test_feed_after_close() -> None:
+    parser = incremental.Incremental_Parser()
+    parser.feed(DOCUMENTS["cp1252"])
+    parser.close()
+    with pytest.raises(ValueError):
+        parser.feed(b"{")
+
+
+def count_tokenizing(monkeypatch) -> list:
+    calls = list()
+    tokenize = tokenizer.tokenize
+
+    def counted(*args, **kwargs):
+        calls.append(args[2] if len(args) > 2 else 0)
+        return tokenize(*args, **kwargs)
+
+    monkeypatch.setattr(tokenizer, "tokenize", counted)
+    return calls
+
+
+@pytest.mark.parametrize(
+    "run",
+    (
+        b"plain text\r\nwrapped over lines " * 2000,
+        rb"\'e9\'e8" b"\r\n" * 2000,
+        rb"\u20320?\u-3913\'3f" b"\r\n" * 2000,
+    ),
+    ids=("text", "hex", "unicode"),
+)
+def test_long_run_in_small_chunks(run: bytes, monkeypatch) -> None:
+    data = rb"{\rtf1\ansi\ansicpg1252 " + run + rb"\par}"
+    reference = expected(data)
+    calls = count_tokenizing(monkeypatch)
+    assert signature(list(incremental.iter_events(chunked(data, 16)))) == reference
+    # The run is tokenized once it has ended, not again with every chunk
+    assert len(calls) < 10
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+
+
+from rtfparse import entities, tokenizer
+from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers.plain_text import Plain_Text_Renderer
+
+DEPTH = 500
+DOCUMENT = rb"{\rtf1\ansi {\fonttbl{\f0 Arial;}}" + b"{\\b x\\u8364? " * DEPTH + b"}" * DEPTH + rb"{\pict\pngblip 0123}}"
+
+
+def test_lazy_groups_stay_unparsed() -> None:
+    parsed = Rtf_Parser(rtf_buffer=DOCUMENT, lazy=True).parse_file()
+    lazy_groups = [item for item in parsed.structure if isinstance(item, entities.Lazy_Group)]
+    assert len(lazy_groups) == 3
+    assert all(group._structure is None for group in lazy_groups)
+
+
+def test_lazy_tree_renders_like_eager_tree() -> None:
+    eager = Plain_Text_Renderer().render_to_string(Rtf_Parser(rtf_buffer=DOCUMENT).parse_file())
+    lazy = Plain_Text_Renderer().render_to_string(Rtf_Parser(rtf_buffer=DOCUMENT, lazy=True).parse_file())
+    assert lazy == eager == "x\u20ac " * DEPTH
+
+
+def test_lazy_groups_are_scanned_once(monkeypatch) -> None:
+    scanned = list()
+    skip_group = tokenizer.skip_group
+
+    def counted(data, position, ends=None):
+        scanned.append(position)
+        return skip_group(data, position, ends)
+
+    monkeypatch.setattr(tokenizer, "skip_group", counted)
+    Plain_Text_Renderer().render_to_string(Rtf_Parser(rtf_buffer=DOCUMENT, lazy=True).parse_file())
+    # Only the groups of the root are scanned for their ends, the ends of the groups nested in them are recorded then
+    assert len(scanned) == 3
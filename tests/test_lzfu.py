@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+
+import logging
+import struct
+import zlib
+from typing import Iterator, Union
+
+import pytest
+
+from rtfparse import lzfu
+
+# The examples of [MS-OXRTFCP] 3.1
+SPEC_RTF = rb"{\rtf1\ansi\ansicpg1252\pard hello world}" + b"\r\n"
+SPEC_COMPRESSED = bytes.fromhex("2d0000002b0000004c5a4675f1c5c7a703000a007263706731323542320af32068656c090020627705b06c647d0a800fa0")
+# Overlapping references copy bytes which they have just written
+SPEC_REPEATED_RTF = rb"{\rtf1 WXYZWXYZWXYZWXYZWXYZ}"
+SPEC_REPEATED_COMPRESSED = bytes.fromhex("1a0000001c0000004c5a4675e2d44b51410004205758595a0d6e7d010eb0")
+SPEC_UNCOMPRESSED = lzfu.HEADER.pack(len(SPEC_RTF) + 12, len(SPEC_RTF), lzfu.UNCOMPRESSED, 0) + SPEC_RTF
+CHUNK_SIZES = (1, 2, 3, 5, 16, 4096)
+START = len(lzfu.INITIAL_DICTIONARY)  # where the first decompressed byte is written into the dictionary
+
+
+def chunked(data: bytes, size: int) -> Iterator[bytes]:
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+def compress(tokens: list[Union[bytes, tuple[int, int]]], size: int) -> bytes:
+    """
+    Returns compressed RTF of the literal bytes and (offset, length) references in `tokens`, decompressing into `size` bytes
+    """
+    body = bytearray()
+    flags = list()
+    for token in tokens:
+        if isinstance(token, tuple):
+            offset, length = token
+            flags.append((1, struct.pack(">H", offset << 4 | (length - 2))))
+        else:
+            flags.extend((0, bytes((byte,))) for byte in token)
+    # The end is a reference to the position being written
+    flags.append((1, struct.pack(">H", ((START + size) & lzfu.MASK) << 4)))
+    for start in range(0, len(flags), 8):
+        group = flags[start : start + 8]
+        body.append(sum(flag << bit for bit, (flag, _) in enumerate(group)))
+        body += b"".join(piece for _, piece in group)
+    crc = zlib.crc32(body, 0xFFFFFFFF) ^ 0xFFFFFFFF
+    return lzfu.HEADER.pack(len(body) + 12, size, lzfu.COMPRESSED, crc) + bytes(body)
+
+
+@pytest.mark.parametrize(
+    "compressed, rtf",
+    ((SPEC_COMPRESSED, SPEC_RTF), (SPEC_REPEATED_COMPRESSED, SPEC_REPEATED_RTF), (SPEC_UNCOMPRESSED, SPEC_RTF)),
+    ids=("compressed", "repeated", "uncompressed"),
+)
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_spec_examples(compressed: bytes, rtf: bytes, size: int, caplog) -> None:
+    assert b"".join(lzfu.iter_decompressed(chunked(compressed, size))) == rtf
+    assert not [record for record in caplog.records if record.levelno >= logging.WARNING]
+
+
+def test_decompress() -> None:
+    assert lzfu.decompress(SPEC_COMPRESSED) == SPEC_RTF
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_crc_mismatch(size: int, caplog) -> None:
+    compressed = bytearray(SPEC_COMPRESSED)
+    compressed[12] ^= 0xFF
+    assert b"".join(lzfu.iter_decompressed(chunked(compressed, size))) == SPEC_RTF
+    assert ["CRC" in record.getMessage() for record in caplog.records if record.levelno >= logging.WARNING] == [True]
+
+
+def test_unknown_type() -> None:
+    with pytest.raises(lzfu.Decompression_Error):
+        lzfu.decompress(lzfu.HEADER.pack(12, 0, 0x12345678, 0))
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_references_wrap_around_dictionary(size: int, caplog) -> None:
+    literals = bytes((index * 7 + 3) % 251 for index in range(4000))
+    # The literals fill the dictionary up to its end and wrap around to its start, up to position 110
+    read_wrapped = (4094, 6)  # copies the bytes at 4094, 4095, 0, 1, 2, 3
+    read_initial = (150, 10)  # copies bytes of the initial dictionary which are not overwritten yet
+    expected = literals + literals[4094 - START : 4094 - START + 6] + lzfu.INITIAL_DICTIONARY[150:160]
+    compressed = compress([literals, read_wrapped, read_initial], len(expected))
+    assert b"".join(lzfu.iter_decompressed(chunked(compressed, size))) == expected
+    assert not [record for record in caplog.records if record.levelno >= logging.WARNING]
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_copies_wrap_around_dictionary(size: int, caplog) -> None:
+    literals = bytes((index * 7 + 3) % 251 for index in range(4096 - 5 - START))
+    # The copy of the first reference is written at 4091 to 4095 and 0 to 2, the second reads from 4093 to 0
+    write_wrapped = (START + 93, 8)
+    read_copy = (4093, 4)
+    expected = literals + literals[93:101] + literals[95:99]
+    compressed = compress([literals, write_wrapped, read_copy], len(expected))
+    assert b"".join(lzfu.iter_decompressed(chunked(compressed, size))) == expected
+    assert not [record for record in caplog.records if record.levelno >= logging.WARNING]
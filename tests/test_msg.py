@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+
+
+import io
+import pathlib
+
+import pytest
+
+from rtfparse import incremental, msg
+from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers.html_decapsulator import HTML_Decapsulator
+
+# An HTML mail of 1500 paragraphs, whose RTF body is larger than the dictionary of the compressed RTF,
+# with an attachment named by a path
+MESSAGE = pathlib.Path(__file__).parent / "data" / "message.msg"
+HTML = "<html><body>" + "".join(f"<p>Line {number} caf\u00e9</p>" for number in range(1500)) + "</body></html>"
+
+
+@pytest.mark.parametrize("chunk_size", (1000, 4096, msg.CHUNK_SIZE))
+def test_decapsulate_while_decompressing(chunk_size: int) -> None:
+    output = io.BytesIO()
+    copy = io.BytesIO()
+    renderer = HTML_Decapsulator()
+    parser = incremental.Incremental_Parser()
+    with msg.Msg_File(MESSAGE) as message:
+        for chunk in message.iter_rtf(chunk_size=chunk_size, copy=copy):
+            renderer.render_events(parser.feed(chunk), output)
+    renderer.render_events(parser.close(), output)
+    assert output.getvalue().decode("utf-8") == HTML
+    # The copy of the RTF is the whole document
+    assert HTML_Decapsulator().render_to_string(Rtf_Parser(rtf_buffer=copy.getvalue()).parse_file()) == HTML
+
+
+def test_attachments(tmp_path) -> None:
+    with msg.Msg_File(MESSAGE) as message:
+        assert [attachment.name for attachment in message.attachments()] == ["notes.txt"]
+        saved = message.save_attachments(tmp_path / "attachments", chunk_size=7)
+    assert saved == [tmp_path / "attachments" / "notes.txt"]
+    assert saved[0].read_bytes() == b"Attached notes\r\n" * 3
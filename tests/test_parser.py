@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+
+import io
+import mmap
+import os
+import threading
+
+from rtfparse import entities, parser
+from rtfparse.parser import Rtf_Parser
+from rtfparse.renderers.html_decapsulator import HTML_Decapsulator
+
+DOCUMENT = rb"{\rtf1\ansi\ansicpg1252\fromhtml1 {\*\htmltag1 <p>}Caf\'e9 {\b bold}\par " + b"x" * 200_000 + rb"}"
+
+
+def render(parsed: entities.Group) -> str:
+    output = io.StringIO()
+    HTML_Decapsulator().render(parsed, output)
+    return output.getvalue()
+
+
+def test_parse_from_pipe() -> None:
+    read_end, write_end = os.pipe()
+
+    # The document is larger than the buffer of the pipe, so it is written while it is read
+    def write() -> None:
+        with os.fdopen(write_end, "wb") as file:
+            file.write(DOCUMENT)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    with os.fdopen(read_end, "rb") as file:
+        assert not parser.is_regular_file(file)
+        parsed = Rtf_Parser(rtf_file=file).parse_file()
+    writer.join()
+    assert isinstance(parsed, entities.Group)
+    assert render(parsed) == render(Rtf_Parser(rtf_buffer=DOCUMENT).parse_file())
+
+
+def test_map_regular_file(tmp_path) -> None:
+    path = tmp_path / "document.rtf"
+    path.write_bytes(DOCUMENT)
+    with open(path, "rb") as file:
+        assert parser.is_regular_file(file)
+        data = parser.map_file(file)
+    assert isinstance(data, mmap.mmap)
+    assert data[:] == DOCUMENT
+    assert render(Rtf_Parser(rtf_path=path).parse_file()) == render(Rtf_Parser(rtf_buffer=DOCUMENT).parse_file())
+
+
+def test_parse_groups_reads_file_once(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "document.rtf"
+    path.write_bytes(DOCUMENT)
+    calls = list()
+    read_data = Rtf_Parser.read_data
+
+    def counted(self: Rtf_Parser) -> bytes:
+        calls.append(self)
+        return read_data(self)
+
+    monkeypatch.setattr(Rtf_Parser, "read_data", counted)
+    groups = list(Rtf_Parser(rtf_path=path).parse_groups("b"))
+    assert [(group.name, render(group)) for group in groups] == [("b", "bold")]
+    assert len(calls) == 1